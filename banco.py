@@ -0,0 +1,361 @@
+# ===================================================
+# BANCO DE DADOS: CONEXÃO, PERFIS E MIGRAÇÕES
+# ===================================================
+import os                         # Importa o módulo os para ler a variável de ambiente do perfil do banco
+import sqlite3                    # Importa o módulo para trabalhar com banco de dados SQLite
+import sys                        # Importa o módulo sys: os avisos vão para a saída de erros, sem misturar com a saída de dados da linha de comando
+
+from diagnostico import fabrica_conexao # Conexão instrumentada quando LIVRARIA_DIAGNOSTICO=1 (senão, a conexão comum)
+
+CAMINHO_BANCO = "clientes_livraria.db" # Arquivo do banco de dados SQLite da aplicação
+# Perfis de configuração da conexão com o SQLite. 'local' é o recomendado para o banco no próprio computador;
+# 'rede' evita o WAL e o mmap, que não funcionam de forma confiável em pastas compartilhadas; 'original' reproduz os padrões antigos.
+# auto_vacuum só vale para bancos novos (antes da primeira tabela); os existentes são convertidos pelo primeiro compactar_banco().
+PERFIS_BANCO = {
+    "local": {"auto_vacuum": "INCREMENTAL", "journal_mode": "WAL", "synchronous": "NORMAL", "mmap_size": 256 * 1024 * 1024, "cache_size": -64 * 1024, "cached_statements": 256},
+    "rede": {"auto_vacuum": "INCREMENTAL", "journal_mode": "DELETE", "synchronous": "NORMAL", "mmap_size": 0, "cache_size": -64 * 1024, "cached_statements": 256},
+    "original": {"auto_vacuum": "NONE", "journal_mode": "DELETE", "synchronous": "FULL", "mmap_size": 0, "cache_size": -2000, "cached_statements": 128},
+} # cache_size negativo é em KiB (-65536 = 64 MiB)
+PERFIL_BANCO = os.environ.get("LIVRARIA_PERFIL_BANCO") # Perfil usado por conectar_banco(); sem a variável de ambiente, é escolhido pelo local do arquivo (escolher_perfil)
+# Tipos de sistema de arquivos de rede (/proc/mounts no Linux) em que o WAL e o mmap não são seguros
+SISTEMAS_ARQUIVOS_REDE = {"nfs", "nfs4", "cifs", "smb3", "smbfs", "afs", "9p", "ceph", "glusterfs", "fuse.sshfs", "davfs"}
+PAGINAS_VACUO_INCREMENTAL = 2048 # Páginas livres devolvidas ao sistema a cada otimização (8 MiB com páginas de 4 KiB), para não travar a interface
+SUFIXO_ARQUIVO_VENDAS = "_arquivo" # clientes_livraria.db -> clientes_livraria_arquivo.db (vendas antigas, veja anexar_arquivo)
+
+def caminho_em_rede(caminho): # True se o arquivo do banco fica numa pasta compartilhada (caminho UNC ou unidade de rede no Windows, NFS/SMB no Linux)
+    if caminho == ":memory:": return False
+    pasta = os.path.dirname(os.path.realpath(caminho))
+    if os.name == "nt":
+        if pasta.startswith("\\\\"): return True # \\servidor\pasta
+        import ctypes # Importado só no Windows
+        return ctypes.windll.kernel32.GetDriveTypeW(os.path.splitdrive(pasta)[0] + "\\") == 4 # 4 = DRIVE_REMOTE (letra mapeada para a rede)
+    try:
+        with open("/proc/mounts", encoding="utf-8") as arquivo: montagens = [linha.split()[1:3] for linha in arquivo]
+    except OSError: return False # Sem /proc (macOS, por exemplo): considera local
+    ponto_mais_longo, tipo = "", ""
+    for ponto, tipo_montagem in montagens: # A montagem mais específica que contém a pasta define o sistema de arquivos
+        ponto = ponto.replace("\\040", " ") # Espaços aparecem como \040 em /proc/mounts
+        if (pasta == ponto or pasta.startswith(ponto.rstrip("/") + "/")) and len(ponto) > len(ponto_mais_longo): ponto_mais_longo, tipo = ponto, tipo_montagem
+    return tipo in SISTEMAS_ARQUIVOS_REDE
+
+def escolher_perfil(caminho, perfil=PERFIL_BANCO): # Perfil efetivo: sem perfil definido, 'rede' em pasta compartilhada e 'local' no resto
+    em_rede = caminho_em_rede(caminho)
+    if perfil is None: return "rede" if em_rede else "local"
+    config = PERFIS_BANCO[perfil]
+    if em_rede and (config["journal_mode"] == "WAL" or config["mmap_size"]): # Nunca WAL nem mmap na rede, mesmo que o perfil tenha sido pedido
+        print(f"O banco {caminho} está numa pasta compartilhada: usando o perfil 'rede' no lugar de '{perfil}'.", file=sys.stderr)
+        return "rede"
+    return perfil
+
+def conectar_banco(caminho=CAMINHO_BANCO, perfil=PERFIL_BANCO, entre_threads=False): # Conecta ao banco de dados, aplica o perfil de desempenho, ativa as chaves estrangeiras e aplica as migrações pendentes.
+    config = PERFIS_BANCO[escolher_perfil(caminho, perfil)]
+    # entre_threads=True (pool do servidor): a conexão pode passar de uma thread a outra, desde que uma de cada vez
+    conexao = sqlite3.connect(caminho, cached_statements=config["cached_statements"], factory=fabrica_conexao(), check_same_thread=not entre_threads) # Conecta (ou cria) o banco de dados SQLite chamado 'clientes_livraria.db'
+    for pragma in ("auto_vacuum", "journal_mode", "synchronous", "mmap_size", "cache_size"):
+        conexao.execute(f"PRAGMA {pragma} = {config[pragma]}") # PRAGMA não aceita parâmetros '?'
+    conexao.execute("PRAGMA foreign_keys = ON") # Sem isso o SQLite ignora o ON DELETE CASCADE da tabela 'vendas'
+    aplicar_migracoes(conexao)
+    return conexao
+
+def otimizar_banco(conexao): # Atualiza as estatísticas do planejador de consultas, quando o SQLite julgar necessário (operação barata)
+    try:
+        conexao.execute("PRAGMA optimize")
+        # Com auto_vacuum = INCREMENTAL, devolve aos poucos o espaço das linhas apagadas. O pragma libera uma página a cada passo
+        # e o execute() do sqlite3 só executa o primeiro; o executescript() executa até o fim.
+        if conexao.execute("PRAGMA main.freelist_count").fetchone()[0]: conexao.executescript(f"PRAGMA main.incremental_vacuum({PAGINAS_VACUO_INCREMENTAL})")
+    except sqlite3.Error as e: print(f"PRAGMA optimize falhou: {e}", file=sys.stderr)
+
+def compactar_banco(conexao): # Devolve ao sistema todo o espaço livre do banco principal; na primeira vez converte o banco para auto_vacuum = INCREMENTAL
+    if conexao.execute("PRAGMA main.auto_vacuum").fetchone()[0] != 2: # 2 = INCREMENTAL; a conversão exige um VACUUM completo (uma única vez)
+        conexao.execute("PRAGMA main.auto_vacuum = INCREMENTAL"); conexao.execute("VACUUM main")
+    else: conexao.executescript("PRAGMA main.incremental_vacuum") # Sem limite: todas as páginas livres (veja otimizar_banco)
+    if conexao.execute("PRAGMA main.journal_mode").fetchone()[0] == "wal": conexao.execute("PRAGMA main.wal_checkpoint(TRUNCATE)") # Também encolhe o arquivo -wal
+
+def aplicar_migracoes(conexao): # Executa, em ordem, as migrações de MIGRACOES que o banco ainda não recebeu (controle por PRAGMA user_version)
+    cursor = conexao.cursor()
+    versao_atual = cursor.execute("PRAGMA user_version").fetchone()[0]
+    for versao, migracao in enumerate(MIGRACOES, start=1):
+        if versao <= versao_atual: continue
+        try:
+            cursor.execute("BEGIN") # Uma transação por migração: se ela falhar no meio, nada dela fica gravado e a versão não muda
+            migracao(cursor)
+            cursor.execute(f"PRAGMA user_version = {versao}") # PRAGMA não aceita parâmetros '?'
+            conexao.commit()
+        except sqlite3.Error:
+            conexao.rollback(); raise
+        print(f"Banco de dados migrado para a versão {versao} ({migracao.__name__}).", file=sys.stderr)
+
+def executar_script(cursor, script): # Executa um script SQL comando a comando com execute(), dentro da transação em andamento
+    # O executescript() faria commit antes e rodaria cada comando fora da transação da migração
+    comando = ""
+    for linha in script.splitlines(keepends=True):
+        comando += linha
+        if sqlite3.complete_statement(comando): cursor.execute(comando); comando = "" # complete_statement reconhece o fim dos triggers (END;)
+    if comando.strip(): cursor.execute(comando)
+
+# Consultas que recalculam os resumos de vendas a partir de 'vendas' (varrem a tabela inteira). Usadas para preencher
+# os resumos na migração, pelo verificador de consistência e pela reconstrução; o dia é o texto AAAA-MM-DD de data_compra.
+SQL_RECALCULO_RESUMOS = {
+    "resumo_vendas_dia": """SELECT substr(v.data_compra, 1, 10), v.genero, c.estado, count(*), sum(v.valor_total)
+                            FROM vendas v JOIN clientes c ON c.id = v.cliente_id GROUP BY 1, 2, 3""",
+    "resumo_vendas_cliente": "SELECT cliente_id, count(*), sum(valor_total) FROM vendas GROUP BY cliente_id",
+}
+
+def reconstruir_resumos(cursor, consultas=SQL_RECALCULO_RESUMOS): # Apaga e recalcula os resumos de vendas (não faz commit)
+    for tabela, consulta in consultas.items():
+        cursor.execute(f"DELETE FROM {tabela}")
+        cursor.execute(f"INSERT INTO {tabela} {consulta}")
+
+# --- Migrações do banco de dados (versão = posição na lista MIGRACOES) ---
+def criar_tabelas(cursor): # Versão 1: tabelas 'clientes' e 'vendas' e o índice de nomes da lista paginada
+    # Cria a tabela 'clientes' caso ainda não exista:
+    cursor.execute("""      
+        CREATE TABLE IF NOT EXISTS clientes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            email TEXT NOT NULL UNIQUE,
+            telefone TEXT NOT NULL,
+            cidade TEXT NOT NULL,
+            estado TEXT NOT NULL
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_clientes_nome ON clientes (nome)") # Índice usado pela paginação da lista de clientes
+    # Cria a tabela 'vendas' caso ainda não exista
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS vendas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cliente_id INTEGER NOT NULL,
+            livro_titulo TEXT NOT NULL,
+            livro_autor TEXT NOT NULL,
+            genero TEXT NOT NULL,
+            data_compra DATE NOT NULL,
+            valor_total REAL NOT NULL,
+            FOREIGN KEY (cliente_id) REFERENCES clientes (id) ON DELETE CASCADE
+        )
+    """)
+
+def criar_indice_busca(cursor): # Versão 2: cria o índice de texto completo (FTS5) dos clientes, mantido em sincronia por triggers
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'clientes_fts'")
+    if cursor.fetchone(): return
+    try: # Tabela FTS5 de conteúdo externo: guarda só o índice, os dados continuam em 'clientes'
+        cursor.execute("""
+            CREATE VIRTUAL TABLE clientes_fts USING fts5(
+                nome, email, telefone, cidade, estado,
+                content='clientes', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+            )
+        """)
+    except sqlite3.OperationalError as e: # SQLite compilado sem FTS5: a busca usa LIKE, mais lenta
+        print(f"Busca por texto completo indisponível ({e}); usando busca simples.", file=sys.stderr)
+        return
+    executar_script(cursor, """
+        CREATE TRIGGER clientes_fts_insert AFTER INSERT ON clientes BEGIN
+            INSERT INTO clientes_fts (rowid, nome, email, telefone, cidade, estado) VALUES (new.id, new.nome, new.email, new.telefone, new.cidade, new.estado);
+        END;
+        CREATE TRIGGER clientes_fts_delete AFTER DELETE ON clientes BEGIN
+            INSERT INTO clientes_fts (clientes_fts, rowid, nome, email, telefone, cidade, estado) VALUES ('delete', old.id, old.nome, old.email, old.telefone, old.cidade, old.estado);
+        END;
+        CREATE TRIGGER clientes_fts_update AFTER UPDATE ON clientes BEGIN
+            INSERT INTO clientes_fts (clientes_fts, rowid, nome, email, telefone, cidade, estado) VALUES ('delete', old.id, old.nome, old.email, old.telefone, old.cidade, old.estado);
+            INSERT INTO clientes_fts (rowid, nome, email, telefone, cidade, estado) VALUES (new.id, new.nome, new.email, new.telefone, new.cidade, new.estado);
+        END;
+        INSERT INTO clientes_fts (clientes_fts) VALUES ('rebuild');
+    """) # O 'rebuild' indexa os clientes que já existiam no banco
+
+def indexar_vendas_por_cliente(cursor): # Versão 3: remove vendas órfãs e cria o índice das compras de cada cliente
+    # Enquanto as chaves estrangeiras estavam desligadas, excluir um cliente deixava suas vendas para trás:
+    cursor.execute("DELETE FROM vendas WHERE cliente_id NOT IN (SELECT id FROM clientes)")
+    if cursor.rowcount: print(f"{cursor.rowcount} vendas sem cliente foram removidas.", file=sys.stderr)
+    # Atende 'WHERE cliente_id = ? ORDER BY data_compra DESC' sem varrer a tabela nem ordenar:
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_vendas_cliente_data ON vendas (cliente_id, data_compra)")
+
+def criar_resumos_vendas(cursor): # Versão 4: tabelas de resumo das vendas (por dia/gênero/UF e por cliente), mantidas por triggers
+    # Os relatórios leem estes totais em vez de varrer 'vendas'; o tamanho de resumo_vendas_dia depende do número
+    # de combinações dia × gênero × UF, não do número de vendas.
+    executar_script(cursor, """
+        CREATE TABLE IF NOT EXISTS resumo_vendas_dia (
+            data TEXT NOT NULL,
+            genero TEXT NOT NULL,
+            estado TEXT NOT NULL,
+            quantidade INTEGER NOT NULL,
+            total REAL NOT NULL,
+            PRIMARY KEY (data, genero, estado)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS resumo_vendas_cliente (
+            cliente_id INTEGER PRIMARY KEY,
+            quantidade INTEGER NOT NULL,
+            total REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_resumo_vendas_cliente_total ON resumo_vendas_cliente (total);
+
+        -- Nova venda: soma no dia/gênero/UF do cliente e no total do cliente
+        CREATE TRIGGER IF NOT EXISTS vendas_resumo_insert AFTER INSERT ON vendas BEGIN
+            INSERT INTO resumo_vendas_dia (data, genero, estado, quantidade, total)
+                SELECT substr(new.data_compra, 1, 10), new.genero, estado, 1, new.valor_total FROM clientes WHERE id = new.cliente_id
+                ON CONFLICT (data, genero, estado) DO UPDATE SET quantidade = quantidade + 1, total = total + excluded.total;
+            INSERT INTO resumo_vendas_cliente (cliente_id, quantidade, total) VALUES (new.cliente_id, 1, new.valor_total)
+                ON CONFLICT (cliente_id) DO UPDATE SET quantidade = quantidade + 1, total = total + excluded.total;
+        END;
+        -- Venda excluída: subtrai e remove as linhas zeradas. Quando o cliente inteiro é excluído (ON DELETE CASCADE),
+        -- ele já não existe aqui e a subtração é feita de uma vez por clientes_resumo_delete.
+        CREATE TRIGGER IF NOT EXISTS vendas_resumo_delete AFTER DELETE ON vendas WHEN EXISTS (SELECT 1 FROM clientes WHERE id = old.cliente_id) BEGIN
+            UPDATE resumo_vendas_dia SET quantidade = quantidade - 1, total = total - old.valor_total
+                WHERE data = substr(old.data_compra, 1, 10) AND genero = old.genero AND estado = (SELECT estado FROM clientes WHERE id = old.cliente_id);
+            DELETE FROM resumo_vendas_dia
+                WHERE data = substr(old.data_compra, 1, 10) AND genero = old.genero AND estado = (SELECT estado FROM clientes WHERE id = old.cliente_id) AND quantidade <= 0;
+            UPDATE resumo_vendas_cliente SET quantidade = quantidade - 1, total = total - old.valor_total WHERE cliente_id = old.cliente_id;
+            DELETE FROM resumo_vendas_cliente WHERE cliente_id = old.cliente_id AND quantidade <= 0;
+        END;
+        -- Venda alterada: desfaz a venda antiga e soma a nova (a troca de título ou autor não dispara o trigger)
+        CREATE TRIGGER IF NOT EXISTS vendas_resumo_update AFTER UPDATE OF cliente_id, genero, data_compra, valor_total ON vendas BEGIN
+            UPDATE resumo_vendas_dia SET quantidade = quantidade - 1, total = total - old.valor_total
+                WHERE data = substr(old.data_compra, 1, 10) AND genero = old.genero AND estado = (SELECT estado FROM clientes WHERE id = old.cliente_id);
+            DELETE FROM resumo_vendas_dia
+                WHERE data = substr(old.data_compra, 1, 10) AND genero = old.genero AND estado = (SELECT estado FROM clientes WHERE id = old.cliente_id) AND quantidade <= 0;
+            UPDATE resumo_vendas_cliente SET quantidade = quantidade - 1, total = total - old.valor_total WHERE cliente_id = old.cliente_id;
+            DELETE FROM resumo_vendas_cliente WHERE cliente_id = old.cliente_id AND quantidade <= 0;
+            INSERT INTO resumo_vendas_dia (data, genero, estado, quantidade, total)
+                SELECT substr(new.data_compra, 1, 10), new.genero, estado, 1, new.valor_total FROM clientes WHERE id = new.cliente_id
+                ON CONFLICT (data, genero, estado) DO UPDATE SET quantidade = quantidade + 1, total = total + excluded.total;
+            INSERT INTO resumo_vendas_cliente (cliente_id, quantidade, total) VALUES (new.cliente_id, 1, new.valor_total)
+                ON CONFLICT (cliente_id) DO UPDATE SET quantidade = quantidade + 1, total = total + excluded.total;
+        END;
+        -- Cliente mudou de UF: as vendas dele passam da UF antiga para a nova
+        CREATE TRIGGER IF NOT EXISTS clientes_resumo_estado AFTER UPDATE OF estado ON clientes WHEN old.estado IS NOT new.estado BEGIN
+            UPDATE resumo_vendas_dia SET quantidade = quantidade - v.vendidas, total = total - v.valor
+                FROM (SELECT substr(data_compra, 1, 10) AS data, genero, count(*) AS vendidas, sum(valor_total) AS valor
+                      FROM vendas WHERE cliente_id = new.id GROUP BY 1, 2) AS v
+                WHERE resumo_vendas_dia.data = v.data AND resumo_vendas_dia.genero = v.genero AND estado = old.estado;
+            DELETE FROM resumo_vendas_dia WHERE estado = old.estado AND quantidade <= 0
+                AND (data, genero) IN (SELECT substr(data_compra, 1, 10), genero FROM vendas WHERE cliente_id = new.id);
+            INSERT INTO resumo_vendas_dia (data, genero, estado, quantidade, total)
+                SELECT substr(data_compra, 1, 10), genero, new.estado, count(*), sum(valor_total) FROM vendas WHERE cliente_id = new.id GROUP BY 1, 2
+                ON CONFLICT (data, genero, estado) DO UPDATE SET quantidade = quantidade + excluded.quantidade, total = total + excluded.total;
+        END;
+        -- Cliente excluído: retira todas as vendas dele antes que o ON DELETE CASCADE as apague
+        CREATE TRIGGER IF NOT EXISTS clientes_resumo_delete BEFORE DELETE ON clientes BEGIN
+            UPDATE resumo_vendas_dia SET quantidade = quantidade - v.vendidas, total = total - v.valor
+                FROM (SELECT substr(data_compra, 1, 10) AS data, genero, count(*) AS vendidas, sum(valor_total) AS valor
+                      FROM vendas WHERE cliente_id = old.id GROUP BY 1, 2) AS v
+                WHERE resumo_vendas_dia.data = v.data AND resumo_vendas_dia.genero = v.genero AND estado = old.estado;
+            DELETE FROM resumo_vendas_dia WHERE estado = old.estado AND quantidade <= 0
+                AND (data, genero) IN (SELECT substr(data_compra, 1, 10), genero FROM vendas WHERE cliente_id = old.id);
+            DELETE FROM resumo_vendas_cliente WHERE cliente_id = old.id;
+        END;
+    """)
+    reconstruir_resumos(cursor) # Preenche os resumos com as vendas que já existiam no banco
+
+def criar_registro_alteracoes(cursor): # Versão 5: registro de alterações em clientes e vendas, preenchido por triggers
+    # As janelas abertas (deste ou de outros programas) leem as linhas com seq maior que a última que viram
+    # e atualizam só os registros alterados, em vez de recarregar as listas.
+    executar_script(cursor, """
+        CREATE TABLE IF NOT EXISTS alteracoes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT, -- AUTOINCREMENT: a sequência só cresce, mesmo depois da limpeza das linhas antigas
+            tabela TEXT NOT NULL,                  -- 'clientes' ou 'vendas'
+            operacao TEXT NOT NULL,                -- 'I' (inclusão), 'U' (alteração), 'D' (exclusão) ou 'R' (carga em lote: recarregar tudo)
+            registro_id INTEGER,                   -- id do cliente ou da venda (NULL em 'R')
+            cliente_id INTEGER                     -- cliente da venda (em clientes, o próprio id)
+        );
+        CREATE TRIGGER IF NOT EXISTS clientes_alteracao_insert AFTER INSERT ON clientes BEGIN
+            INSERT INTO alteracoes (tabela, operacao, registro_id, cliente_id) VALUES ('clientes', 'I', new.id, new.id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS clientes_alteracao_update AFTER UPDATE ON clientes BEGIN
+            INSERT INTO alteracoes (tabela, operacao, registro_id, cliente_id) VALUES ('clientes', 'U', new.id, new.id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS clientes_alteracao_delete AFTER DELETE ON clientes BEGIN
+            INSERT INTO alteracoes (tabela, operacao, registro_id, cliente_id) VALUES ('clientes', 'D', old.id, old.id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS vendas_alteracao_insert AFTER INSERT ON vendas BEGIN
+            INSERT INTO alteracoes (tabela, operacao, registro_id, cliente_id) VALUES ('vendas', 'I', new.id, new.cliente_id);
+        END;
+        -- Venda passada para outro cliente: sai das compras do antigo ('D') e entra nas do novo ('U')
+        CREATE TRIGGER IF NOT EXISTS vendas_alteracao_update AFTER UPDATE ON vendas BEGIN
+            INSERT INTO alteracoes (tabela, operacao, registro_id, cliente_id) SELECT 'vendas', 'D', old.id, old.cliente_id WHERE old.cliente_id IS NOT new.cliente_id;
+            INSERT INTO alteracoes (tabela, operacao, registro_id, cliente_id) VALUES ('vendas', 'U', new.id, new.cliente_id);
+        END;
+        -- Na exclusão de um cliente (ON DELETE CASCADE) ele já não existe aqui: o 'D' do cliente basta, sem uma linha por venda
+        CREATE TRIGGER IF NOT EXISTS vendas_alteracao_delete AFTER DELETE ON vendas WHEN EXISTS (SELECT 1 FROM clientes WHERE id = old.cliente_id) BEGIN
+            INSERT INTO alteracoes (tabela, operacao, registro_id, cliente_id) VALUES ('vendas', 'D', old.id, old.cliente_id);
+        END;
+        -- Guarda só as 10 mil alterações mais recentes; a limpeza roda a cada mil inserções. Quem ficou para trás recarrega tudo.
+        CREATE TRIGGER IF NOT EXISTS alteracoes_limpeza AFTER INSERT ON alteracoes WHEN new.seq % 1000 = 0 BEGIN
+            DELETE FROM alteracoes WHERE seq <= new.seq - 10000;
+        END;
+    """)
+
+# Nunca reordene nem remova itens: a posição de cada migração é o número da versão gravado nos bancos existentes.
+MIGRACOES = [criar_tabelas, criar_indice_busca, indexar_vendas_por_cliente, criar_resumos_vendas, criar_registro_alteracoes]
+
+# --- Arquivo de vendas antigas ---
+# As vendas arquivadas (repositorio.arquivar_vendas) ficam num segundo arquivo SQLite ao lado do banco, anexado às conexões
+# como 'arquivo'. Ele tem os próprios resumos, mantidos por triggers do próprio arquivo; os nomes das tabelas são diferentes
+# dos do banco principal porque os triggers só podem usar nomes sem o prefixo do banco.
+SQL_ARQUIVO_VENDAS = [
+    """CREATE TABLE IF NOT EXISTS arquivo.vendas_arquivadas (
+        id INTEGER PRIMARY KEY, -- O mesmo id que a venda tinha no banco principal
+        cliente_id INTEGER NOT NULL,
+        livro_titulo TEXT NOT NULL,
+        livro_autor TEXT NOT NULL,
+        genero TEXT NOT NULL,
+        data_compra DATE NOT NULL,
+        valor_total REAL NOT NULL,
+        estado TEXT NOT NULL    -- UF do cliente, para os resumos (acompanha as mudanças do cadastro, veja GATILHOS_ARQUIVO_VENDAS)
+    )""",
+    "CREATE INDEX IF NOT EXISTS arquivo.idx_vendas_arquivadas_cliente_data ON vendas_arquivadas (cliente_id, data_compra)",
+    """CREATE TABLE IF NOT EXISTS arquivo.resumo_arquivado_dia (
+        data TEXT NOT NULL, genero TEXT NOT NULL, estado TEXT NOT NULL, quantidade INTEGER NOT NULL, total REAL NOT NULL,
+        PRIMARY KEY (data, genero, estado)
+    ) WITHOUT ROWID""",
+    "CREATE TABLE IF NOT EXISTS arquivo.resumo_arquivado_cliente (cliente_id INTEGER PRIMARY KEY, quantidade INTEGER NOT NULL, total REAL NOT NULL)",
+    """CREATE TRIGGER IF NOT EXISTS arquivo.vendas_arquivadas_insert AFTER INSERT ON vendas_arquivadas BEGIN
+        INSERT INTO resumo_arquivado_dia (data, genero, estado, quantidade, total) VALUES (substr(new.data_compra, 1, 10), new.genero, new.estado, 1, new.valor_total)
+            ON CONFLICT (data, genero, estado) DO UPDATE SET quantidade = quantidade + 1, total = total + excluded.total;
+        INSERT INTO resumo_arquivado_cliente (cliente_id, quantidade, total) VALUES (new.cliente_id, 1, new.valor_total)
+            ON CONFLICT (cliente_id) DO UPDATE SET quantidade = quantidade + 1, total = total + excluded.total;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS arquivo.vendas_arquivadas_delete AFTER DELETE ON vendas_arquivadas BEGIN
+        UPDATE resumo_arquivado_dia SET quantidade = quantidade - 1, total = total - old.valor_total
+            WHERE data = substr(old.data_compra, 1, 10) AND genero = old.genero AND estado = old.estado;
+        DELETE FROM resumo_arquivado_dia WHERE data = substr(old.data_compra, 1, 10) AND genero = old.genero AND estado = old.estado AND quantidade <= 0;
+        UPDATE resumo_arquivado_cliente SET quantidade = quantidade - 1, total = total - old.valor_total WHERE cliente_id = old.cliente_id;
+        DELETE FROM resumo_arquivado_cliente WHERE cliente_id = old.cliente_id AND quantidade <= 0;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS arquivo.vendas_arquivadas_estado AFTER UPDATE OF estado ON vendas_arquivadas WHEN old.estado IS NOT new.estado BEGIN
+        UPDATE resumo_arquivado_dia SET quantidade = quantidade - 1, total = total - old.valor_total
+            WHERE data = substr(old.data_compra, 1, 10) AND genero = old.genero AND estado = old.estado;
+        DELETE FROM resumo_arquivado_dia WHERE data = substr(old.data_compra, 1, 10) AND genero = old.genero AND estado = old.estado AND quantidade <= 0;
+        INSERT INTO resumo_arquivado_dia (data, genero, estado, quantidade, total) VALUES (substr(new.data_compra, 1, 10), new.genero, new.estado, 1, new.valor_total)
+            ON CONFLICT (data, genero, estado) DO UPDATE SET quantidade = quantidade + 1, total = total + excluded.total;
+    END""",
+]
+# Triggers temporários (só desta conexão): o cadastro de clientes fica no banco principal, cujos triggers não enxergam o arquivo.
+# Cliente excluído leva junto as vendas arquivadas; cliente que muda de UF leva as vendas arquivadas para a nova UF, como no banco principal.
+GATILHOS_ARQUIVO_VENDAS = [
+    """CREATE TEMP TRIGGER IF NOT EXISTS clientes_arquivo_delete AFTER DELETE ON main.clientes BEGIN
+        DELETE FROM vendas_arquivadas WHERE cliente_id = old.id;
+    END""",
+    """CREATE TEMP TRIGGER IF NOT EXISTS clientes_arquivo_estado AFTER UPDATE OF estado ON main.clientes WHEN old.estado IS NOT new.estado BEGIN
+        UPDATE vendas_arquivadas SET estado = new.estado WHERE cliente_id = new.id;
+    END""",
+]
+# Recálculo completo dos resumos do arquivo (mesmo formato de SQL_RECALCULO_RESUMOS)
+SQL_RECALCULO_RESUMOS_ARQUIVO = {
+    "arquivo.resumo_arquivado_dia": "SELECT substr(data_compra, 1, 10), genero, estado, count(*), sum(valor_total) FROM arquivo.vendas_arquivadas GROUP BY 1, 2, 3",
+    "arquivo.resumo_arquivado_cliente": "SELECT cliente_id, count(*), sum(valor_total) FROM arquivo.vendas_arquivadas GROUP BY cliente_id",
+}
+
+def caminho_arquivo_vendas(conexao): # Arquivo das vendas antigas ao lado do banco principal; None para bancos em memória
+    caminho = conexao.execute("PRAGMA database_list").fetchone()[2] # A primeira linha é sempre o banco 'main'
+    if not caminho: return None
+    raiz, extensao = os.path.splitext(caminho)
+    return f"{raiz}{SUFIXO_ARQUIVO_VENDAS}{extensao}"
+
+def anexar_arquivo(conexao, criar=False): # Anexa o arquivo de vendas como 'arquivo' (criando-o com criar=True); retorna False se ele não existir
+    if any(linha[1] == "arquivo" for linha in conexao.execute("PRAGMA database_list")): return True # Já anexado (verificação barata, feita a cada uso)
+    caminho = caminho_arquivo_vendas(conexao)
+    if caminho is None or conexao.in_transaction or not (criar or os.path.exists(caminho)): return False # ATTACH não pode ocorrer no meio de uma transação
+    conexao.execute("ATTACH DATABASE ? AS arquivo", (caminho,))
+    conexao.execute("PRAGMA arquivo.auto_vacuum = INCREMENTAL") # Só vale enquanto o arquivo ainda está vazio (recém-criado)
+    for pragma in ("journal_mode", "synchronous"): # Mesmo modo de diário e sincronização do banco principal (o perfil só vale para o 'main')
+        conexao.execute(f"PRAGMA arquivo.{pragma} = {conexao.execute(f'PRAGMA main.{pragma}').fetchone()[0]}")
+    for comando in SQL_ARQUIVO_VENDAS + GATILHOS_ARQUIVO_VENDAS: conexao.execute(comando)
+    return True
@@ -0,0 +1,44 @@
+# ===================================================
+# BENCHMARK: BUSCA INCREMENTAL DE CLIENTES
+# ===================================================
+# Gera um banco temporário com muitos clientes fictícios e mede o tempo da
+# primeira página de consultar_pagina_clientes() para vários termos de busca.
+# Uso: python benchmarks/benchmark_busca.py [--clientes 500000] [--repeticoes 5]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from banco import conectar_banco
+from repositorio import consultar_pagina_clientes
+from dados_sinteticos import popular
+
+TERMOS = ["a", "ana", "silva", "ana silva", "maceio", "sp", "98765", "inexistente", "cliente123"]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da busca de clientes")
+    parser.add_argument("--clientes", type=int, default=500_000, help="quantidade de clientes gerados")
+    parser.add_argument("--repeticoes", type=int, default=5, help="repetições de cada consulta (vale o menor tempo)")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as pasta:
+        conexao = conectar_banco(os.path.join(pasta, "busca.db"))
+        inicio = time.perf_counter(); popular(conexao, args.clientes)
+        print(f"{args.clientes} clientes gerados em {time.perf_counter() - inicio:.1f} s\n")
+        cursor = conexao.cursor()
+        print(f"{'termo':<14} {'1ª página':>10} {'2ª página':>10} {'linhas':>7}")
+        for termo in TERMOS:
+            tempos, tempos_seguinte = [], []
+            for _ in range(args.repeticoes):
+                inicio = time.perf_counter(); pagina = consultar_pagina_clientes(cursor, termo)
+                tempos.append(time.perf_counter() - inicio)
+                if pagina:
+                    inicio = time.perf_counter(); consultar_pagina_clientes(cursor, termo, (pagina[-1][1], pagina[-1][0]))
+                    tempos_seguinte.append(time.perf_counter() - inicio)
+            seguinte = f"{min(tempos_seguinte) * 1000:8.1f}ms" if tempos_seguinte else f"{'-':>10}"
+            print(f"{termo:<14} {min(tempos) * 1000:8.1f}ms {seguinte} {len(pagina):>7}")
+        conexao.close()
+
+if __name__ == "__main__":
+    main()
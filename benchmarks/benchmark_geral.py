@@ -0,0 +1,182 @@
+# ===================================================
+# BENCHMARK GERAL DA CAMADA DE DADOS
+# ===================================================
+# Gera (ou reaproveita) um banco sintético reprodutível e mede os caminhos de
+# código usados pela interface: páginas da lista de clientes e da busca,
+# compras de um cliente, exportação, inserções, atualizações, exclusões,
+# relatórios e arquivamento das vendas antigas. A janela Tk não é aberta: ela chama exatamente estes métodos
+# dos repositórios, então a medição funciona em servidores sem tela.
+# O resultado é gravado em JSON para comparar commits:
+#   python benchmarks/benchmark_geral.py --escala 100k --saida antes.json
+#   python benchmarks/benchmark_geral.py --escala 100k --saida depois.json --comparar antes.json
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from banco import conectar_banco, escolher_perfil
+from repositorio import ClienteRepository, VendaRepository, RelatorioRepository, AlteracaoRepository, exportar_dados, arquivar_vendas, data_corte_arquivo
+from dados_sinteticos import popular
+
+ESCALAS = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000} # Quantidade de clientes de cada escala
+TERMOS_BUSCA = ["ana", "silva", "sp"]
+TOLERANCIA_PADRAO = 1.25 # Na comparação, um caso é regressão se a mediana ficar mais de 25% acima da anterior
+
+def estatisticas(tempos): # Resumo de uma lista de durações (segundos) em milissegundos
+    ordenados = sorted(tempos)
+    return {"repeticoes": len(tempos), "min_ms": round(ordenados[0] * 1000, 3), "mediana_ms": round(statistics.median(ordenados) * 1000, 3),
+            "p95_ms": round(ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.95))] * 1000, 3), "max_ms": round(ordenados[-1] * 1000, 3)}
+
+def medir(funcao, argumentos): # Executa funcao(argumento) para cada argumento e mede cada chamada separadamente
+    tempos = []
+    for argumento in argumentos:
+        inicio = time.perf_counter(); funcao(argumento); tempos.append(time.perf_counter() - inicio)
+    return estatisticas(tempos)
+
+def versao_codigo(): # Commit atual (com '+' se houver alterações não commitadas), para identificar o resultado
+    pasta = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=pasta, capture_output=True, text=True, check=True).stdout.strip()
+        alterado = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=pasta, capture_output=True, text=True).stdout.strip()
+        return commit + ("+" if alterado else "")
+    except (OSError, subprocess.CalledProcessError): return None
+
+def preparar_banco(destino, clientes, vendas_por_cliente, semente, pasta_cache): # Gera o banco sintético, ou copia a versão guardada em pasta_cache
+    origem = os.path.join(pasta_cache, f"sintetico_{clientes}_{vendas_por_cliente}_{semente}.db") if pasta_cache else None
+    if origem and os.path.exists(origem):
+        shutil.copy(origem, destino); return None # O benchmark altera o banco; a cópia guardada fica intacta
+    conexao = conectar_banco(destino)
+    inicio = time.perf_counter(); popular(conexao, clientes, vendas_por_cliente, semente); duracao = time.perf_counter() - inicio
+    conexao.execute("PRAGMA wal_checkpoint(TRUNCATE)"); conexao.close() # Deixa todo o conteúdo no arquivo .db antes de copiá-lo
+    if origem:
+        os.makedirs(pasta_cache, exist_ok=True); shutil.copy(destino, origem)
+    return duracao
+
+def executar(conexao, pasta, repeticoes, semente): # Mede cada caso e retorna {nome do caso: estatísticas}
+    clientes, vendas, relatorios = ClienteRepository(conexao), VendaRepository(conexao), RelatorioRepository(conexao)
+    aleatorio = random.Random(semente)
+    ids = [linha[0] for linha in conexao.execute("SELECT id FROM clientes")]
+    sorteados = lambda: [aleatorio.choice(ids) for _ in range(repeticoes)]
+    resultados = {}
+
+    # Lista de clientes (carregar_clientes / rolagem) e busca incremental
+    resultados["lista_clientes_primeira_pagina"] = medir(lambda _: clientes.pagina(""), range(repeticoes))
+    def rolar(paginas): # Primeira página e as seguintes, como ao rolar a lista até o fim de 'paginas' páginas
+        apos = None
+        for _ in range(paginas):
+            pagina = clientes.pagina("", apos)
+            if not pagina: break
+            apos = (pagina[-1][1], pagina[-1][0])
+    resultados["lista_clientes_10_paginas"] = medir(rolar, [10] * max(1, repeticoes // 5))
+    for termo in TERMOS_BUSCA:
+        resultados[f"busca_clientes_{termo}"] = medir(lambda _: clientes.pagina(termo), range(repeticoes))
+
+    # Janela de compras: primeira página e histórico completo de um cliente
+    resultados["compras_cliente_primeira_pagina"] = medir(vendas.pagina_por_cliente, sorteados())
+    resultados["resumo_compras_cliente"] = medir(vendas.resumo_cliente, sorteados())
+    def historico_completo(cliente_id):
+        apos = None
+        while True:
+            pagina = vendas.pagina_por_cliente(cliente_id, apos)
+            if not pagina: break
+            apos = (pagina[-1][6], pagina[-1][0])
+    resultados["compras_cliente_historico_completo"] = medir(historico_completo, sorteados())
+
+    # Relatórios (tabelas de resumo)
+    resultados["relatorio_por_mes"] = medir(lambda _: relatorios.por_mes(), range(repeticoes))
+    resultados["relatorio_por_genero"] = medir(lambda _: relatorios.por_genero(), range(repeticoes))
+    resultados["relatorio_melhores_clientes"] = medir(lambda _: relatorios.melhores_clientes(10), range(repeticoes))
+    resultados["relatorio_geral"] = medir(lambda _: vendas.resumo(), range(repeticoes))
+
+    # Exportação completa (uma execução de cada: o tempo cresce com o tamanho do banco)
+    for conteudo in ("clientes", "clientes_vendas"):
+        caminho = os.path.join(pasta, f"{conteudo}.csv")
+        resultados[f"exportar_{conteudo}_csv"] = medir(lambda _: exportar_dados(conexao, caminho, conteudo), [None])
+        os.remove(caminho)
+
+    # Escritas com um commit por operação, como na interface
+    novos = []
+    def inserir_cliente(i): novos.append(clientes.inserir(f"Cliente Benchmark {i}", f"benchmark{i}@emailficticio.com", "(82) 90000-0000", "Maceió", "AL"))
+    resultados["inserir_cliente"] = medir(inserir_cliente, range(repeticoes))
+    resultados["atualizar_cliente"] = medir(lambda cliente_id: clientes.atualizar(cliente_id, "Cliente Benchmark Alterado", f"alterado{cliente_id}@emailficticio.com",
+                                                                                   "(82) 91111-1111", "Recife", "PE"), novos)
+    novas_vendas = []
+    def inserir_venda(cliente_id): novas_vendas.append(vendas.inserir(cliente_id, "Livro Benchmark", "Autor Benchmark", "Outro", "2025-06-15", 59.9))
+    resultados["inserir_venda"] = medir(inserir_venda, sorteados())
+    resultados["atualizar_venda"] = medir(lambda venda_id: vendas.atualizar(venda_id, "Livro Benchmark", "Autor Benchmark", "Romance", "2025-06-16", 64.9), novas_vendas)
+    resultados["excluir_cliente_com_vendas"] = medir(clientes.excluir, random.Random(semente + 1).sample(ids, min(repeticoes, len(ids))))
+
+    # Acompanhamento de alterações (a cada segundo na janela): sem mudanças e com as 100 últimas alterações
+    alteracoes = AlteracaoRepository(conexao); ultima = alteracoes.ultima()
+    resultados["alteracoes_sem_mudanca"] = medir(lambda _: alteracoes.versao_dados(), range(repeticoes))
+    resultados["alteracoes_ultimas_100"] = medir(lambda _: alteracoes.desde(ultima - 100), range(repeticoes))
+
+    # Arquivo de vendas antigas (por último: tira as vendas antigas do banco): o arquivamento e as consultas que juntam o arquivo
+    resultados["arquivar_vendas"] = medir(lambda _: arquivar_vendas(conexao, data_corte_arquivo()), [None])
+    resultados["compras_cliente_sem_arquivo"] = medir(vendas.pagina_por_cliente, sorteados())
+    resultados["compras_cliente_com_arquivo"] = medir(lambda cliente_id: vendas.pagina_por_cliente(cliente_id, incluir_arquivo=True), sorteados())
+    resultados["relatorio_por_mes_com_arquivo"] = medir(lambda _: relatorios.por_mes(incluir_arquivo=True), range(repeticoes))
+    return resultados
+
+def comparar(atual, anterior, tolerancia): # Imprime a razão entre as medianas; retorna os casos que ficaram mais lentos que a tolerância
+    regressoes = []
+    print(f"\n{'caso':<38} {'anterior':>11} {'atual':>11} {'razão':>7}")
+    for caso, medida in atual["resultados"].items():
+        antes = anterior.get("resultados", {}).get(caso)
+        if not antes: continue
+        razao = medida["mediana_ms"] / antes["mediana_ms"] if antes["mediana_ms"] else 1.0
+        marca = "  <-- regressão" if razao > tolerancia else ""
+        if marca: regressoes.append(caso)
+        print(f"{caso:<38} {antes['mediana_ms']:9.2f}ms {medida['mediana_ms']:9.2f}ms {razao:6.2f}x{marca}")
+    return regressoes
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark geral da camada de dados com dados sintéticos")
+    parser.add_argument("--escala", choices=tuple(ESCALAS), default="10k", help="quantidade de clientes gerados")
+    parser.add_argument("--clientes", type=int, help="quantidade de clientes (substitui --escala)")
+    parser.add_argument("--vendas-por-cliente", type=int, default=5, help="vendas geradas para cada cliente")
+    parser.add_argument("--semente", type=int, default=42, help="semente dos dados e dos sorteios")
+    parser.add_argument("--repeticoes", type=int, default=50, help="repetições de cada operação pontual")
+    parser.add_argument("--cache-dados", metavar="PASTA", help="guarda o banco gerado nesta pasta e o reaproveita nas próximas execuções")
+    parser.add_argument("--saida", help="arquivo JSON com os resultados (padrão: benchmarks/resultados/<commit>_<clientes>.json)")
+    parser.add_argument("--comparar", metavar="JSON", help="resultado anterior para comparação; termina com código 1 se houver regressão")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO, help="razão máxima entre as medianas antes de acusar regressão")
+    args = parser.parse_args()
+    quantidade = args.clientes or ESCALAS[args.escala]
+    resultado = {"versao": versao_codigo(), "data": datetime.now().isoformat(timespec="seconds"),
+                 "ambiente": {"python": platform.python_version(), "sqlite": sqlite3.sqlite_version, "sistema": platform.platform(), "perfil_banco": escolher_perfil(os.path.join(tempfile.gettempdir(), "benchmark.db"))},
+                 "parametros": {"clientes": quantidade, "vendas_por_cliente": args.vendas_por_cliente, "semente": args.semente, "repeticoes": args.repeticoes}}
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "benchmark.db")
+        duracao = preparar_banco(caminho, quantidade, args.vendas_por_cliente, args.semente, args.cache_dados)
+        if duracao is not None: resultado["geracao_dados_s"] = round(duracao, 2)
+        print(f"Banco com {quantidade} clientes e {quantidade * args.vendas_por_cliente} vendas "
+              + (f"gerado em {duracao:.1f} s" if duracao is not None else "copiado do cache"))
+        conexao = conectar_banco(caminho)
+        try: resultado["resultados"] = executar(conexao, pasta, args.repeticoes, args.semente)
+        finally: conexao.close()
+    print(f"\n{'caso':<38} {'mediana':>10} {'p95':>10} {'máx':>10}")
+    for caso, medida in resultado["resultados"].items():
+        print(f"{caso:<38} {medida['mediana_ms']:8.2f}ms {medida['p95_ms']:8.2f}ms {medida['max_ms']:8.2f}ms")
+    saida = args.saida or os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultados", f"{resultado['versao'] or 'sem-versao'}_{quantidade}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as f: json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados gravados em {saida}")
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f: anterior = json.load(f)
+        if anterior.get("parametros") != resultado["parametros"]: print("Atenção: os parâmetros das duas execuções são diferentes.")
+        regressoes = comparar(resultado, anterior, args.tolerancia)
+        if regressoes: print(f"\n{len(regressoes)} casos mais lentos que a tolerância ({args.tolerancia}x)."); sys.exit(1)
+
+if __name__ == "__main__":
+    main()
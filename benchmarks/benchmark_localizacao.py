@@ -0,0 +1,76 @@
+# ===================================================
+# BENCHMARK: CARREGAMENTO DE ESTADOS E CIDADES
+# ===================================================
+# Compara a busca sequencial com a busca paralela (pool de conexões) contra um
+# servidor IBGE falso com latência artificial, e mede a leitura do cache local.
+# Também mede o índice das sugestões do campo Cidade (IndiceCidades) com ~5.570
+# nomes acentuados sintéticos: montagem e consulta a cada tecla digitada.
+# Uso: python benchmarks/benchmark_localizacao.py [--latencia 0.1] [--conexoes 8]
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from localizacao import buscar_estados_e_cidades, IndiceCidades
+from servidor_ibge_falso import ServidorIBGEFalso, UFS
+
+def medir(rotulo, **kwargs): # Executa buscar_estados_e_cidades() e imprime o tempo gasto
+    inicio = time.perf_counter()
+    dados = buscar_estados_e_cidades(**kwargs)
+    tempo = time.perf_counter() - inicio
+    print(f"{rotulo:<32} {tempo * 1000:9.1f} ms  ({len(dados)} estados)")
+    return tempo
+
+# Partes dos nomes sintéticos, com acentos, hífens e apóstrofos como os nomes reais dos municípios
+INICIOS = ["São", "Santa", "Santo", "Bom", "Nova", "Porto", "Rio", "Campo", "Jardim", "Vila", "Barra", "Serra", "Lagoa", "Monte", "Pau", "Itá", "Ibi"]
+FINAIS = ["Paulo", "José", "João", "Jesus", "Alegre", "Verde", "Grande", "Branco", "Claro", "Bonito", "d'Água", "do Sul", "das Flores", "Guaçu",
+          "Itaúna", "Araçá", "Cândido", "Mirim", "Açu", "-Mirim", "do Oeste", "da Conquista"]
+CIDADES_POR_UF = {"MG": 853, "SP": 645, "RS": 497, "BA": 417, "PR": 399, "SC": 295, "GO": 246, "PI": 224, "PB": 223, "MA": 217}
+# (texto digitado, UF): prefixos curtos e longos, palavra interna, sem acentos, com erro de digitação e sem resultado
+CONSULTAS_CIDADE = [("s", "MG"), ("sao", "MG"), ("Sao Jo", "MG"), ("conquista", "BA"), ("itauna", "MG"), ("sao paolo", "SP"), ("zzzz", "SP"), ("bom", None)]
+
+def localidades_sinteticas(semente=42): # {UF: [cidades]} com o número de municípios de cada estado (~5.570 no total)
+    aleatorio = random.Random(semente); dados = {}
+    for uf in UFS:
+        nomes = {"São Paulo"} if uf == "SP" else set(); quantidade = CIDADES_POR_UF.get(uf, 91)
+        while len(nomes) < quantidade:
+            final = aleatorio.choice(FINAIS)
+            nome = f"{aleatorio.choice(INICIOS)}{final if final[0] == '-' else ' ' + final}"
+            if aleatorio.random() < 0.5: nome += " " + aleatorio.choice([f for f in FINAIS if f[0] != '-'])
+            nomes.add(nome)
+        dados[uf] = sorted(nomes)
+    return dados
+
+def medir_indice_cidades(repeticoes=2000): # Montagem do índice e tempo médio de cada consulta, em microssegundos
+    dados = localidades_sinteticas()
+    inicio = time.perf_counter(); indice = IndiceCidades(dados)
+    print(f"\n{'índice de cidades (montagem)':<32} {(time.perf_counter() - inicio) * 1000:9.1f} ms  ({sum(map(len, dados.values()))} cidades)")
+    for texto, uf in CONSULTAS_CIDADE:
+        sugestoes = indice.buscar(texto, uf) # A primeira consulta aproximada de cada tamanho monta o cache dos inícios
+        tempo = timeit.timeit(lambda: indice.buscar(texto, uf), number=repeticoes) / repeticoes
+        print(f"  {texto!r:<14} {uf or 'todas':<6} {tempo * 1e6:9.1f} µs  {len(sugestoes):>3} sugestões  {', '.join(c for c, _ in sugestoes[:3])}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do carregamento de estados e cidades")
+    parser.add_argument("--latencia", type=float, default=0.1, help="latência por requisição, em segundos")
+    parser.add_argument("--conexoes", type=int, default=8, help="número de requisições simultâneas no modo paralelo")
+    args = parser.parse_args()
+    servidor = ServidorIBGEFalso(latencia=args.latencia).iniciar()
+    with tempfile.TemporaryDirectory() as pasta:
+        cache = os.path.join(pasta, "localidades_cache.json")
+        try:
+            medir("sequencial (sem cache)", url_base=servidor.url_base, caminho_cache=cache, forcar_atualizacao=True, paralelo=False)
+            medir("paralelo (sem cache)", url_base=servidor.url_base, caminho_cache=cache, forcar_atualizacao=True, max_conexoes=args.conexoes)
+            medir("cache local", url_base=servidor.url_base, caminho_cache=cache)
+            servidor.ufs_com_falha = {"SP", "MG"}
+            medir("paralelo (2 estados falhando)", url_base=servidor.url_base, caminho_cache=cache, forcar_atualizacao=True, max_conexoes=args.conexoes)
+        finally:
+            servidor.parar()
+    medir_indice_cidades()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# ===================================================
+# BENCHMARK: PERFIS DE CONFIGURAÇÃO DO SQLITE
+# ===================================================
+# Compara os perfis de PERFIS_BANCO simulando o uso da interface: cada inserção
+# e atualização é confirmada com seu próprio commit, como em cadastrar_cliente().
+# Uso: python benchmarks/benchmark_perfis.py [--operacoes 2000] [--pasta /caminho/da/pasta/compartilhada]
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from banco import conectar_banco, escolher_perfil, PERFIS_BANCO
+from repositorio import consultar_pagina_clientes
+
+def medir_perfil(pasta, perfil, operacoes): # Retorna inserções/s, atualizações/s e latências de leitura (ms) para um perfil
+    caminho = os.path.join(pasta, f"perfil_{perfil}.db")
+    conexao = conectar_banco(caminho, perfil=perfil); cursor = conexao.cursor()
+    inicio = time.perf_counter()
+    for i in range(operacoes):
+        cursor.execute("INSERT INTO clientes (nome, email, telefone, cidade, estado) VALUES (?, ?, ?, ?, ?)",
+                       (f"Cliente {i:06d}", f"cliente{i}@emailficticio.com", "(82) 99999-0000", "Maceió", "AL"))
+        conexao.commit()
+    insercoes = operacoes / (time.perf_counter() - inicio)
+    aleatorio = random.Random(1)
+    inicio = time.perf_counter()
+    for _ in range(operacoes):
+        cursor.execute("UPDATE clientes SET telefone = ? WHERE id = ?", (f"(82) 9{aleatorio.randint(0, 9999):04d}-0000", aleatorio.randint(1, operacoes)))
+        conexao.commit()
+    atualizacoes = operacoes / (time.perf_counter() - inicio)
+    leituras = []
+    for _ in range(200):
+        inicio = time.perf_counter()
+        cursor.execute("SELECT id, nome, email, telefone, cidade, estado FROM clientes WHERE id = ?", (aleatorio.randint(1, operacoes),)); cursor.fetchone()
+        consultar_pagina_clientes(cursor)
+        leituras.append((time.perf_counter() - inicio) * 1000)
+    conexao.close()
+    for sufixo in ("", "-wal", "-shm"):
+        if os.path.exists(caminho + sufixo): os.remove(caminho + sufixo)
+    return insercoes, atualizacoes, statistics.median(leituras), max(leituras)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos perfis de configuração do SQLite")
+    parser.add_argument("--operacoes", type=int, default=2000, help="inserções e atualizações por perfil (uma transação cada)")
+    parser.add_argument("--pasta", help="pasta onde criar os bancos de teste (padrão: pasta temporária)")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory(dir=args.pasta) as pasta:
+        print(f"{'perfil':<10} {'inserções/s':>12} {'atualizações/s':>15} {'leitura (mediana)':>18} {'leitura (máx)':>14}")
+        for perfil in PERFIS_BANCO:
+            if escolher_perfil(os.path.join(pasta, "teste.db"), perfil) != perfil: # Pasta compartilhada: conectar_banco() não aplica WAL nem mmap
+                print(f"{perfil:<10} (não medido nesta pasta)"); continue
+            insercoes, atualizacoes, mediana, maximo = medir_perfil(pasta, perfil, args.operacoes)
+            print(f"{perfil:<10} {insercoes:12.0f} {atualizacoes:15.0f} {mediana:16.2f}ms {maximo:12.2f}ms")
+
+if __name__ == "__main__":
+    main()
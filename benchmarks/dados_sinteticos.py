@@ -0,0 +1,94 @@
+# ===================================================
+# GERADOR DE DADOS SINTÉTICOS (CLIENTES E VENDAS)
+# ===================================================
+# Gera bancos reprodutíveis (mesma semente = mesmos dados) com UFs, cidades,
+# gêneros, datas e valores realistas, em qualquer escala. Usa o mesmo caminho
+# da importação de CSV: lotes com executemany numa única transação, com os
+# triggers de busca e de resumos suspensos durante a carga.
+# Uso: python benchmarks/dados_sinteticos.py saida.db [--clientes 100000] [--vendas-por-cliente 5] [--semente 42]
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from banco import conectar_banco
+from repositorio import (ClienteRepository, VendaRepository, TAMANHO_LOTE_IMPORTACAO,
+                         suspender_gatilho_importacao, restaurar_gatilho_importacao)
+
+NOMES = ["Ana", "Bruno", "Carla", "Daniel", "Eduarda", "Felipe", "Gabriela", "Heitor", "Isabela", "João",
+         "Larissa", "Marcos", "Natália", "Otávio", "Paula", "Rafael", "Sofia", "Tiago", "Vitória", "Yuri"]
+SOBRENOMES = ["Silva", "Santos", "Oliveira", "Souza", "Pereira", "Costa", "Rodrigues", "Almeida", "Nascimento", "Lima",
+              "Araújo", "Fernandes", "Carvalho", "Gomes", "Martins", "Rocha", "Ribeiro", "Alves", "Monteiro", "Mendes"]
+# (cidade, UF, peso): o peso aproxima a concentração de clientes nas capitais e nos estados mais populosos
+CIDADES = [("São Paulo", "SP", 12), ("Campinas", "SP", 3), ("Santos", "SP", 2), ("Rio de Janeiro", "RJ", 7), ("Niterói", "RJ", 2),
+           ("Belo Horizonte", "MG", 5), ("Uberlândia", "MG", 2), ("Salvador", "BA", 4), ("Feira de Santana", "BA", 1),
+           ("Recife", "PE", 3), ("Fortaleza", "CE", 3), ("Curitiba", "PR", 3), ("Londrina", "PR", 1), ("Porto Alegre", "RS", 3),
+           ("Caxias do Sul", "RS", 1), ("Florianópolis", "SC", 2), ("Joinville", "SC", 1), ("Goiânia", "GO", 2), ("Brasília", "DF", 3),
+           ("Manaus", "AM", 2), ("Belém", "PA", 2), ("São Luís", "MA", 1), ("Maceió", "AL", 2), ("Arapiraca", "AL", 1),
+           ("Natal", "RN", 1), ("João Pessoa", "PB", 1), ("Teresina", "PI", 1), ("Aracaju", "SE", 1), ("Vitória", "ES", 1),
+           ("Campo Grande", "MS", 1), ("Cuiabá", "MT", 1), ("Porto Velho", "RO", 1), ("Rio Branco", "AC", 1), ("Macapá", "AP", 1),
+           ("Boa Vista", "RR", 1), ("Palmas", "TO", 1)]
+GENEROS = [("Romance", 20), ("Fantasia", 14), ("Suspense/Terror", 14), ("Ficção Científica", 10), ("LGBTQIAPN+", 8),
+           ("Biografia", 8), ("História", 8), ("Outro", 18)] # Mesmos gêneros da janela de compras
+LIVROS = [("Dom Casmurro", "Machado de Assis"), ("O Cortiço", "Aluísio Azevedo"), ("Capitães da Areia", "Jorge Amado"),
+          ("Torto Arado", "Itamar Vieira Junior"), ("A Hora da Estrela", "Clarice Lispector"), ("Vidas Secas", "Graciliano Ramos"),
+          ("Duna", "Frank Herbert"), ("O Hobbit", "J. R. R. Tolkien"), ("It: A Coisa", "Stephen King"), ("Sapiens", "Yuval Noah Harari")]
+DATA_INICIAL = date(2023, 1, 1) # As vendas são distribuídas entre esta data e DIAS_DE_VENDAS dias depois
+DIAS_DE_VENDAS = 3 * 365
+
+def gerar_clientes(quantidade, aleatorio): # Tuplas (nome, email, telefone, cidade, estado) no formato gravado pela interface
+    cidades = [(cidade, uf) for cidade, uf, _ in CIDADES]; pesos = [peso for _, _, peso in CIDADES]
+    for i in range(quantidade):
+        nome = f"{aleatorio.choice(NOMES)} {aleatorio.choice(SOBRENOMES)} {aleatorio.choice(SOBRENOMES)}"
+        cidade, uf = aleatorio.choices(cidades, pesos)[0]
+        telefone = f"({aleatorio.randint(11, 99)}) 9{aleatorio.randint(0, 9999):04d}-{aleatorio.randint(0, 9999):04d}"
+        yield (nome, f"cliente{i}@emailficticio.com", telefone, cidade, uf)
+
+def gerar_vendas(ids_clientes, vendas_por_cliente, aleatorio): # Tuplas (cliente_id, título, autor, gênero, data AAAA-MM-DD, valor)
+    generos = [genero for genero, _ in GENEROS]; pesos = [peso for _, peso in GENEROS]
+    for cliente_id in ids_clientes:
+        for _ in range(vendas_por_cliente):
+            titulo, autor = aleatorio.choice(LIVROS)
+            data = (DATA_INICIAL + timedelta(days=aleatorio.randrange(DIAS_DE_VENDAS))).isoformat()
+            yield (cliente_id, titulo, autor, aleatorio.choices(generos, pesos)[0], data, round(aleatorio.uniform(19.9, 199.9), 2))
+
+def inserir_em_lotes(conexao, tabela, repositorio, linhas, tamanho_lote=TAMANHO_LOTE_IMPORTACAO): # Insere as linhas numa única transação, como importar_csv()
+    cursor = conexao.cursor(); lote = []
+    try:
+        if not conexao.in_transaction: cursor.execute("BEGIN")
+        suspenso = suspender_gatilho_importacao(cursor, tabela)
+        for linha in linhas:
+            lote.append(linha)
+            if len(lote) >= tamanho_lote: repositorio.inserir_lote(lote, confirmar=False); lote.clear()
+        if lote: repositorio.inserir_lote(lote, confirmar=False)
+        restaurar_gatilho_importacao(cursor, tabela, suspenso)
+        conexao.commit()
+    except BaseException:
+        conexao.rollback(); raise
+
+def popular(conexao, quantidade, vendas_por_cliente=0, semente=42): # Insere 'quantidade' clientes fictícios e 'vendas_por_cliente' vendas para cada um
+    aleatorio = random.Random(semente)
+    id_anterior = conexao.execute("SELECT coalesce(max(id), 0) FROM clientes").fetchone()[0]
+    inserir_em_lotes(conexao, "clientes", ClienteRepository(conexao), gerar_clientes(quantidade, aleatorio))
+    if vendas_por_cliente:
+        ids = [linha[0] for linha in conexao.execute("SELECT id FROM clientes WHERE id > ? ORDER BY id", (id_anterior,))]
+        inserir_em_lotes(conexao, "vendas", VendaRepository(conexao), gerar_vendas(ids, vendas_por_cliente, aleatorio))
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera um banco com clientes e vendas fictícios")
+    parser.add_argument("banco", help="arquivo do banco de dados gerado (não pode existir)")
+    parser.add_argument("--clientes", type=int, default=100_000, help="quantidade de clientes")
+    parser.add_argument("--vendas-por-cliente", type=int, default=5, help="vendas geradas para cada cliente")
+    parser.add_argument("--semente", type=int, default=42, help="semente do gerador (mesma semente = mesmos dados)")
+    args = parser.parse_args()
+    if os.path.exists(args.banco): parser.error(f"o arquivo {args.banco} já existe")
+    conexao = conectar_banco(args.banco)
+    inicio = time.perf_counter(); popular(conexao, args.clientes, args.vendas_por_cliente, args.semente)
+    print(f"{args.clientes} clientes e {args.clientes * args.vendas_por_cliente} vendas gerados em {time.perf_counter() - inicio:.1f} s")
+    conexao.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# ===================================================
+# SERVIDOR FALSO DA API DE LOCALIDADES DO IBGE
+# ===================================================
+# Servidor HTTP local que imita as rotas usadas por buscar_estados_e_cidades(),
+# com latência artificial e estados que falham, para medições sem depender da internet.
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+UFS = ["AC", "AL", "AP", "AM", "BA", "CE", "DF", "ES", "GO", "MA", "MT", "MS", "MG", "PA",
+       "PB", "PR", "PE", "PI", "RJ", "RN", "RS", "RO", "RR", "SC", "SP", "SE", "TO"]
+
+class ServidorIBGEFalso(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latencia=0.0, ufs_com_falha=(), cidades_por_uf=200):
+        self.latencia = latencia # Atraso (em segundos) aplicado a cada resposta
+        self.ufs_com_falha = set(ufs_com_falha) # Estados que sempre respondem com erro 500
+        self.cidades_por_uf = cidades_por_uf
+        self.requisicoes = 0
+        super().__init__(("127.0.0.1", 0), ManipuladorIBGE)
+
+    @property
+    def url_base(self): # Endereço a ser passado como url_base para buscar_estados_e_cidades()
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def iniciar(self): # Atende as requisições em uma thread separada
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def parar(self):
+        self.shutdown(); self.server_close()
+
+class ManipuladorIBGE(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Mantém a conexão aberta entre as requisições (keep-alive)
+
+    def log_message(self, *args): # Silencia o log padrão de cada requisição
+        pass
+
+    def do_GET(self):
+        servidor = self.server; servidor.requisicoes += 1
+        time.sleep(servidor.latencia)
+        partes = self.path.split("?")[0].strip("/").split("/")
+        if partes == ["estados"]:
+            corpo = [{"sigla": uf, "nome": uf} for uf in UFS]
+        elif len(partes) == 3 and partes[0] == "estados" and partes[2] == "municipios" and partes[1] not in servidor.ufs_com_falha:
+            corpo = [{"nome": f"Cidade {i:04d} - {partes[1]}"} for i in range(servidor.cidades_por_uf)]
+        else:
+            self.send_response(500 if len(partes) == 3 else 404); self.send_header("Content-Length", "0"); self.end_headers()
+            return
+        dados = json.dumps(corpo).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
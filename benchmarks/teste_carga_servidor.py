@@ -0,0 +1,107 @@
+# ===================================================
+# TESTE DE CARGA DO MODO SERVIDOR
+# ===================================================
+# Simula vários caixas usando o servidor ao mesmo tempo: cada thread é um caixa
+# com sua própria conexão HTTP, que repete uma mistura de operações da interface
+# (rolar/buscar clientes, abrir compras, registrar vendas, cadastrar e alterar
+# clientes, consultar o registro de alterações a cada segundo). Sem --url, sobe um servidor local numa porta livre com um banco
+# sintético temporário. Mostra a vazão, as latências de cada operação e os erros
+# (em especial "database is locked", que o servidor deve eliminar).
+#   python benchmarks/teste_carga_servidor.py --caixas 16 --duracao 20
+#   python benchmarks/teste_carga_servidor.py --url http://servidor:8765 --caixas 8
+import argparse
+import collections
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from banco import conectar_banco
+from cliente_remoto import repositorios_remotos
+from servidor import ServidorLivraria
+from dados_sinteticos import popular, GENEROS, LIVROS
+from benchmark_geral import estatisticas
+
+TERMOS_BUSCA = ["ana", "silva", "sp", "maria", "rio"]
+# (operação, peso): a maior parte do uso de um caixa é leitura
+MISTURA = [("pagina_clientes", 30), ("busca_clientes", 25), ("compras_cliente", 20), ("inserir_venda", 15),
+           ("inserir_cliente", 5), ("atualizar_cliente", 5)]
+INTERVALO_ALTERACOES_S = 1.0 # Além da mistura, cada caixa consulta o registro de alterações neste intervalo (como clientes.py)
+
+def caixa(url, token, numero, fim, semente, ids, tempos, erros): # Um caixa simulado: repete operações sorteadas até o instante 'fim'
+    clientes, vendas, _, alteracoes = repositorios_remotos(url, token)
+    aleatorio = random.Random(semente + numero)
+    operacoes = [nome for nome, _ in MISTURA]; pesos = [peso for _, peso in MISTURA]
+    contador = 0; ultima_alteracao = alteracoes.ultima(); proxima_verificacao = time.perf_counter() + INTERVALO_ALTERACOES_S
+    while time.perf_counter() < fim:
+        operacao = aleatorio.choices(operacoes, pesos)[0]; cliente_id = aleatorio.choice(ids)
+        if time.perf_counter() >= proxima_verificacao: # Como a janela: a cada segundo, busca as alterações dos outros caixas
+            operacao = "alteracoes"; proxima_verificacao += INTERVALO_ALTERACOES_S
+        inicio = time.perf_counter()
+        try:
+            if operacao == "alteracoes":
+                novas = alteracoes.desde(ultima_alteracao)
+                ultima_alteracao = alteracoes.ultima() if novas is None else (novas[-1][0] if novas else ultima_alteracao)
+            elif operacao == "pagina_clientes":
+                pagina = clientes.pagina("")
+                if pagina: clientes.pagina("", (pagina[-1][1], pagina[-1][0])) # Rolagem até a segunda página
+            elif operacao == "busca_clientes": clientes.pagina(aleatorio.choice(TERMOS_BUSCA))
+            elif operacao == "compras_cliente": vendas.resumo_cliente(cliente_id); vendas.pagina_por_cliente(cliente_id)
+            elif operacao == "inserir_venda":
+                titulo, autor = aleatorio.choice(LIVROS)
+                vendas.inserir(cliente_id, titulo, autor, aleatorio.choice(GENEROS)[0], "2025-06-15", round(aleatorio.uniform(19.9, 199.9), 2))
+            elif operacao == "inserir_cliente":
+                contador += 1
+                clientes.inserir(f"Caixa {numero} Cliente {contador}", f"caixa{numero}_{contador}_{time.time_ns()}@emailficticio.com", "(82) 90000-0000", "Maceió", "AL")
+            else:
+                cliente = clientes.obter(cliente_id)
+                if cliente: clientes.atualizar(cliente_id, cliente[1], cliente[2], "(82) 91111-1111", cliente[4], cliente[5])
+        except Exception as e: # Registra e continua: o objetivo é contar os erros, não parar no primeiro
+            erros[f"{operacao}: {type(e).__name__}: {e}"] += 1
+            continue
+        tempos[operacao].append(time.perf_counter() - inicio) # Listas por operação: append é seguro entre threads
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do servidor da livraria com vários caixas simulados")
+    parser.add_argument("--url", help="servidor já em execução (padrão: sobe um servidor local com um banco sintético)")
+    parser.add_argument("--token", default=os.environ.get("LIVRARIA_TOKEN_SERVIDOR"), help="token do servidor")
+    parser.add_argument("--caixas", type=int, default=16, help="caixas simulados (threads) ao mesmo tempo")
+    parser.add_argument("--duracao", type=float, default=15, help="duração do teste em segundos")
+    parser.add_argument("--clientes", type=int, default=10_000, help="clientes do banco sintético (sem --url)")
+    parser.add_argument("--conexoes", type=int, default=8, help="conexões do pool do servidor local (sem --url)")
+    parser.add_argument("--semente", type=int, default=42, help="semente dos sorteios")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as pasta:
+        servidor = None; url = args.url
+        if not url:
+            caminho = os.path.join(pasta, "carga.db")
+            conexao = conectar_banco(caminho); popular(conexao, args.clientes, 5, args.semente); conexao.close()
+            servidor = ServidorLivraria(("127.0.0.1", 0), caminho, args.conexoes, args.token) # Porta 0: o sistema escolhe uma livre
+            threading.Thread(target=servidor.serve_forever, daemon=True).start()
+            url = f"http://127.0.0.1:{servidor.server_address[1]}"
+            print(f"Servidor local em {url} com {args.clientes} clientes e {args.conexoes} conexões")
+        try:
+            ids = [linha[0] for linha in repositorios_remotos(url, args.token)[0].pagina("", limite=1000)]
+            tempos = collections.defaultdict(list); erros = collections.Counter()
+            fim = time.perf_counter() + args.duracao
+            caixas = [threading.Thread(target=caixa, args=(url, args.token, numero, fim, args.semente, ids, tempos, erros)) for numero in range(args.caixas)]
+            for thread in caixas: thread.start()
+            for thread in caixas: thread.join()
+        finally:
+            if servidor: servidor.shutdown(); servidor.server_close()
+    total = sum(len(lista) for lista in tempos.values())
+    print(f"\n{args.caixas} caixas por {args.duracao:.0f} s: {total} operações ({total / args.duracao:.0f}/s), {sum(erros.values())} erros")
+    print(f"\n{'operação':<20} {'quantidade':>10} {'mediana':>10} {'p95':>10} {'máx':>10}")
+    for operacao, lista in sorted(tempos.items()):
+        medida = estatisticas(lista)
+        print(f"{operacao:<20} {medida['repeticoes']:>10} {medida['mediana_ms']:8.2f}ms {medida['p95_ms']:8.2f}ms {medida['max_ms']:8.2f}ms")
+    if erros:
+        print("\nErros:")
+        for erro, quantidade in erros.most_common(20): print(f"{quantidade:>6}  {erro}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
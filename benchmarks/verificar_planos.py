@@ -0,0 +1,77 @@
+# ===================================================
+# VERIFICAÇÃO DOS PLANOS DE CONSULTA E DAS MIGRAÇÕES
+# ===================================================
+# Cria um banco temporário com conectar_banco() (ou migra uma cópia do banco
+# informado) e confere, com EXPLAIN QUERY PLAN, que as consultas principais
+# usam os índices esperados, que os resumos de vendas batem com as vendas e
+# que o arquivamento de vendas antigas mantém os resumos e o histórico.
+# Termina com código 1 se alguma verificação falhar.
+# Uso: python benchmarks/verificar_planos.py [banco.db]
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from banco import conectar_banco, MIGRACOES
+from repositorio import RelatorioRepository, VendaRepository, COLUNAS_VENDA_EXIBICAO, arquivar_vendas
+
+# (descrição, consulta, parâmetros, trecho que precisa aparecer no plano)
+PLANOS_ESPERADOS = [
+    ("compras de um cliente", "SELECT id, livro_titulo, valor_total, data_compra FROM vendas WHERE cliente_id = ? ORDER BY data_compra DESC, id DESC LIMIT ?",
+     (1, 100), "USING INDEX idx_vendas_cliente_data"),
+    ("página das compras de um cliente", "SELECT id, livro_titulo, valor_total, data_compra FROM vendas WHERE cliente_id = ? AND (data_compra, id) < (?, ?) ORDER BY data_compra DESC, id DESC LIMIT ?",
+     (1, "2025-01-01", 10, 100), "USING INDEX idx_vendas_cliente_data"),
+    ("página da lista de clientes", "SELECT id, nome, email, telefone, cidade, estado FROM clientes WHERE (nome, id) > (?, ?) ORDER BY nome, id LIMIT ?",
+     ("A", 0, 200), "USING INDEX idx_clientes_nome"),
+    ("melhores clientes", "SELECT c.id, c.nome, r.quantidade, r.total FROM resumo_vendas_cliente r JOIN clientes c ON c.id = r.cliente_id ORDER BY r.total DESC LIMIT ?",
+     (10,), "USING INDEX idx_resumo_vendas_cliente_total"),
+    ("alterações desde a última vista", "SELECT seq, tabela, operacao, registro_id, cliente_id FROM alteracoes WHERE seq > ? ORDER BY seq LIMIT ?",
+     (0, 501), "USING INTEGER PRIMARY KEY"),
+]
+
+def plano(cursor, consulta, parametros): # Retorna o plano de execução como um único texto
+    return " | ".join(linha[3] for linha in cursor.execute(f"EXPLAIN QUERY PLAN {consulta}", parametros))
+
+def main():
+    falhas = 0
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "verificacao.db")
+        if len(sys.argv) > 1: shutil.copy(sys.argv[1], caminho) # Nunca altera o banco original
+        conexao = conectar_banco(caminho); cursor = conexao.cursor()
+        versao = cursor.execute("PRAGMA user_version").fetchone()[0]
+        print(f"[{'ok' if versao == len(MIGRACOES) else 'FALHA'}] versão do banco: {versao}"); falhas += versao != len(MIGRACOES)
+        for descricao, consulta, parametros, esperado in PLANOS_ESPERADOS:
+            texto = plano(cursor, consulta, parametros); ok = esperado in texto and "TEMP B-TREE" not in texto
+            print(f"[{'ok' if ok else 'FALHA'}] {descricao}: {texto}"); falhas += not ok
+        # O ON DELETE CASCADE só funciona com PRAGMA foreign_keys ligado:
+        cursor.execute("INSERT INTO clientes (nome, email, telefone, cidade, estado) VALUES ('Teste', 'cascata@teste.com', '(00) 00000-0000', 'Maceió', 'AL')")
+        cliente_id = cursor.lastrowid
+        cursor.execute("INSERT INTO vendas (cliente_id, livro_titulo, livro_autor, genero, data_compra, valor_total) VALUES (?, 'Livro', 'Autor', 'Outro', '2025-01-01', 10)", (cliente_id,))
+        seq_antes_exclusao = cursor.execute("SELECT max(seq) FROM alteracoes").fetchone()[0]
+        cursor.execute("DELETE FROM clientes WHERE id = ?", (cliente_id,))
+        orfas = cursor.execute("SELECT count(*) FROM vendas WHERE cliente_id = ?", (cliente_id,)).fetchone()[0]
+        print(f"[{'ok' if orfas == 0 else 'FALHA'}] exclusão em cascata das vendas"); falhas += orfas != 0
+        # O registro de alterações ganha só o 'D' do cliente, sem uma linha para cada venda apagada em cascata:
+        registradas = cursor.execute("SELECT tabela, operacao FROM alteracoes WHERE seq > ?", (seq_antes_exclusao,)).fetchall()
+        print(f"[{'ok' if registradas == [('clientes', 'D')] else 'FALHA'}] registro de alterações da exclusão: {registradas}"); falhas += registradas != [("clientes", "D")]
+        divergencias = RelatorioRepository(conexao).verificar() # Os triggers dos resumos precisam ter acompanhado a inserção e a exclusão em cascata
+        print(f"[{'ok' if not divergencias else 'FALHA'}] resumos de vendas: {len(divergencias)} divergências"); falhas += bool(divergencias)
+        conexao.rollback()
+        # Arquivamento: a venda antiga sai do banco principal, os resumos (do banco e do arquivo) continuam batendo e o histórico com o arquivo a mostra
+        cursor.execute("INSERT INTO clientes (nome, email, telefone, cidade, estado) VALUES ('Teste', 'arquivo@teste.com', '(00) 00000-0000', 'Maceió', 'AL')")
+        cliente_id = cursor.lastrowid
+        cursor.execute("INSERT INTO vendas (cliente_id, livro_titulo, livro_autor, genero, data_compra, valor_total) VALUES (?, 'Livro', 'Autor', 'Outro', '1990-01-01', 10)", (cliente_id,))
+        conexao.commit(); arquivar_vendas(conexao, "1991-01-01")
+        historico = [linha[8] for linha in VendaRepository(conexao).pagina_por_cliente(cliente_id, incluir_arquivo=True)]
+        divergencias = RelatorioRepository(conexao).verificar(); ok = historico == [1] and not divergencias
+        print(f"[{'ok' if ok else 'FALHA'}] arquivamento: histórico {historico}, {len(divergencias)} divergências nos resumos"); falhas += not ok
+        texto = plano(cursor, f"""SELECT {COLUNAS_VENDA_EXIBICAO}, 0 FROM vendas WHERE cliente_id = ? UNION ALL
+                                   SELECT {COLUNAS_VENDA_EXIBICAO}, 1 FROM vendas_arquivadas WHERE cliente_id = ? ORDER BY 7 DESC, 1 DESC LIMIT ?""", (cliente_id, cliente_id, 100))
+        ok = "MERGE" in texto and "idx_vendas_cliente_data" in texto and "idx_vendas_arquivadas_cliente_data" in texto and "TEMP B-TREE" not in texto
+        print(f"[{'ok' if ok else 'FALHA'}] compras de um cliente com o arquivo: {texto}"); falhas += not ok
+        conexao.close()
+    sys.exit(1 if falhas else 0)
+
+if __name__ == "__main__":
+    main()
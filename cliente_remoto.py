@@ -0,0 +1,91 @@
+# ===================================================
+# REPOSITÓRIOS REMOTOS (CLIENTE DO MODO SERVIDOR)
+# ===================================================
+# Com a variável de ambiente LIVRARIA_SERVIDOR=http://maquina:8765 a interface usa
+# estes repositórios no lugar dos locais: cada chamada (clientes.pagina(...),
+# vendas.inserir(...) etc.) vira um POST para servidor.py e devolve o mesmo
+# resultado que o repositório local devolveria (listas de tuplas), lançando os
+# mesmos tipos de erro (sqlite3.IntegrityError para e-mail repetido, por exemplo).
+# Cada thread mantém sua própria conexão HTTP aberta (keep-alive); só as leituras
+# são reenviadas quando essa conexão cai (veja enviar).
+import http.client                # Importa o cliente HTTP da biblioteca padrão
+import json                       # Importa o módulo json para montar os pedidos e ler as respostas
+import os                         # Importa o módulo os para ler as variáveis de ambiente
+import sqlite3                    # Importa o módulo sqlite3: os erros do servidor são relançados com os mesmos tipos
+import threading                  # Importa o módulo threading para manter uma conexão HTTP por thread
+from urllib.parse import urlsplit # Importa urlsplit para separar host e porta do endereço do servidor
+
+from protocolo_remoto import METODOS_REMOTOS
+
+URL_SERVIDOR = os.environ.get("LIVRARIA_SERVIDOR", "") # Vazio = modo local (a interface abre o banco diretamente)
+TOKEN_SERVIDOR = os.environ.get("LIVRARIA_TOKEN_SERVIDOR") or None # Mesmo token passado ao servidor com --token
+TEMPO_LIMITE_S = 30
+ERROS_REMOTOS = {"IntegrityError": sqlite3.IntegrityError, "OperationalError": sqlite3.OperationalError,
+                 "ValueError": ValueError, "TypeError": TypeError, "PermissionError": PermissionError, "LookupError": LookupError}
+
+def como_tuplas(valor): # O JSON só tem listas; as linhas (e tuplas dentro delas) voltam a ser tuplas
+    return tuple(como_tuplas(item) for item in valor) if isinstance(valor, list) else valor
+
+def como_resultado(valor): # Mesmo formato do repositório local: uma lista de linhas continua lista (como o fetchall), cada linha vira tupla
+    if isinstance(valor, list) and all(isinstance(item, list) for item in valor): return [como_tuplas(item) for item in valor] # Inclui a lista vazia
+    return como_tuplas(valor)
+
+class ConexaoServidor: # Envia as chamadas aos repositórios do servidor
+    def __init__(self, url=URL_SERVIDOR, token=TOKEN_SERVIDOR):
+        partes = urlsplit(url if "://" in url else f"http://{url}")
+        self.url = url; self.host = partes.hostname or "127.0.0.1"; self.porta = partes.port or 8765
+        self.token = token
+        self.locais = threading.local() # Uma conexão HTTP por thread (a interface e as tarefas em segundo plano chamam ao mesmo tempo)
+
+    def conexao_http(self):
+        conexao = getattr(self.locais, "conexao", None)
+        if conexao is None: conexao = self.locais.conexao = http.client.HTTPConnection(self.host, self.porta, timeout=TEMPO_LIMITE_S)
+        return conexao
+
+    def enviar(self, metodo, caminho, corpo=None, repetir=True): # Retorna (status, resposta decodificada); repetir=False para escritas
+        cabecalhos = {"Content-Type": "application/json"}
+        if self.token: cabecalhos["X-Livraria-Token"] = self.token
+        dados = json.dumps(corpo).encode("utf-8") if corpo is not None else None
+        for tentativa in range(2):
+            conexao = self.conexao_http(); reaproveitada = conexao.sock is not None
+            try:
+                conexao.request(metodo, caminho, dados, cabecalhos)
+                resposta = conexao.getresponse()
+                return resposta.status, json.loads(resposta.read() or b"{}")
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError) as e:
+                conexao.close(); self.locais.conexao = None
+                if not repetir and reaproveitada: # O servidor pode ter gravado antes de a conexão cair: repetir duplicaria a escrita
+                    raise sqlite3.OperationalError(f"Servidor {self.url} indisponível: {e}. A operação pode ter sido gravada; confira antes de repetir.") from e
+                if not reaproveitada or tentativa: raise sqlite3.OperationalError(f"Servidor {self.url} indisponível: {e}") from e
+                # Leitura numa conexão mantida aberta que o servidor já fechou: tenta de novo uma vez com uma conexão nova
+            except (OSError, http.client.HTTPException, ValueError) as e:
+                conexao.close(); self.locais.conexao = None
+                raise sqlite3.OperationalError(f"Servidor {self.url} indisponível: {e}") from e
+
+    def chamar(self, repositorio, metodo, *argumentos, **opcoes):
+        escrita = METODOS_REMOTOS.get(repositorio, {}).get(metodo, True) # Método desconhecido: tratado como escrita (o servidor responde 404)
+        status, resposta = self.enviar("POST", f"/api/{repositorio}/{metodo}", {"argumentos": list(argumentos), "opcoes": opcoes}, repetir=not escrita)
+        if status != 200: # Relança o erro do servidor com o tipo equivalente ao do repositório local
+            raise ERROS_REMOTOS.get(resposta.get("tipo"), sqlite3.DatabaseError)(resposta.get("erro", f"Erro HTTP {status}"))
+        return como_resultado(resposta.get("resultado"))
+
+    def saude(self): # {"ok": True, "versao_banco": N}; lança sqlite3.OperationalError se o servidor não responder
+        status, resposta = self.enviar("GET", "/api/saude")
+        if status != 200: raise ERROS_REMOTOS.get(resposta.get("tipo"), sqlite3.DatabaseError)(resposta.get("erro", f"Erro HTTP {status}"))
+        return resposta
+
+    def fechar(self): # Fecha a conexão HTTP da thread atual
+        conexao = getattr(self.locais, "conexao", None)
+        if conexao is not None: conexao.close(); self.locais.conexao = None
+
+class RepositorioRemoto: # Mesmos métodos do repositório local de nome 'nome' (os permitidos em protocolo_remoto.METODOS_REMOTOS)
+    def __init__(self, servidor, nome):
+        self.servidor = servidor; self.nome = nome
+
+    def __getattr__(self, metodo):
+        if metodo.startswith("_"): raise AttributeError(metodo)
+        return lambda *argumentos, **opcoes: self.servidor.chamar(self.nome, metodo, *argumentos, **opcoes)
+
+def repositorios_remotos(url=URL_SERVIDOR, token=TOKEN_SERVIDOR): # (clientes, vendas, relatorios, alteracoes) ligados ao servidor
+    servidor = ConexaoServidor(url, token)
+    return tuple(RepositorioRemoto(servidor, nome) for nome in ("clientes", "vendas", "relatorios", "alteracoes"))
@@ -2,87 +2,64 @@
 # 1. IMPORTAÇÕES
 # ===================================================
 import sqlite3                    # Importa o módulo para trabalhar com banco de dados SQLite
-import csv                        # Importa o módulo para manipular arquivos CSV 
-import re                         # Importa o módulo de expressões regulares, útil para validações
+import bisect                     # Importa a busca binária, usada para posicionar clientes na lista já ordenada
 from tkinter import *             # Importa todos os componentes da biblioteca Tkinter para a interface gráfica
 from tkinter import messagebox    # Importa caixas de mensagens como showinfo, showerror, etc.
 from tkinter import ttk           # Importa o módulo ttk, que fornece widgets mais modernos para o Tkinter
 from tkinter import filedialog    # Importa o módulo para abrir janelas de diálogo de arquivos (abrir/salvar)
-import requests                   # Importa a biblioteca requests para fazer requisições HTTP (APIs)
-import json                       # Importa o módulo json para trabalhar com dados no formato JSON
 from datetime import datetime     # Importa a classe datetime para manipulação de datas
+import sys                        # Importa o módulo sys para ler os argumentos da linha de comando
+import time                       # Importa o módulo time para medir tempos
+import threading                  # Importa o módulo threading para carregar dados sem travar a interface
+import queue                      # Importa filas seguras entre threads, usadas para devolver resultados à interface
+# Módulos do próprio projeto (camada de dados e localidades, sem dependência de interface):
+from banco import conectar_banco, otimizar_banco
+from repositorio import (ClienteRepository, VendaRepository, RelatorioRepository, AlteracaoRepository, TAMANHO_PAGINA_CLIENTES, TAMANHO_PAGINA_VENDAS,
+                         ROTULOS_EXPORTACAO, email_valido, formatar_telefone, importar_csv, formatar_resumo_importacao, exportar_dados)
+from localizacao import buscar_estados_e_cidades, DADOS_LOCALIZACAO_MINIMOS, IndiceCidades
+from cliente_remoto import URL_SERVIDOR, repositorios_remotos
+import diagnostico
+from diagnostico import medir_acao # Mede o tempo das ações da interface quando LIVRARIA_DIAGNOSTICO=1
 # ===================================================
-# 2. FUNÇÕES AUXILIARES E BANCO DE DADOS
+# 2. CONFIGURAÇÕES DA INTERFACE
 # ===================================================
-
-def buscar_estados_e_cidades(): # Busca os estados e suas respectivas cidades da API pública do IBGE.
-    print("Buscando dados de estados e cidades... Isso pode levar um momento.")
-    try:
-        url_estados = "https://servicodados.ibge.gov.br/api/v1/localidades/estados?orderBy=nome" # URL da API do IBGE para obter todos os estados do Brasil, ordenados por nome
-        response_estados = requests.get(url_estados, timeout=10)  # Faz a requisição HTTP GET para obter os estados
-        response_estados.raise_for_status() # Lança exceção se houver erro na resposta
-        estados = response_estados.json()  # Converte a resposta JSON em lista de estados
-        dados_completos = {}  # Dicionário para armazenar os estados e suas cidades
-        for estado in estados: # Para cada estado, busca suas cidades (municípios)
-            uf = estado['sigla']
-            url_municipios = f"https://servicodados.ibge.gov.br/api/v1/localidades/estados/{uf}/municipios"
-            response_municipios = requests.get(url_municipios, timeout=10)
-            response_municipios.raise_for_status()
-            municipios = response_municipios.json()
-            dados_completos[uf] = sorted([m['nome'] for m in municipios]) # Armazena a lista de nomes de cidades (ordenadas) no dicionário usando a sigla do estado como chave
-        print("Dados de localização carregados com sucesso!")
-        return dados_completos
-    except requests.exceptions.RequestException as e: # Em caso de falha de rede ou API, exibe erro e retorna um dicionário com dados mínimos locais
-        messagebox.showerror("Erro de Rede", f"Não foi possível buscar a lista de cidades e estados.\nVerifique sua conexão com a internet.\nUsando dados locais mínimos.\n\nErro: {e}")
-        return {"SP": ["São Paulo", "Campinas", "Guarulhos"], "RJ": ["Rio de Janeiro", "Niterói", "Duque de Caxias"], "MG": ["Belo Horizonte", "Uberlândia"], "AL": ["Maceió", "Arapiraca"]}
-
-
-def conectar_banco(): # Conecta ao banco de dados e garante que as tabelas 'clientes' e 'vendas' existam.
-    conexao = sqlite3.connect("clientes_livraria.db") # Conecta (ou cria) o banco de dados SQLite chamado 'clientes_livraria.db'
-    cursor = conexao.cursor()  # Cria um cursor para executar comandos SQL
-    # Cria a tabela 'clientes' caso ainda não exista:
-    cursor.execute("""      
-        CREATE TABLE IF NOT EXISTS clientes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome TEXT NOT NULL,
-            email TEXT NOT NULL UNIQUE,
-            telefone TEXT NOT NULL,
-            cidade TEXT NOT NULL,
-            estado TEXT NOT NULL
-        )
-    """)
-    # Cria a tabela 'vendas' caso ainda não exista
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS vendas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            cliente_id INTEGER NOT NULL,
-            livro_titulo TEXT NOT NULL,
-            livro_autor TEXT NOT NULL,
-            genero TEXT NOT NULL,
-            data_compra DATE NOT NULL,
-            valor_total REAL NOT NULL,
-            FOREIGN KEY (cliente_id) REFERENCES clientes (id) ON DELETE CASCADE
-        )
-    """)
-    conexao.commit() # Confirma as alterações no banco
-    return conexao
-
+LIMIAR_PRE_CARREGAMENTO = 0.8 # Fração da rolagem a partir da qual a próxima página já é carregada
+ATRASO_BUSCA_MS = 250 # Tempo sem digitar (em milissegundos) antes de a busca ser executada
+INTERVALO_VERIFICACAO_MS = 100 # Intervalo com que a interface verifica se uma tarefa em segundo plano terminou
+INTERVALO_OTIMIZACAO_MS = 30 * 60 * 1000 # Intervalo entre execuções periódicas de PRAGMA optimize (30 minutos)
+INTERVALO_MONITOR_LOOP_MS = 100 # Com o diagnóstico ligado: intervalo entre as medições do atraso do loop do Tkinter
+INTERVALO_ALTERACOES_MS = 1000 # Intervalo entre as verificações de alterações feitas por outros programas (ou outros caixas)
+TECLAS_NAVEGACAO = {"Up", "Down", "Return", "KP_Enter", "Escape", "Tab", "ISO_Left_Tab"} # Teclas que percorrem a lista de cidades sem trocar as sugestões
 # ===================================================
 # 3. CLASSE PRINCIPAL DA APLICAÇÃO
 # ===================================================
 class Aplicacao:
     def __init__(self):
-        # Conecta ao banco de dados e cria um cursor para execução de comandos SQL
-        self.conexao = conectar_banco() 
-        self.cursor = self.conexao.cursor()
-        # Carrega os dados de localização (estados e cidades) a partir da API do IBGE
-        self.dados_localizacao = buscar_estados_e_cidades()
+        self.inicio_execucao = time.perf_counter() # Marca o início da abertura, para medir o tempo até a janela ficar interativa
+        # Conecta ao banco de dados; todo o SQL fica nos repositórios de clientes e vendas
+        if URL_SERVIDOR: # Modo servidor (LIVRARIA_SERVIDOR): os repositórios chamam servidor.py por HTTP, com os mesmos métodos
+            self.conexao = None
+            self.clientes, self.vendas, self.relatorios, self.alteracoes = repositorios_remotos()
+        else:
+            self.conexao = conectar_banco() 
+            self.clientes = ClienteRepository(self.conexao)
+            self.vendas = VendaRepository(self.conexao)
+            self.relatorios = RelatorioRepository(self.conexao)
+            self.alteracoes = AlteracaoRepository(self.conexao)
+        # Ponto de partida do acompanhamento de alterações (antes de carregar a lista: o que mudar durante a carga é aplicado depois)
+        self.ultima_alteracao = self.alteracoes.ultima()
+        self.versao_dados = self.alteracoes.versao_dados() if self.conexao is not None else None
+        # Os dados de localização (estados e cidades) são carregados em segundo plano, depois que a janela abre:
+        self.dados_localizacao = {}
+        self.indice_cidades = IndiceCidades({}) # Sugestões do campo Cidade enquanto o usuário digita (sem acentos/maiúsculas)
+        self.tempo_ate_interativo = None # Tempo (em segundos) até a janela principal responder ao usuário
         # Cria a janela principal da aplicação com título, tamanho e cor de fundo personalizados
         self.janela = Tk()
-        self.janela.title("Cadastro de Clientes e Vendas: Livraria")
+        self.janela.title("Cadastro de Clientes e Vendas: Livraria" + (f" (servidor {URL_SERVIDOR})" if URL_SERVIDOR else ""))
         self.janela.geometry("850x650")
         self.janela.configure(bg="#f0f7f4")
         self.id_cliente_selecionado = None # Inicializa o ID do cliente selecionado (usado para atualização/exclusão)
+        self.janela_compras = None # Janela de compras (JanelaCompras), criada no primeiro uso e reaproveitada para os outros clientes
         self.font_size = 10
         self.frames() # Chama os métodos para criar os frames da interface
         # Adiciona os widgets (campos, labels, botões) ao primeiro e segundo frame
@@ -95,8 +72,9 @@ class Aplicacao:
             self.lbl_nome, self.lbl_email, self.lbl_telefone, self.lbl_estado, self.lbl_cidade,
             self.entry_nome, self.entry_email, self.entry_telefone,
             self.combo_estado, self.combo_cidade,
-            self.btn_cadastrar, self.btn_limpar, self.btn_atualizar,
-            self.btn_excluir, self.btn_limpar_todos, self.btn_exportar, self.btn_ver_compras
+            self.lbl_busca, self.entry_busca,
+            self.btn_cadastrar, self.btn_limpar, self.btn_atualizar, self.btn_atualizar_cidades, self.btn_relatorios,
+            self.btn_excluir, self.btn_limpar_todos, self.btn_exportar, self.btn_ver_compras, self.btn_importar
         ]
         self.style = ttk.Style() # Configura o estilo padrão do ttk
         self.atualizar_fontes() # Aplica o tamanho de fonte definido aos widgets
@@ -106,9 +84,19 @@ class Aplicacao:
         self.entry_telefone.bind("<Return>", lambda e: self.combo_estado.focus())
         # Ligações de atalhos para funcionalidades adicionais:
         self.janela.bind("<Escape>", lambda e: self.limpar_campos())
+        self.janela.bind("<F5>", self.atualizar_localizacao)
+        self.janela.bind("<F12>", self.abrir_diagnostico)
         self.janela.bind("<Control-plus>", self.aumentar_zoom)
         self.janela.bind("<Control-minus>", self.diminuir_zoom)
         self.janela.bind("<Control-MouseWheel>", self.zoom_com_roda)
+        # Inicia a busca dos estados e cidades sem bloquear a interface e registra quando a janela fica interativa:
+        self.iniciar_carregamento_localizacao()
+        self.janela.after_idle(self.registrar_tempo_interativo)
+        # Otimiza o banco periodicamente e ao fechar a janela:
+        self.janela.after(INTERVALO_OTIMIZACAO_MS, self.otimizar_periodicamente)
+        self.janela.after(INTERVALO_ALTERACOES_MS, self.acompanhar_alteracoes) # Mantém as listas em dia com as alterações de outros programas
+        self.janela.protocol("WM_DELETE_WINDOW", self.fechar)
+        if diagnostico.ATIVO: self.monitorar_loop(time.perf_counter())
         # Inicia o loop principal da interface gráfica:
         self.janela.mainloop()
 
@@ -135,15 +123,25 @@ class Aplicacao:
         self.entry_telefone.bind('<FocusOut>', self.on_telefone_focus_out); self.entry_telefone.bind('<KeyRelease>', self.formatar_telefone_mask)
         # Combobox para seleção do estado:
         self.lbl_estado = Label(self.frame_1, text="Estado:", bg="#dbeadf"); self.lbl_estado.place(x=10, y=140)
-        self.combo_estado = ttk.Combobox(self.frame_1, values=list(self.dados_localizacao.keys())); self.combo_estado.place(x=100, y=140)
+        self.combo_estado = ttk.Combobox(self.frame_1, values=list(self.dados_localizacao.keys()), state='disabled'); self.combo_estado.place(x=100, y=140)
         self.combo_estado.bind("<<ComboboxSelected>>", self.atualizar_cidades)
         # Combobox para seleção da cidade, desabilitada até seleção do estado:
         self.lbl_cidade = Label(self.frame_1, text="Cidade:", bg="#dbeadf"); self.lbl_cidade.place(x=300, y=140)
         self.combo_cidade = ttk.Combobox(self.frame_1, width=30, state='disabled'); self.combo_cidade.place(x=370, y=140)
+        self.combo_cidade.bind("<KeyRelease>", self.sugerir_cidades) # A lista mostra só as cidades que combinam com o que foi digitado
+        # Aviso exibido enquanto os estados e cidades ainda estão sendo carregados:
+        self.lbl_carregando = Label(self.frame_1, text="", fg="#5a6b73", bg="#dbeadf"); self.lbl_carregando.place(x=100, y=170)
         # Botões de ação: cadastrar, limpar campos e atualizar cliente:
         self.btn_cadastrar = Button(self.frame_1, text="Cadastrar", command=self.cadastrar_cliente, bg="#a8d5ba"); self.btn_cadastrar.place(x=10, y=200)
         self.btn_limpar = Button(self.frame_1, text="Limpar Campos", command=self.limpar_campos, bg="#f7c6a3"); self.btn_limpar.place(x=100, y=200)
         self.btn_atualizar = Button(self.frame_1, text="Atualizar", command=self.atualizar_cliente, bg="#a3d1f7"); self.btn_atualizar.place(x=215, y=200)
+        self.btn_atualizar_cidades = Button(self.frame_1, text="Atualizar Cidades", command=self.atualizar_localizacao, bg="#d5c6f7"); self.btn_atualizar_cidades.place(x=300, y=200)
+        self.btn_relatorios = Button(self.frame_1, text="Relatórios", command=self.abrir_relatorios, bg="#f7e3a3"); self.btn_relatorios.place(x=430, y=200)
+        # Campo de busca que filtra a lista de clientes por nome, e-mail, telefone, cidade ou UF enquanto o usuário digita:
+        self.lbl_busca = Label(self.frame_1, text="Buscar:", bg="#dbeadf"); self.lbl_busca.place(x=10, y=240)
+        self.entry_busca = Entry(self.frame_1, width=50); self.entry_busca.place(x=100, y=240)
+        self.entry_busca.bind("<KeyRelease>", self.agendar_busca)
+        self.termo_busca = ""; self.busca_agendada = None
 
     def widgets_frame2(self):
         # Cria a tabela Treeview para exibir os clientes com colunas personalizadas:
@@ -160,13 +158,17 @@ class Aplicacao:
         # Permite editar cliente ao clicar duas vezes na linha:
         self.lista_clientes.bind("<Double-1>", self.carregar_cliente_para_edicao)
         # Adiciona barra de rolagem vertical à tabela:
-        scrollbar = Scrollbar(self.frame_2, orient="vertical", command=self.lista_clientes.yview)
-        self.lista_clientes.configure(yscrollcommand=scrollbar.set); scrollbar.place(relx=0.97, rely=0, relheight=0.8)
+        self.scrollbar_clientes = Scrollbar(self.frame_2, orient="vertical", command=self.lista_clientes.yview)
+        self.lista_clientes.configure(yscrollcommand=self.ao_rolar_lista_clientes); self.scrollbar_clientes.place(relx=0.97, rely=0, relheight=0.8)
+        # Estado da paginação: chaves (nome, id) das linhas carregadas, em ordem, e se já se chegou ao fim da tabela
+        self.chaves_clientes = []; self.chave_por_id = {}; self.fim_lista_clientes = False; self.pagina_clientes_agendada = False
         # Botões de ações adicionais abaixo da tabela:
         self.btn_excluir = Button(self.frame_2, text="Excluir Selecionado", command=self.excluir_cliente, bg="#f6d1a5"); self.btn_excluir.place(relx=0.01, rely=0.83)
         self.btn_limpar_todos = Button(self.frame_2, text="Limpar Todos", command=self.limpar_tabela, bg="#f6a5a5"); self.btn_limpar_todos.place(relx=0.20, rely=0.83)
-        self.btn_exportar = Button(self.frame_2, text="Exportar para CSV", command=self.exportar_para_csv, bg="#b3f6a5"); self.btn_exportar.place(relx=0.35, rely=0.83)
+        self.btn_exportar = Button(self.frame_2, text="Exportar Dados", command=self.exportar_para_csv, bg="#b3f6a5"); self.btn_exportar.place(relx=0.35, rely=0.83)
         self.btn_ver_compras = Button(self.frame_2, text="Ver/Adicionar Compras", command=self.abrir_janela_compras, bg="#a5c4f6"); self.btn_ver_compras.place(relx=0.53, rely=0.83)
+        self.btn_importar = Button(self.frame_2, text="Importar CSV", command=self.importar_de_csv, bg="#e3f6a5"); self.btn_importar.place(relx=0.77, rely=0.83)
+        if self.conexao is None: self.btn_importar['state'] = 'disabled' # Importação e exportação leem/gravam o arquivo do banco: no modo servidor, use 'python -m livraria' na máquina do servidor
 
     # --- 4. FUNÇÕES DE EVENTOS E VALIDAÇÕES ---
     def on_telefone_focus_in(self, event):  # Remove o placeholder do telefone ao focar no campo
@@ -178,21 +180,120 @@ class Aplicacao:
             self.entry_telefone.insert(0, '(DD) XXXXX-XXXX'); self.entry_telefone.config(fg='grey')
 
     def formatar_telefone_mask(self, event): # Aplica máscara de formatação ao campo telefone enquanto o usuário digita
-        texto_limpo = "".join(filter(str.isdigit, self.entry_telefone.get()))
-        formatado = texto_limpo
-        if len(texto_limpo) > 2: formatado = f"({texto_limpo[:2]}) {texto_limpo[2:7]}"
-        if len(texto_limpo) > 7: formatado = f"({texto_limpo[:2]}) {texto_limpo[2:7]}-{texto_limpo[7:11]}"
+        formatado = formatar_telefone(self.entry_telefone.get())
         self.entry_telefone.delete(0, 'end'); self.entry_telefone.insert(0, formatado)
         self.entry_telefone.icursor(len(formatado))
 
-    def atualizar_cidades(self, event): # Atualiza a lista de cidades de acordo com o estado selecionado
+    def atualizar_cidades(self, event): # Habilita o campo Cidade para o estado selecionado (a lista começa com as primeiras cidades do estado)
         estado_selecionado = self.combo_estado.get()
         if estado_selecionado in self.dados_localizacao:
-            self.combo_cidade.config(state='normal'); self.combo_cidade['values'] = self.dados_localizacao[estado_selecionado]
+            self.combo_cidade.config(state='normal'); self.combo_cidade['values'] = self.sugestoes_cidade('')
             self.combo_cidade.set('')
 
-    def validar_email(self, email): # Valida o formato do e-mail com regex simples
-        if re.match(r"[^@]+@[^@]+\.[^@]+", email): return True
+    def sugestoes_cidade(self, texto): # Nomes das cidades do estado selecionado que combinam com 'texto' (poucas dezenas, não o estado inteiro)
+        return [cidade for cidade, _ in self.indice_cidades.buscar(texto, self.combo_estado.get())]
+
+    def sugerir_cidades(self, event): # A cada tecla, troca a lista do campo Cidade pelas cidades que começam com o texto digitado
+        if event.keysym in TECLAS_NAVEGACAO or str(self.combo_cidade['state']) == 'disabled': return
+        self.combo_cidade['values'] = self.sugestoes_cidade(self.combo_cidade.get())
+
+    # --- Tarefas em segundo plano ---
+    def executar_em_segundo_plano(self, tarefa, ao_concluir, ao_falhar=None, ao_progredir=None): # Executa 'tarefa' em outra thread e entrega o resultado a 'ao_concluir' na thread do Tkinter
+        fila = queue.Queue(maxsize=1) # A thread de trabalho não pode tocar em widgets: ela só deposita o resultado (ou o erro) na fila
+        fila_progresso = queue.Queue() # Com 'ao_progredir', a tarefa recebe uma função para informar o andamento por esta fila
+        tarefa = medir_acao(tarefa, "tarefa") # Tempo da tarefa na outra thread (só com o diagnóstico ligado)
+        def executar():
+            try: fila.put((True, tarefa(lambda *andamento: fila_progresso.put(andamento)) if ao_progredir else tarefa()))
+            except Exception as e: fila.put((False, e))
+        def verificar(): # Consulta as filas periodicamente (via after) até o resultado chegar
+            andamento = None
+            while not fila_progresso.empty(): andamento = fila_progresso.get_nowait() # Só o andamento mais recente interessa
+            if andamento: ao_progredir(*andamento)
+            try: sucesso, resultado = fila.get_nowait()
+            except queue.Empty:
+                self.janela.after(INTERVALO_VERIFICACAO_MS, verificar); return
+            if sucesso: ao_concluir(resultado)
+            elif ao_falhar: ao_falhar(resultado)
+            else: messagebox.showerror("Erro", f"Ocorreu um erro na operação em segundo plano:\n{resultado}")
+        threading.Thread(target=executar, daemon=True).start()
+        self.janela.after(INTERVALO_VERIFICACAO_MS, verificar)
+
+    # --- Carregamento dos estados e cidades em segundo plano ---
+    def iniciar_carregamento_localizacao(self, forcar_atualizacao=False): # Dispara a busca dos estados e cidades em uma thread separada
+        self.combo_estado.config(state='disabled'); self.btn_atualizar_cidades.config(state='disabled')
+        self.lbl_carregando.config(text="Carregando estados e cidades...")
+        def carregar(): # O índice das cidades também é montado fora da thread do Tkinter
+            dados = buscar_estados_e_cidades(forcar_atualizacao=forcar_atualizacao, avisar_erro=False)
+            return dados, IndiceCidades(dados)
+        self.executar_em_segundo_plano(carregar, lambda resultado: self.aplicar_dados_localizacao(*resultado, forcar_atualizacao))
+
+    @medir_acao
+    def aplicar_dados_localizacao(self, dados, indice, forcado): # Recebe, já na thread do Tkinter, os estados e cidades carregados e o índice das cidades
+        self.dados_localizacao = dados; self.indice_cidades = indice
+        self.combo_estado.config(state='normal', values=list(dados.keys())); self.btn_atualizar_cidades.config(state='normal')
+        self.lbl_carregando.config(text="")
+        estado = self.combo_estado.get()
+        if estado in dados: # Um cliente pode ter sido carregado para edição durante o carregamento
+            cidade = self.combo_cidade.get(); self.atualizar_cidades(None); self.combo_cidade.set(cidade)
+        print(f"Estados e cidades disponíveis {time.perf_counter() - self.inicio_execucao:.2f} s após a abertura.")
+        if dados is DADOS_LOCALIZACAO_MINIMOS:
+            messagebox.showerror("Erro de Rede", "Não foi possível buscar a lista de cidades e estados.\nVerifique sua conexão com a internet.\nUsando dados locais mínimos.")
+        elif forcado:
+            messagebox.showinfo("Localidades", "Lista de estados e cidades atualizada.")
+
+    def atualizar_localizacao(self, event=None): # Ignora o cache e busca novamente os estados e cidades na API do IBGE
+        if str(self.btn_atualizar_cidades['state']) == 'disabled': return # Já existe um carregamento em andamento
+        self.iniciar_carregamento_localizacao(forcar_atualizacao=True)
+
+    def otimizar_periodicamente(self): # Executa PRAGMA optimize e agenda a próxima execução
+        if self.conexao is None: return # No modo servidor quem otimiza é o servidor
+        otimizar_banco(self.conexao)
+        self.janela.after(INTERVALO_OTIMIZACAO_MS, self.otimizar_periodicamente)
+
+    def acompanhar_alteracoes(self): # Aplica periodicamente as alterações feitas por outros programas e agenda a próxima verificação
+        try: self.aplicar_alteracoes()
+        # Banco ocupado, servidor fora do ar ou token recusado (PermissionError/LookupError do modo servidor): tenta de novo no próximo ciclo
+        except (sqlite3.Error, PermissionError, LookupError) as e: print(f"Falha ao verificar alterações: {e}")
+        finally: self.janela.after(INTERVALO_ALTERACOES_MS, self.acompanhar_alteracoes) # Mesmo com outro erro, a verificação não para
+
+    @medir_acao
+    def aplicar_alteracoes(self): # Atualiza só os clientes e compras alterados desde a última alteração vista (registro de alterações, migração 5)
+        if self.conexao is not None: # Local: sem commit de outra conexão, o PRAGMA data_version não muda e nada mais é consultado
+            versao = self.alteracoes.versao_dados()
+            if versao == self.versao_dados: return
+            self.versao_dados = versao
+        alteracoes = self.alteracoes.desde(self.ultima_alteracao)
+        if alteracoes is None: # Alterações demais (ou uma importação): recarregar sai mais barato
+            self.ultima_alteracao = self.alteracoes.ultima(); self.carregar_clientes()
+            if self.janela_compras: self.janela_compras.recarregar()
+            return
+        if not alteracoes: return
+        self.ultima_alteracao = alteracoes[-1][0]
+        # Alterações já aplicadas por esta janela (as próprias) são reaplicadas sem efeito: cada cliente é relido e reposicionado
+        for cliente_id in dict.fromkeys(registro_id for _, tabela, _, registro_id, _ in alteracoes if tabela == "clientes"):
+            row = self.clientes.obter(cliente_id)
+            if row and self.cliente_atende_busca(cliente_id): self.atualizar_cliente_na_lista(row)
+            else: self.remover_cliente_da_lista(cliente_id)
+        self.atualizar_estado_botoes()
+        if self.janela_compras: self.janela_compras.aplicar_alteracoes(alteracoes)
+
+    def fechar(self): # Fecha a janela principal, otimizando e fechando a conexão com o banco
+        if self.conexao is not None: otimizar_banco(self.conexao); self.conexao.close()
+        if diagnostico.ATIVO: print(f"Métricas de diagnóstico salvas em {diagnostico.salvar_metricas()}.")
+        self.janela.destroy()
+
+    def monitorar_loop(self, previsto): # Com o diagnóstico ligado: mede quanto o Tkinter atrasou para atender um 'after' (a interface "congelada")
+        agora = time.perf_counter()
+        diagnostico.METRICAS.registrar("loop: atraso do Tkinter", max(0.0, (agora - previsto) * 1000))
+        self.janela.after(INTERVALO_MONITOR_LOOP_MS, self.monitorar_loop, agora + INTERVALO_MONITOR_LOOP_MS / 1000)
+
+    def registrar_tempo_interativo(self): # Chamada pelo Tkinter na primeira vez que o loop principal fica ocioso
+        self.tempo_ate_interativo = time.perf_counter() - self.inicio_execucao
+        if diagnostico.ATIVO: diagnostico.METRICAS.registrar("abertura: janela interativa", self.tempo_ate_interativo * 1000)
+        print(f"Janela principal interativa em {self.tempo_ate_interativo * 1000:.0f} ms.")
+
+    def validar_email(self, email): # Valida o formato do e-mail e avisa o usuário em caso de erro
+        if email_valido(email): return True
         messagebox.showerror("Erro de Validação", "Formato de e-mail inválido."); return False
 
     def validar_valor(self, P): # Valida a entrada de um valor numérico com vírgula opcional (para campos monetários, por exemplo)
@@ -202,6 +303,7 @@ class Aplicacao:
         except ValueError: return False
 
     # --- 5. FUNÇÕES DE CRUD (Create, Read, Update, Delete) ---
+    @medir_acao
     def cadastrar_cliente(self): # Insere um novo cliente no banco de dados
         nome=self.entry_nome.get().strip(); email=self.entry_email.get().strip(); telefone=self.entry_telefone.get().strip()
         estado=self.combo_estado.get(); cidade=self.combo_cidade.get()
@@ -209,19 +311,71 @@ class Aplicacao:
         if not all([nome, email, estado, cidade]) or telefone == '(DD) XXXXX-XXXX' or not telefone:
             messagebox.showerror("Erro", "Preencha todos os campos."); return
         if not self.validar_email(email): return
+        cidade = self.indice_cidades.nome_oficial(cidade, estado) or cidade # 'sao paulo' digitado é gravado como 'São Paulo'
         try:
-            self.cursor.execute("INSERT INTO clientes (nome, email, telefone, cidade, estado) VALUES (?, ?, ?, ?, ?)",
-                                (nome, email, telefone, cidade, estado))
-            self.conexao.commit(); self.limpar_campos(); self.carregar_clientes()
+            cliente_id = self.clientes.inserir(nome, email, telefone, cidade, estado); self.limpar_campos()
+            if self.cliente_atende_busca(cliente_id): self.inserir_cliente_na_lista((cliente_id, nome, email, telefone, cidade, estado))
+            self.atualizar_estado_botoes()
             messagebox.showinfo("Sucesso", "Cliente cadastrado com sucesso.")
         except sqlite3.IntegrityError: messagebox.showerror("Erro", f"O e-mail '{email}' já está cadastrado.")
-
-    def carregar_clientes(self): # Carrega todos os clientes da base de dados e exibe na tabela
-        for i in self.lista_clientes.get_children(): self.lista_clientes.delete(i)
-        self.cursor.execute("SELECT id, nome, email, telefone, cidade, estado FROM clientes ORDER BY nome ASC")
-        for row in self.cursor.fetchall(): self.lista_clientes.insert("", "end", values=row)
+        except sqlite3.OperationalError as e: # Banco ocupado por uma importação em segundo plano (ou servidor fora do ar)
+            messagebox.showerror("Erro", f"Não foi possível gravar agora ({e}).\nAguarde alguns instantes e tente novamente.")
+
+    @medir_acao
+    def carregar_clientes(self): # Recarrega a lista de clientes desde o início, trazendo apenas a primeira página
+        self.lista_clientes.delete(*self.lista_clientes.get_children())
+        self.chaves_clientes = []; self.chave_por_id = {}; self.fim_lista_clientes = False
+        self.carregar_proxima_pagina_clientes()
         self.atualizar_estado_botoes()
 
+    @medir_acao
+    def carregar_proxima_pagina_clientes(self): # Busca a próxima página de clientes por paginação de chave (nome, id), sem OFFSET
+        self.pagina_clientes_agendada = False
+        if self.fim_lista_clientes: return
+        # Continua a partir da última linha carregada; o índice em 'nome' evita ler as anteriores
+        linhas = self.clientes.pagina(self.termo_busca, self.chaves_clientes[-1] if self.chaves_clientes else None)
+        for row in linhas:
+            chave = (row[1], row[0]); self.chaves_clientes.append(chave); self.chave_por_id[row[0]] = chave
+            self.lista_clientes.insert("", "end", iid=str(row[0]), values=row)
+        self.fim_lista_clientes = len(linhas) < TAMANHO_PAGINA_CLIENTES
+
+    def agendar_busca(self, event=None): # Debounce: a busca só é feita quando o usuário para de digitar por ATRASO_BUSCA_MS
+        if self.busca_agendada: self.janela.after_cancel(self.busca_agendada)
+        self.busca_agendada = self.janela.after(ATRASO_BUSCA_MS, self.aplicar_busca)
+
+    @medir_acao
+    def aplicar_busca(self): # Recarrega a lista com o filtro digitado no campo de busca
+        self.busca_agendada = None
+        termo = self.entry_busca.get().strip()
+        if termo == self.termo_busca: return
+        self.termo_busca = termo; self.carregar_clientes()
+
+    def cliente_atende_busca(self, cliente_id): # Verifica se um cliente recém-gravado deve aparecer na lista filtrada
+        return self.clientes.atende_busca(cliente_id, self.termo_busca)
+
+    def ao_rolar_lista_clientes(self, primeiro, ultimo): # Atualiza a scrollbar e antecipa a próxima página quando a rolagem se aproxima do fim
+        self.scrollbar_clientes.set(primeiro, ultimo)
+        if float(ultimo) >= LIMIAR_PRE_CARREGAMENTO and not self.fim_lista_clientes and not self.pagina_clientes_agendada:
+            self.pagina_clientes_agendada = True; self.janela.after_idle(self.carregar_proxima_pagina_clientes)
+
+    def inserir_cliente_na_lista(self, row): # Insere um único cliente na posição certa da lista, se ela estiver dentro das páginas já carregadas
+        chave = (row[1], row[0]); posicao = bisect.bisect_left(self.chaves_clientes, chave)
+        if posicao == len(self.chaves_clientes) and not self.fim_lista_clientes: return # Pertence a uma página ainda não carregada
+        self.chaves_clientes.insert(posicao, chave); self.chave_por_id[row[0]] = chave
+        self.lista_clientes.insert("", posicao, iid=str(row[0]), values=row)
+
+    def atualizar_cliente_na_lista(self, row): # Atualiza a linha do cliente; só a reposiciona se o nome mudou (assim a seleção é mantida)
+        if self.chave_por_id.get(row[0]) == (row[1], row[0]):
+            self.lista_clientes.item(str(row[0]), values=row); return
+        self.remover_cliente_da_lista(row[0]); self.inserir_cliente_na_lista(row)
+
+    def remover_cliente_da_lista(self, cliente_id): # Remove um único cliente da lista, se ele estiver carregado
+        chave = self.chave_por_id.pop(cliente_id, None)
+        if chave is None: return
+        del self.chaves_clientes[bisect.bisect_left(self.chaves_clientes, chave)]
+        self.lista_clientes.delete(str(cliente_id))
+
+    @medir_acao
     def carregar_cliente_para_edicao(self, event): # Preenche os campos do formulário com os dados do cliente selecionado
         self.limpar_campos(); selecionado = self.lista_clientes.selection()
         if not selecionado: return
@@ -232,6 +386,7 @@ class Aplicacao:
         estado, cidade = valores[5], valores[4]
         self.combo_estado.set(estado); self.atualizar_cidades(None); self.combo_cidade.set(cidade)
 
+    @medir_acao
     def atualizar_cliente(self): # Atualiza os dados do cliente selecionado
         if self.id_cliente_selecionado is None:
             messagebox.showwarning("Aviso", "Para atualizar, primeiro dê um duplo-clique no cliente desejado na lista."); return
@@ -240,26 +395,31 @@ class Aplicacao:
         if not all([nome, email, estado, cidade]) or telefone == '(DD) XXXXX-XXXX' or not telefone:
             messagebox.showerror("Erro", "Preencha todos os campos."); return
         if not self.validar_email(email): return
+        cidade = self.indice_cidades.nome_oficial(cidade, estado) or cidade # 'sao paulo' digitado é gravado como 'São Paulo'
         try:
-            self.cursor.execute("UPDATE clientes SET nome=?, email=?, telefone=?, cidade=?, estado=? WHERE id=?",
-                                (nome, email, telefone, cidade, estado, self.id_cliente_selecionado))
-            self.conexao.commit(); self.limpar_campos(); self.carregar_clientes()
+            cliente_id = self.id_cliente_selecionado
+            self.clientes.atualizar(cliente_id, nome, email, telefone, cidade, estado); self.limpar_campos()
+            # Mesmo caminho das alterações de outros computadores: só reposiciona a linha se o nome mudou (mantém a seleção e a rolagem)
+            if self.cliente_atende_busca(cliente_id): self.atualizar_cliente_na_lista((cliente_id, nome, email, telefone, cidade, estado))
+            else: self.remover_cliente_da_lista(cliente_id)
             messagebox.showinfo("Sucesso", "Cadastro atualizado com sucesso.")
         except sqlite3.IntegrityError: messagebox.showerror("Erro", f"O e-mail '{email}' já pertence a outro cliente.")
+        except sqlite3.OperationalError as e: # Banco ocupado por uma importação em segundo plano (ou servidor fora do ar)
+            messagebox.showerror("Erro", f"Não foi possível gravar agora ({e}).\nAguarde alguns instantes e tente novamente.")
 
+    @medir_acao
     def excluir_cliente(self, event=None): # Exclui o cliente selecionado e suas compras
         selecionado = self.lista_clientes.selection()
         if not selecionado: messagebox.showwarning("Aviso", "Selecione um cliente para excluir."); return
         item = self.lista_clientes.item(selecionado[0]); cliente_id, cliente_nome = item["values"][0], item["values"][1]
         if messagebox.askyesno("Confirmar Exclusão", f"Tem certeza que deseja excluir '{cliente_nome}'?\nTodas as suas compras também serão apagadas."):
-            self.cursor.execute("DELETE FROM clientes WHERE id=?", (cliente_id,))
-            self.conexao.commit(); self.carregar_clientes(); self.limpar_campos()
+            self.clientes.excluir(cliente_id); self.remover_cliente_da_lista(cliente_id); self.atualizar_estado_botoes(); self.limpar_campos()
             messagebox.showinfo("Sucesso", "Cliente excluído com sucesso.")
 
+    @medir_acao
     def limpar_tabela(self): # Exclui todos os clientes e registros de compras
         if messagebox.askyesno("Confirmar", "Tem certeza que deseja apagar TODOS os clientes e seus históricos de compra?"):
-            self.cursor.execute("DELETE FROM clientes"); self.cursor.execute("DELETE FROM vendas")
-            self.conexao.commit(); self.carregar_clientes(); self.limpar_campos()
+            self.clientes.excluir_todos(); self.carregar_clientes(); self.limpar_campos()
             messagebox.showinfo("Limpou", "Todos os dados foram removidos.")
 
     def limpar_campos(self): # Limpa os campos do formulário e reseta o estado do formulário
@@ -270,10 +430,11 @@ class Aplicacao:
     def atualizar_estado_botoes(self, event=None): # Habilita ou desabilita botões conforme presença de clientes na tabela
         tem_clientes = len(self.lista_clientes.get_children()) > 0
         self.btn_limpar_todos['state'] = 'normal' if tem_clientes else 'disabled'
-        self.btn_exportar['state'] = 'normal' if tem_clientes else 'disabled'
+        self.btn_exportar['state'] = 'normal' if tem_clientes and self.conexao is not None else 'disabled'
 
 # --- 6. FUNÇÃO DA JANELA DE COMPRAS ---
-    def abrir_janela_compras(self):
+    @medir_acao
+    def abrir_janela_compras(self): # Mostra a janela de compras do cliente selecionado; a janela é criada na primeira vez e reaproveitada depois
         selecionado = self.lista_clientes.selection() # Obtém a seleção atual na lista de clientes
 
         if not selecionado: # Se nenhum cliente estiver selecionado, exibe um aviso e encerra a função
@@ -281,211 +442,474 @@ class Aplicacao:
             return
         # Obtém os dados do cliente selecionado (ID e Nome):
         item = self.lista_clientes.item(selecionado[0])
-        cliente_id, cliente_nome = item['values'][0], item['values'][1]
-    
-        janela_compra = Toplevel(self.janela) # Toplevel cria uma nova janela acima da principal
-        janela_compra.title(f"Compras de {cliente_nome}")
-        janela_compra.geometry("800x550")
-        janela_compra.configure(bg="#f0f7f4")
-        janela_compra.transient(self.janela)
-        janela_compra.focus_force()
-        janela_compra.grab_set()
-
-        # Variável que será usada pelo 'nonlocal'
-        id_compra_selecionada = None
+        if self.janela_compras is None: self.janela_compras = JanelaCompras(self)
+        self.janela_compras.abrir(item['values'][0], item['values'][1])
+
+    # --- 7. FUNÇÕES FINAIS (ZOOM, EXPORTAR, ETC) ---
+    @medir_acao
+    def exportar_para_csv(self): # Abre a janela de exportação: escolha do conteúdo, do formato e da compactação
+        janela_exportar = Toplevel(self.janela); janela_exportar.title("Exportar Dados"); janela_exportar.geometry("380x220")
+        janela_exportar.configure(bg="#f0f7f4"); janela_exportar.transient(self.janela); janela_exportar.grab_set()
+        Label(janela_exportar, text="Conteúdo:", bg="#f0f7f4").place(x=15, y=20)
+        combo_conteudo = ttk.Combobox(janela_exportar, state='readonly', width=25, values=[rotulo for rotulo, _ in ROTULOS_EXPORTACAO.values()])
+        combo_conteudo.current(0); combo_conteudo.place(x=110, y=20)
+        Label(janela_exportar, text="Formato:", bg="#f0f7f4").place(x=15, y=60)
+        combo_formato = ttk.Combobox(janela_exportar, state='readonly', width=25, values=["CSV", "JSON Lines"]); combo_formato.current(0); combo_formato.place(x=110, y=60)
+        compactar = BooleanVar(value=False)
+        Checkbutton(janela_exportar, text="Compactar (gzip)", variable=compactar, bg="#f0f7f4").place(x=105, y=95)
+        barra_progresso = ttk.Progressbar(janela_exportar, length=340, mode='determinate'); barra_progresso.place(x=15, y=135)
+        lbl_progresso = Label(janela_exportar, text="", bg="#f0f7f4"); lbl_progresso.place(x=15, y=160)
+
+        def iniciar(): # Pergunta onde salvar e dispara a exportação em segundo plano
+            conteudo = list(ROTULOS_EXPORTACAO)[combo_conteudo.current()]
+            formato = "jsonl" if combo_formato.get() == "JSON Lines" else "csv"
+            compactado = compactar.get() # Lido aqui: a tarefa roda em outra thread e não pode tocar nas variáveis do Tkinter
+            extensao = f".{formato}" + (".gz" if compactado else "")
+            caminho_arquivo = filedialog.asksaveasfilename(parent=janela_exportar, defaultextension=extensao, initialfile=f"{ROTULOS_EXPORTACAO[conteudo][1]}{extensao}",
+                                                          filetypes=[("Arquivos " + combo_formato.get(), f"*{extensao}"), ("Todos os arquivos", "*.*")], title="Salvar como...")
+            if not caminho_arquivo: return
+            btn_iniciar.config(state='disabled'); barra_progresso['value'] = 0
+            def tarefa(informar_progresso): # Conexão própria: a exportação não usa nem trava a conexão da interface
+                conexao = conectar_banco()
+                try: return exportar_dados(conexao, caminho_arquivo, conteudo, formato, compactado, progresso=informar_progresso)
+                finally: conexao.close()
+            def ao_progredir(feitas, total):
+                if not janela_exportar.winfo_exists(): return
+                barra_progresso['maximum'] = max(total, 1); barra_progresso['value'] = feitas
+                lbl_progresso.config(text=f"{feitas} de {total} registros")
+            def ao_concluir(total):
+                if janela_exportar.winfo_exists(): janela_exportar.destroy()
+                messagebox.showinfo("Sucesso", f"{total} registros exportados com sucesso para:\n{caminho_arquivo}")
+            def ao_falhar(erro):
+                if janela_exportar.winfo_exists(): btn_iniciar.config(state='normal')
+                messagebox.showerror("Erro de Exportação", f"Ocorreu um erro ao salvar o arquivo:\n{erro}")
+            self.executar_em_segundo_plano(tarefa, ao_concluir, ao_falhar, ao_progredir)
+
+        btn_iniciar = Button(janela_exportar, text="Exportar...", bg="#b3f6a5", command=iniciar); btn_iniciar.place(x=15, y=185)
+
+    @medir_acao
+    def abrir_relatorios(self): # Janela de relatórios de vendas; as consultas leem as tabelas de resumo, então são rápidas em qualquer volume
+        janela_relatorios = Toplevel(self.janela); janela_relatorios.title("Relatórios de Vendas"); janela_relatorios.geometry("620x480")
+        janela_relatorios.configure(bg="#f0f7f4"); janela_relatorios.transient(self.janela)
+        Label(janela_relatorios, text="Período (AAAA-MM-DD):", bg="#f0f7f4").place(x=15, y=15)
+        entry_inicio = Entry(janela_relatorios, width=12); entry_inicio.place(x=170, y=15)
+        Label(janela_relatorios, text="até", bg="#f0f7f4").place(x=270, y=15)
+        entry_fim = Entry(janela_relatorios, width=12); entry_fim.place(x=300, y=15)
+        lbl_totais = Label(janela_relatorios, text="", bg="#f0f7f4", font=("Arial", 10, "bold")); lbl_totais.place(x=15, y=45)
+        abas = ttk.Notebook(janela_relatorios); abas.place(relx=0.02, y=75, relwidth=0.96, relheight=0.72)
+        def criar_tabela(titulo, colunas): # Uma aba com uma Treeview; a primeira coluna é o grupo, as demais são números
+            frame = Frame(abas, bg="#f0f7f4"); abas.add(frame, text=titulo)
+            tabela = ttk.Treeview(frame, columns=colunas, show="headings")
+            for i, coluna in enumerate(colunas):
+                tabela.heading(coluna, text=coluna); tabela.column(coluna, anchor='e' if i >= len(colunas) - 2 else 'w', width=120)
+            barra = Scrollbar(frame, orient="vertical", command=tabela.yview); tabela.configure(yscrollcommand=barra.set)
+            tabela.place(relx=0, rely=0, relwidth=0.96, relheight=1); barra.place(relx=0.96, rely=0, relwidth=0.04, relheight=1)
+            return tabela
+        tabela_mes = criar_tabela("Por Mês", ("Mês", "Vendas", "Faturamento (R$)"))
+        tabela_genero = criar_tabela("Por Gênero", ("Gênero", "Vendas", "Faturamento (R$)"))
+        tabela_estado = criar_tabela("Por UF", ("UF", "Vendas", "Faturamento (R$)"))
+        tabela_clientes = criar_tabela("Melhores Clientes", ("ID", "Nome", "Compras", "Total (R$)"))
+        moeda = lambda valor: f"{valor:.2f}".replace('.', ',')
+
+        def atualizar(): # Relê os relatórios com o período informado (o ranking de clientes considera todas as vendas)
+            inicio, fim = entry_inicio.get().strip() or None, entry_fim.get().strip() or None; arquivo = incluir_arquivo.get()
+            for tabela, linhas in ((tabela_mes, self.relatorios.por_mes(inicio, fim, incluir_arquivo=arquivo)),
+                                   (tabela_genero, self.relatorios.por_genero(inicio, fim, incluir_arquivo=arquivo)),
+                                   (tabela_estado, self.relatorios.por_estado(inicio, fim, incluir_arquivo=arquivo))):
+                tabela.delete(*tabela.get_children())
+                for grupo, quantidade, total in linhas: tabela.insert("", END, values=(grupo, quantidade, moeda(total)))
+            tabela_clientes.delete(*tabela_clientes.get_children())
+            for cliente_id, nome, quantidade, total in self.relatorios.melhores_clientes(50, incluir_arquivo=arquivo):
+                tabela_clientes.insert("", END, values=(cliente_id, nome, quantidade, moeda(total)))
+            _, vendas, faturamento = self.vendas.resumo(incluir_arquivo=arquivo)
+            lbl_totais.config(text=f"Total geral: {vendas} vendas, R$ {moeda(faturamento)}")
+
+        def reconstruir(): # Reconstrói os resumos em segundo plano (também varre todas as vendas) e relê os relatórios
+            btn_verificar.config(state='disabled', text="Reconstruindo...")
+            def tarefa():
+                if self.conexao is None: return self.relatorios.reconstruir() # Modo servidor: a reconstrução roda no servidor
+                conexao = conectar_banco()
+                try: RelatorioRepository(conexao).reconstruir()
+                finally: conexao.close()
+            def ao_concluir(_):
+                if not janela_relatorios.winfo_exists(): return
+                btn_verificar.config(state='normal', text="Verificar Consistência"); atualizar()
+                messagebox.showinfo("Relatórios", "Resumos de vendas reconstruídos.", parent=janela_relatorios)
+            def ao_falhar(erro):
+                if janela_relatorios.winfo_exists(): btn_verificar.config(state='normal', text="Verificar Consistência")
+                messagebox.showerror("Erro", f"Não foi possível reconstruir os resumos:\n{erro}")
+            self.executar_em_segundo_plano(tarefa, ao_concluir, ao_falhar)
+
+        def verificar(): # Recalcula os resumos em segundo plano (varre todas as vendas) e oferece a correção se houver divergência
+            btn_verificar.config(state='disabled', text="Verificando...")
+            def tarefa(): # Conexão própria, como na importação e na exportação
+                if self.conexao is None: return self.relatorios.verificar() # Modo servidor: o recálculo roda no servidor
+                conexao = conectar_banco()
+                try: return RelatorioRepository(conexao).verificar()
+                finally: conexao.close()
+            def ao_concluir(divergencias):
+                if not janela_relatorios.winfo_exists(): return
+                btn_verificar.config(state='normal', text="Verificar Consistência")
+                if not divergencias:
+                    messagebox.showinfo("Relatórios", "Os resumos de vendas estão consistentes.", parent=janela_relatorios); return
+                if messagebox.askyesno("Relatórios", f"{len(divergencias)} divergências entre os resumos e as vendas.\nDeseja reconstruir os resumos?", parent=janela_relatorios):
+                    reconstruir()
+            def ao_falhar(erro):
+                if janela_relatorios.winfo_exists(): btn_verificar.config(state='normal', text="Verificar Consistência")
+                messagebox.showerror("Erro", f"Não foi possível verificar os resumos:\n{erro}")
+            self.executar_em_segundo_plano(tarefa, ao_concluir, ao_falhar)
+
+        Button(janela_relatorios, text="Atualizar", bg="#a3d1f7", command=atualizar).place(x=420, y=11)
+        incluir_arquivo = BooleanVar(value=False) # Soma as vendas arquivadas (python -m livraria arquivar) às do banco principal
+        Checkbutton(janela_relatorios, text="Incluir arquivadas", variable=incluir_arquivo, command=atualizar, bg="#f0f7f4").place(x=490, y=13)
+        btn_verificar = Button(janela_relatorios, text="Verificar Consistência", bg="#d5c6f7", command=verificar); btn_verificar.place(relx=0.02, rely=0.92)
+        Button(janela_relatorios, text="Fechar", bg="#c0e2ff", command=janela_relatorios.destroy).place(relx=0.85, rely=0.92, relwidth=0.13)
+        atualizar()
+
+    def abrir_diagnostico(self, event=None): # Janela de diagnóstico (F12): contadores e histogramas de consultas SQL, ações e atraso do loop
+        janela_diagnostico = Toplevel(self.janela); janela_diagnostico.title("Diagnóstico"); janela_diagnostico.geometry("820x420")
+        janela_diagnostico.configure(bg="#f0f7f4"); janela_diagnostico.transient(self.janela)
+        if not diagnostico.ATIVO:
+            Label(janela_diagnostico, text="O diagnóstico está desligado.\nInicie o programa com a variável de ambiente LIVRARIA_DIAGNOSTICO=1\n"
+                  "(e, se quiser, LIVRARIA_CONSULTA_LENTA_MS com o limite das consultas lentas).", bg="#f0f7f4", justify="left").place(x=15, y=15)
+            return
+        lbl_contadores = Label(janela_diagnostico, text="", bg="#f0f7f4", anchor="w"); lbl_contadores.place(x=15, y=10)
+        colunas = ("Métrica", "Qtd.", "Média (ms)", "p95 (ms)", "Máx. (ms)")
+        tabela = ttk.Treeview(janela_diagnostico, columns=colunas, show="headings")
+        for coluna, largura in zip(colunas, (460, 60, 80, 80, 80)):
+            tabela.heading(coluna, text=coluna); tabela.column(coluna, width=largura, anchor='w' if coluna == "Métrica" else 'e')
+        barra = Scrollbar(janela_diagnostico, orient="vertical", command=tabela.yview); tabela.configure(yscrollcommand=barra.set)
+        tabela.place(relx=0.02, y=35, relwidth=0.93, relheight=0.75); barra.place(relx=0.95, y=35, relwidth=0.03, relheight=0.75)
+
+        def atualizar(): # As métricas mais lentas (pelo máximo) aparecem primeiro
+            resumo = diagnostico.METRICAS.resumo()
+            lbl_contadores.config(text=f"Desde {resumo['inicio']}  |  " + "  |  ".join(f"{nome}: {valor}" for nome, valor in resumo["contadores"].items())
+                                  + f"  |  Consultas lentas: acima de {diagnostico.LIMITE_CONSULTA_LENTA_MS:g} ms, em {diagnostico.CAMINHO_LOG_CONSULTAS_LENTAS}")
+            tabela.delete(*tabela.get_children())
+            for nome, histograma in sorted(resumo["histogramas"].items(), key=lambda item: -item[1]["max_ms"]):
+                tabela.insert("", END, values=(nome, histograma["quantidade"], f"{histograma['media_ms']:.2f}", f"{histograma['p95_ms']:g}", f"{histograma['max_ms']:.2f}"))
+
+        def salvar():
+            caminho_arquivo = filedialog.asksaveasfilename(parent=janela_diagnostico, defaultextension=".json", initialfile=diagnostico.CAMINHO_METRICAS,
+                                                          filetypes=[("Arquivos JSON", "*.json")], title="Salvar métricas como...")
+            if caminho_arquivo: diagnostico.salvar_metricas(caminho_arquivo)
+
+        def zerar(): diagnostico.METRICAS.zerar(); atualizar()
+
+        Button(janela_diagnostico, text="Atualizar", bg="#a3d1f7", command=atualizar).place(relx=0.02, rely=0.9)
+        Button(janela_diagnostico, text="Salvar Métricas...", bg="#b3f6a5", command=salvar).place(relx=0.14, rely=0.9)
+        Button(janela_diagnostico, text="Zerar", bg="#f6a5a5", command=zerar).place(relx=0.32, rely=0.9)
+        Button(janela_diagnostico, text="Fechar", bg="#c0e2ff", command=janela_diagnostico.destroy).place(relx=0.85, rely=0.9, relwidth=0.13)
+        atualizar()
+
+    @medir_acao
+    def importar_de_csv(self): # Importa clientes ou vendas de um CSV em segundo plano, com uma conexão própria
+        caminho_arquivo = filedialog.askopenfilename(filetypes=[("Arquivos CSV", "*.csv"), ("Todos os arquivos", "*.*")], title="Importar clientes ou vendas de...")
+        if not caminho_arquivo: return
+        self.btn_importar.config(state='disabled', text="Importando...")
+        def tarefa(): # Conexões SQLite não podem ser compartilhadas entre threads
+            conexao = conectar_banco()
+            try: return importar_csv(conexao, caminho_arquivo)
+            finally: conexao.close()
+        def ao_concluir(resumo): # A importação entra no registro de alterações como uma carga em lote: a lista é recarregada só se algo entrou
+            self.btn_importar.config(state='normal', text="Importar CSV"); self.aplicar_alteracoes()
+            messagebox.showinfo("Importação Concluída", formatar_resumo_importacao(resumo))
+        def ao_falhar(erro):
+            self.btn_importar.config(state='normal', text="Importar CSV")
+            messagebox.showerror("Erro de Importação", f"Nenhum registro foi importado.\n\n{erro}")
+        self.executar_em_segundo_plano(tarefa, ao_concluir, ao_falhar)
+
+    def atualizar_fontes(self):
+        font_config = ("Arial", self.font_size); font_bold = ("Arial", self.font_size, "bold")
+        for widget in self.widgets_para_zoom: widget.config(font=font_config)
+        self.style.configure("Treeview.Heading", font=font_bold)
+        self.style.configure("Treeview", font=font_config, rowheight=int(self.font_size * 2.5))
+        self.style.configure("TCombobox", font=font_config)
+
+    def aumentar_zoom(self, event=None):
+        if self.font_size < 18: self.font_size += 1; self.atualizar_fontes()
+    def diminuir_zoom(self, event=None):
+        if self.font_size > 8: self.font_size -= 1; self.atualizar_fontes()
+    def zoom_com_roda(self, event):
+        if event.delta > 0: self.aumentar_zoom()
+        else: self.diminuir_zoom()
+
+# ===================================================
+# 4. JANELA DE COMPRAS (REUTILIZÁVEL)
+# ===================================================
+def posicao_decrescente(chaves, chave): # Busca binária numa lista em ordem decrescente (o bisect só trata listas crescentes)
+    inicio, fim = 0, len(chaves)
+    while inicio < fim:
+        meio = (inicio + fim) // 2
+        if chaves[meio] > chave: inicio = meio + 1
+        else: fim = meio
+    return inicio
+
+class JanelaCompras: # Construída uma única vez: ao fechar ela é apenas escondida, e abrir() a associa a outro cliente
+    GENEROS = ["Romance", "LGBTQIAPN+", "Suspense/Terror", "Ficção Científica", "Fantasia", "Biografia", "História", "Outro"]
+
+    def __init__(self, app):
+        self.app = app; self.vendas = app.vendas
+        self.cliente_id = None
+        self.id_compra_selecionada = None # ID da compra em edição (None = nova compra)
+        # Estado da paginação das compras (chave (data_compra, id), em ordem decrescente, como na lista):
+        self.chaves_compras = []; self.chave_compra_por_id = {}; self.fim_lista_compras = True; self.pagina_compras_agendada = False
+        self.quantidade_compras = 0; self.total_compras = 0.0 # Resumo do cliente exibido no cabeçalho
+        self.incluir_arquivo = BooleanVar(value=False) # Mostra também as compras arquivadas (somente leitura)
+
+        self.janela = Toplevel(app.janela) # Toplevel cria uma nova janela acima da principal
+        self.janela.withdraw() # Fica escondida até abrir() associar um cliente
+        self.janela.geometry("800x550")
+        self.janela.configure(bg="#f0f7f4")
+        self.janela.transient(app.janela)
+        self.janela.protocol("WM_DELETE_WINDOW", self.fechar)
 
         # ========== FRAME DE CADASTRO ==========
-        frame_cad = Frame(janela_compra, bd=2, bg="#dbeadf", relief="groove")
+        frame_cad = Frame(self.janela, bd=2, bg="#dbeadf", relief="groove")
         frame_cad.place(relx=0.02, rely=0.02, relwidth=0.96, relheight=0.45)
 
         Label(frame_cad, text="Título do Livro:", bg="#dbeadf").place(x=10, y=20)
-        entry_titulo = Entry(frame_cad, width=50)
-        entry_titulo.place(x=120, y=20)
+        self.entry_titulo = Entry(frame_cad, width=50)
+        self.entry_titulo.place(x=120, y=20)
 
         Label(frame_cad, text="Autor:", bg="#dbeadf").place(x=10, y=60)
-        entry_autor = Entry(frame_cad, width=50)
-        entry_autor.place(x=120, y=60)
+        self.entry_autor = Entry(frame_cad, width=50)
+        self.entry_autor.place(x=120, y=60)
 
         Label(frame_cad, text="Gênero:", bg="#dbeadf").place(x=10, y=100)
-        combo_genero = ttk.Combobox(frame_cad, values=["Romance", "LGBTQIAPN+", "Suspense/Terror", "Ficção Científica", "Fantasia", "Biografia", "História", "Outro"])
-        combo_genero.place(x=120, y=100)
-        combo_genero.current(0)
+        self.combo_genero = ttk.Combobox(frame_cad, values=self.GENEROS)
+        self.combo_genero.place(x=120, y=100)
+        self.combo_genero.current(0)
 
         Label(frame_cad, text="Data da Compra:", bg="#dbeadf").place(x=10, y=140)
-        entry_data = Entry(frame_cad, width=15, fg='grey')
-        entry_data.place(x=120, y=140)
-        entry_data.insert(0, 'DD/MM/AAAA')
-
-        def on_data_focus_in(event, entry):
-            if entry.get() == 'DD/MM/AAAA':
-                entry.delete(0, 'end')
-                entry.config(fg='black')
-
-        def on_data_focus_out(event, entry):
-            if not entry.get():
-                entry.insert(0, 'DD/MM/AAAA')
-                entry.config(fg='grey')
-
-        entry_data.bind('<FocusIn>', lambda e: on_data_focus_in(e, entry_data))
-        entry_data.bind('<FocusOut>', lambda e: on_data_focus_out(e, entry_data))
+        self.entry_data = Entry(frame_cad, width=15, fg='grey')
+        self.entry_data.place(x=120, y=140)
+        self.entry_data.insert(0, 'DD/MM/AAAA')
+        self.entry_data.bind('<FocusIn>', self.on_data_focus_in)
+        self.entry_data.bind('<FocusOut>', self.on_data_focus_out)
 
         Label(frame_cad, text="Valor Total (R$):", bg="#dbeadf").place(x=280, y=140)
-        vcmd_valor = (janela_compra.register(self.validar_valor), '%P')
-        entry_valor = Entry(frame_cad, width=15, validate="key", validatecommand=vcmd_valor)
-        entry_valor.place(x=390, y=140)
-
-        # ========== FUNÇÕES INTERNAS ==========
-
-        def carregar_compras_do_cliente():
-            for i in lista_compras_tv.get_children():
-                lista_compras_tv.delete(i)
-            self.cursor.execute("SELECT id, livro_titulo, livro_autor, genero, date(data_compra), valor_total FROM vendas WHERE cliente_id = ? ORDER BY data_compra DESC", (cliente_id,))
-            for row in self.cursor.fetchall():
-                data_fmt = datetime.strptime(row[4], '%Y-%m-%d').strftime('%d/%m/%Y')
-                valor_fmt = f"{row[5]:.2f}".replace('.', ',')
-                lista_compras_tv.insert("", "end", values=(row[0], row[1], row[2], row[3], data_fmt, valor_fmt))
-
-        def limpar_campos():
-            nonlocal id_compra_selecionada 
-            id_compra_selecionada = None
-            entry_titulo.delete(0, END)
-            entry_autor.delete(0, END)
-            entry_valor.delete(0, END)
-            entry_data.delete(0, END)
-            on_data_focus_out(None, entry_data) 
-            combo_genero.current(0)
-            btn_registrar.config(text="Registrar Compra", bg="#a8d5ba")
-
-        def registrar_ou_atualizar():
-            nonlocal id_compra_selecionada 
-            titulo = entry_titulo.get().strip()
-            autor = entry_autor.get().strip()
-            genero = combo_genero.get()
-            data_str = entry_data.get().strip()
-            valor_str = entry_valor.get().strip().replace(',', '.')
-
-            if not all([titulo, autor, genero, data_str, valor_str]) or data_str == 'DD/MM/AAAA':
-                messagebox.showerror("Erro", "Preencha todos os campos da compra.", parent=janela_compra)
-                return
-
-            try:
-                data_obj = datetime.strptime(data_str, '%d/%m/%Y')
-                data_sql = data_obj.strftime('%Y-%m-%d')
-            except ValueError:
-                messagebox.showerror("Erro de Validação", "Formato de data inválido. Use DD/MM/AAAA.", parent=janela_compra)
-                return
-
-            try:
-                valor = float(valor_str)
-            except ValueError:
-                messagebox.showerror("Erro", "O valor total deve ser um número.", parent=janela_compra)
-                return
-
-            if id_compra_selecionada is None:
-                self.cursor.execute(
-                    "INSERT INTO vendas (cliente_id, livro_titulo, livro_autor, genero, data_compra, valor_total) VALUES (?, ?, ?, ?, ?, ?)",
-                    (cliente_id, titulo, autor, genero, data_sql, valor)
-                )
-                messagebox.showinfo("Sucesso", "Compra registrada!", parent=janela_compra)
-            else:
-                self.cursor.execute(
-                    "UPDATE vendas SET livro_titulo=?, livro_autor=?, genero=?, data_compra=?, valor_total=? WHERE id=?",
-                    (titulo, autor, genero, data_sql, valor, id_compra_selecionada)
-                )
-                messagebox.showinfo("Sucesso", "Compra atualizada!", parent=janela_compra)
-
-            self.conexao.commit()
-            limpar_campos()
-            carregar_compras_do_cliente()
-
-        def carregar_para_edicao(event):
-            nonlocal id_compra_selecionada 
-            selecionado = lista_compras_tv.selection()
-            if not selecionado:
-                return
-            item = lista_compras_tv.item(selecionado[0])['values']
-            id_compra_selecionada = item[0]
-            entry_titulo.delete(0, END)
-            entry_titulo.insert(0, item[1])
-            entry_autor.delete(0, END)
-            entry_autor.insert(0, item[2])
-            combo_genero.set(item[3])
-            on_data_focus_in(None, entry_data) 
-            entry_data.delete(0, END)
-            entry_data.insert(0, item[4])
-            entry_valor.delete(0, END)
-            entry_valor.insert(0, str(item[5]).replace('.',',')) 
-            btn_registrar.config(text="Atualizar Compra", bg="#a3d1f7")
-
-        def finalizar_cadastro():
-            if messagebox.askyesno("Finalizar", "Deseja finalizar o cadastro e fechar esta janela?", parent=janela_compra):
-                janela_compra.destroy()
+        vcmd_valor = (self.janela.register(app.validar_valor), '%P')
+        self.entry_valor = Entry(frame_cad, width=15, validate="key", validatecommand=vcmd_valor)
+        self.entry_valor.place(x=390, y=140)
 
         # ========== BOTÕES ==========
-        btn_registrar = Button(frame_cad, text="Registrar Compra", bg="#a8d5ba", command=registrar_ou_atualizar)
-        btn_registrar.place(x=10, y=180)
+        self.btn_registrar = Button(frame_cad, text="Registrar Compra", bg="#a8d5ba", command=self.registrar_ou_atualizar)
+        self.btn_registrar.place(x=10, y=180)
 
-        Button(frame_cad, text="Limpar/Cancelar Edição", bg="#f7c6a3", command=limpar_campos).place(x=150, y=180)
+        Button(frame_cad, text="Limpar/Cancelar Edição", bg="#f7c6a3", command=self.limpar_campos).place(x=150, y=180)
+
+        # Quantidade e total das compras do cliente, atualizados a cada compra registrada ou alterada (sem reconsultar o histórico)
+        self.lbl_resumo_compras = Label(frame_cad, text="", bg="#dbeadf", font=("Arial", 10, "bold")); self.lbl_resumo_compras.place(x=360, y=184)
+        Checkbutton(frame_cad, text="Mostrar compras arquivadas", variable=self.incluir_arquivo, command=self.recarregar, bg="#dbeadf").place(x=10, y=215)
 
         # ========== LISTA DE COMPRAS ==========
-        frame_lista = Frame(janela_compra, bd=2, bg="#e6f2f1", relief="groove") # Cria um frame (área) para exibir a lista de compras, com borda e cor de fundo
+        frame_lista = Frame(self.janela, bd=2, bg="#e6f2f1", relief="groove") # Cria um frame (área) para exibir a lista de compras, com borda e cor de fundo
         frame_lista.place(relx=0.02, rely=0.5, relwidth=0.96, relheight=0.40)
 
-        lista_compras_tv = ttk.Treeview(frame_lista, columns=("id", "titulo", "autor", "genero", "data", "valor"), show='headings') # Cria o widget Treeview para exibir as compras em formato de tabela
+        self.lista_compras_tv = ttk.Treeview(frame_lista, columns=("id", "titulo", "autor", "genero", "data", "valor"), show='headings') # Cria o widget Treeview para exibir as compras em formato de tabela
         for col, txt, w in zip(("id", "titulo", "autor", "genero", "data", "valor"),
                                ["ID", "Título", "Autor", "Gênero", "Data", "Valor (R$)"],
-                               [30, 250, 180, 100, 80, 80]): # Ajustei o último tamanho
-            lista_compras_tv.heading(col, text=txt)
-            lista_compras_tv.column(col, width=w, anchor="center" if col in ["id", "data", "valor"] else "w")
-        
-        # Adiciona a scrollbar à lista de compras
-        scrollbar_compras = Scrollbar(frame_lista, orient="vertical", command=lista_compras_tv.yview) # Cria uma barra de rolagem vertical e a vincula ao Treeview
-        lista_compras_tv.configure(yscrollcommand=scrollbar_compras.set)
-        
-        lista_compras_tv.place(relx=0.01, rely=0.01, relwidth=0.94, relheight=0.96)  # Posiciona a tabela e a scrollbar dentro do frame
-        scrollbar_compras.place(relx=0.95, rely=0.01, relwidth=0.04, relheight=0.96)
+                               [30, 250, 180, 100, 80, 80]):
+            self.lista_compras_tv.heading(col, text=txt)
+            self.lista_compras_tv.column(col, width=w, anchor="center" if col in ["id", "data", "valor"] else "w")
+
+        # Adiciona a scrollbar à lista de compras; a rolagem também antecipa a próxima página
+        self.scrollbar_compras = Scrollbar(frame_lista, orient="vertical", command=self.lista_compras_tv.yview)
+        self.lista_compras_tv.configure(yscrollcommand=self.ao_rolar_lista_compras)
+
+        self.lista_compras_tv.place(relx=0.01, rely=0.01, relwidth=0.94, relheight=0.96)  # Posiciona a tabela e a scrollbar dentro do frame
+        self.scrollbar_compras.place(relx=0.95, rely=0.01, relwidth=0.04, relheight=0.96)
 
         # Vincula o evento de duplo clique à função carregar_para_edicao
         # Isso permite editar um item da tabela ao dar dois cliques sobre ele
-        lista_compras_tv.bind("<Double-1>", carregar_para_edicao)
+        self.lista_compras_tv.bind("<Double-1>", self.carregar_para_edicao)
+        self.lista_compras_tv.tag_configure("arquivada", foreground="grey") # Compras do arquivo de vendas antigas
 
         # ========== BOTÃO FINALIZAR ==========
-        Button(janela_compra, text="Finalizar", bg="#c0e2ff", command=finalizar_cadastro).place(relx=0.85, rely=0.92, relwidth=0.13)
-
-        carregar_compras_do_cliente()
+        Button(self.janela, text="Finalizar", bg="#c0e2ff", command=self.finalizar_cadastro).place(relx=0.85, rely=0.92, relwidth=0.13)
+
+    @medir_acao
+    def abrir(self, cliente_id, cliente_nome): # Associa a janela ao cliente, carrega a primeira página de compras e a exibe
+        self.cliente_id = cliente_id
+        self.janela.title(f"Compras de {cliente_nome}")
+        self.quantidade_compras, self.total_compras = self.vendas.resumo_cliente(cliente_id, self.incluir_arquivo.get()); self.atualizar_resumo_compras()
+        self.limpar_campos()
+        self.carregar_compras_do_cliente()
+        self.janela.deiconify(); self.janela.lift()
+        self.janela.focus_force()
+        self.janela.grab_set()
+
+    def fechar(self): # Esconde a janela (sem destruir os widgets) e devolve o controle à janela principal
+        self.janela.grab_release()
+        self.janela.withdraw()
+
+    def finalizar_cadastro(self):
+        if messagebox.askyesno("Finalizar", "Deseja finalizar o cadastro e fechar esta janela?", parent=self.janela):
+            self.fechar()
+
+    def on_data_focus_in(self, event=None):
+        if self.entry_data.get() == 'DD/MM/AAAA':
+            self.entry_data.delete(0, 'end')
+            self.entry_data.config(fg='black')
+
+    def on_data_focus_out(self, event=None):
+        if not self.entry_data.get():
+            self.entry_data.insert(0, 'DD/MM/AAAA')
+            self.entry_data.config(fg='grey')
+
+    def carregar_compras_do_cliente(self): # Recarrega a lista desde o início, trazendo apenas a primeira página
+        self.lista_compras_tv.delete(*self.lista_compras_tv.get_children())
+        self.chaves_compras = []; self.chave_compra_por_id = {}; self.fim_lista_compras = False
+        self.carregar_proxima_pagina_compras()
+        self.lista_compras_tv.yview_moveto(0)
+
+    @medir_acao
+    def carregar_proxima_pagina_compras(self): # Busca a próxima página por paginação de chave (data_compra, id), usando o índice idx_vendas_cliente_data
+        self.pagina_compras_agendada = False
+        if self.fim_lista_compras: return
+        linhas = self.vendas.pagina_por_cliente(self.cliente_id, self.chaves_compras[-1] if self.chaves_compras else None, incluir_arquivo=self.incluir_arquivo.get())
+        for row in linhas: # Data e valor já vêm formatados do banco; com o arquivo, row[8] indica se a compra está arquivada
+            chave = (row[6], row[0]); self.chaves_compras.append(chave); self.chave_compra_por_id[row[0]] = chave
+            self.lista_compras_tv.insert("", "end", iid=str(row[0]), values=row[:6], tags=("arquivada",) if row[8:] and row[8] else ())
+        self.fim_lista_compras = len(linhas) < TAMANHO_PAGINA_VENDAS
+
+    def inserir_compra_na_lista(self, row): # Insere uma única compra na posição certa (mais recentes primeiro), se ela estiver dentro das páginas já carregadas
+        chave = (row[6], row[0]); posicao = posicao_decrescente(self.chaves_compras, chave)
+        if posicao == len(self.chaves_compras) and not self.fim_lista_compras: return # Pertence a uma página ainda não carregada
+        self.chaves_compras.insert(posicao, chave); self.chave_compra_por_id[row[0]] = chave
+        self.lista_compras_tv.insert("", posicao, iid=str(row[0]), values=row[:6])
+
+    def atualizar_compra_na_lista(self, row): # Atualiza a linha da compra editada; só a reposiciona se a data mudou
+        if self.chave_compra_por_id.get(row[0]) == (row[6], row[0]):
+            self.lista_compras_tv.item(str(row[0]), values=row[:6]); return
+        self.remover_compra_da_lista(row[0]); self.inserir_compra_na_lista(row)
+
+    def remover_compra_da_lista(self, venda_id): # Remove uma única compra da lista, se ela estiver carregada
+        chave = self.chave_compra_por_id.pop(venda_id, None)
+        if chave is None: return
+        del self.chaves_compras[posicao_decrescente(self.chaves_compras, chave)]
+        self.lista_compras_tv.delete(str(venda_id))
+
+    def aberta(self): # A janela está visível e associada a um cliente
+        return self.cliente_id is not None and self.janela.state() != "withdrawn"
+
+    @medir_acao
+    def aplicar_alteracoes(self, alteracoes): # Aplica as alterações (seq, tabela, operacao, registro_id, cliente_id) às compras do cliente exibido
+        if not self.aberta(): return # Escondida, nada a fazer: abrir() recarrega tudo
+        vendas = {} # Última operação de cada venda deste cliente; a venda que passou para outro cliente sai da lista
+        for _, tabela, operacao, registro_id, cliente_id in alteracoes:
+            if tabela == "clientes" and registro_id == self.cliente_id and operacao == "D":
+                self.fechar(); messagebox.showinfo("Compras", "Este cliente foi excluído em outro computador.", parent=self.app.janela); return
+            if tabela != "vendas": continue
+            if cliente_id == self.cliente_id: vendas[registro_id] = operacao
+            elif registro_id in vendas: vendas[registro_id] = "D"
+        if not vendas: return
+        for venda_id, operacao in vendas.items():
+            row = None if operacao == "D" else self.vendas.obter(venda_id)
+            if row: self.atualizar_compra_na_lista(row)
+            else:
+                self.remover_compra_da_lista(venda_id)
+                if venda_id == self.id_compra_selecionada: self.limpar_campos() # A compra em edição foi excluída
+        self.quantidade_compras, self.total_compras = self.vendas.resumo_cliente(self.cliente_id, self.incluir_arquivo.get()); self.atualizar_resumo_compras()
+
+    def recarregar(self): # Relê o resumo e a primeira página de compras do cliente exibido (quando houve alterações demais para aplicar uma a uma)
+        if not self.aberta(): return
+        self.quantidade_compras, self.total_compras = self.vendas.resumo_cliente(self.cliente_id, self.incluir_arquivo.get()); self.atualizar_resumo_compras()
+        self.carregar_compras_do_cliente()
+
+    def atualizar_resumo_compras(self):
+        total = f"{self.total_compras:.2f}".replace('.', ',')
+        self.lbl_resumo_compras.config(text=f"{self.quantidade_compras} compras | Total: R$ {total}")
+
+    def ao_rolar_lista_compras(self, primeiro, ultimo): # Atualiza a scrollbar e antecipa a próxima página quando a rolagem se aproxima do fim
+        self.scrollbar_compras.set(primeiro, ultimo)
+        if float(ultimo) >= LIMIAR_PRE_CARREGAMENTO and not self.fim_lista_compras and not self.pagina_compras_agendada:
+            self.pagina_compras_agendada = True; self.janela.after_idle(self.carregar_proxima_pagina_compras)
+
+    def limpar_campos(self):
+        self.id_compra_selecionada = None
+        self.entry_titulo.delete(0, END)
+        self.entry_autor.delete(0, END)
+        self.entry_valor.delete(0, END)
+        self.entry_data.delete(0, END)
+        self.on_data_focus_out()
+        self.combo_genero.current(0)
+        self.btn_registrar.config(text="Registrar Compra", bg="#a8d5ba")
+
+    @medir_acao
+    def registrar_ou_atualizar(self):
+        titulo = self.entry_titulo.get().strip()
+        autor = self.entry_autor.get().strip()
+        genero = self.combo_genero.get()
+        data_str = self.entry_data.get().strip()
+        valor_str = self.entry_valor.get().strip().replace(',', '.')
+
+        if not all([titulo, autor, genero, data_str, valor_str]) or data_str == 'DD/MM/AAAA':
+            messagebox.showerror("Erro", "Preencha todos os campos da compra.", parent=self.janela)
+            return
 
-    # --- 7. FUNÇÕES FINAIS (ZOOM, EXPORTAR, ETC) ---
-    def exportar_para_csv(self): 
-        # Abre uma janela para o usuário escolher onde salvar o arquivo:
-        caminho_arquivo = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("Arquivos CSV", "*.csv"), ("Todos os arquivos", "*.*")], title="Salvar clientes como...")
-        if not caminho_arquivo: return
-        try:  # Abre o arquivo escolhido no modo de escrita com codificação UTF-8:
-            with open(caminho_arquivo, "w", newline="", encoding="utf-8") as f:
-                writer = csv.writer(f)
-                writer.writerow(["ID", "Nome", "Email", "Telefone", "Cidade", "Estado"])
-                self.cursor.execute("SELECT id, nome, email, telefone, cidade, estado FROM clientes ORDER BY nome ASC")
-                for row in self.cursor.fetchall(): writer.writerow(row)
-            messagebox.showinfo("Sucesso", f"Clientes exportados com sucesso para:\n{caminho_arquivo}")
-        except Exception as e: messagebox.showerror("Erro de Exportação", f"Ocorreu um erro ao salvar o arquivo:\n{e}")
+        try:
+            data_obj = datetime.strptime(data_str, '%d/%m/%Y')
+            data_sql = data_obj.strftime('%Y-%m-%d')
+        except ValueError:
+            messagebox.showerror("Erro de Validação", "Formato de data inválido. Use DD/MM/AAAA.", parent=self.janela)
+            return
 
-    def atualizar_fontes(self):
-        font_config = ("Arial", self.font_size); font_bold = ("Arial", self.font_size, "bold")
-        for widget in self.widgets_para_zoom: widget.config(font=font_config)
-        self.style.configure("Treeview.Heading", font=font_bold)
-        self.style.configure("Treeview", font=font_config, rowheight=int(self.font_size * 2.5))
-        self.style.configure("TCombobox", font=font_config)
+        try:
+            valor = float(valor_str)
+        except ValueError:
+            messagebox.showerror("Erro", "O valor total deve ser um número.", parent=self.janela)
+            return
 
-    def aumentar_zoom(self, event=None):
-        if self.font_size < 18: self.font_size += 1; self.atualizar_fontes()
-    def diminuir_zoom(self, event=None):
-        if self.font_size > 8: self.font_size -= 1; self.atualizar_fontes()
-    def zoom_com_roda(self, event):
-        if event.delta > 0: self.aumentar_zoom()
-        else: self.diminuir_zoom()
+        # Atualiza só a linha afetada e o cabeçalho, em vez de recarregar todas as compras do cliente:
+        if self.id_compra_selecionada is None:
+            venda_id = self.vendas.inserir(self.cliente_id, titulo, autor, genero, data_sql, valor)
+            self.inserir_compra_na_lista(self.vendas.obter(venda_id))
+            self.quantidade_compras += 1; self.total_compras += valor
+            mensagem = "Compra registrada!"
+        else:
+            venda_id = self.id_compra_selecionada; anterior = self.vendas.obter(venda_id)
+            if anterior is None: # Excluída (ou arquivada) em outro computador depois de ser selecionada
+                messagebox.showwarning("Compras", "Esta compra foi excluída ou arquivada em outro computador. A lista será recarregada.", parent=self.janela)
+                self.limpar_campos(); self.recarregar(); return
+            valor_anterior = anterior[7]
+            self.vendas.atualizar(venda_id, titulo, autor, genero, data_sql, valor)
+            self.atualizar_compra_na_lista(self.vendas.obter(venda_id))
+            self.total_compras += valor - valor_anterior
+            mensagem = "Compra atualizada!"
+        self.atualizar_resumo_compras()
+        if self.lista_compras_tv.exists(str(venda_id)): self.lista_compras_tv.see(str(venda_id)) # Rola a lista até a compra gravada
+        messagebox.showinfo("Sucesso", mensagem, parent=self.janela)
+
+        self.limpar_campos()
+
+    @medir_acao
+    def carregar_para_edicao(self, event):
+        selecionado = self.lista_compras_tv.selection()
+        if not selecionado:
+            return
+        if "arquivada" in self.lista_compras_tv.item(selecionado[0], 'tags'): # Só as vendas do banco principal podem ser alteradas
+            messagebox.showinfo("Compras", "Compras arquivadas não podem ser alteradas.", parent=self.janela); return
+        item = self.lista_compras_tv.item(selecionado[0])['values']
+        self.id_compra_selecionada = item[0]
+        self.entry_titulo.delete(0, END)
+        self.entry_titulo.insert(0, item[1])
+        self.entry_autor.delete(0, END)
+        self.entry_autor.insert(0, item[2])
+        self.combo_genero.set(item[3])
+        self.on_data_focus_in()
+        self.entry_data.delete(0, END)
+        self.entry_data.insert(0, item[4])
+        self.entry_valor.delete(0, END)
+        self.entry_valor.insert(0, str(item[5]))
+        self.btn_registrar.config(text="Atualizar Compra", bg="#a3d1f7")
 
 # ===================================================
-# 4. INICIANDO A APLICAÇÃO
+# 5. INICIANDO A APLICAÇÃO
 # ===================================================
 if __name__ == "__main__":
+    if len(sys.argv) > 1: # Compatibilidade: 'python clientes.py importar ...' repassa para a linha de comando (python -m livraria)
+        from livraria import main
+        sys.exit(main(sys.argv[1:]))
     Aplicacao()
-
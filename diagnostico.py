@@ -0,0 +1,160 @@
+# ===================================================
+# DIAGNÓSTICO: TEMPOS DE CONSULTAS E DE AÇÕES DA INTERFACE
+# ===================================================
+# Instrumentação opcional, ligada pela variável de ambiente LIVRARIA_DIAGNOSTICO=1.
+# Desligada (padrão), nada é medido: conectar_banco() usa a conexão comum e o
+# decorador medir_acao devolve a própria função, sem custo nenhum.
+# Ligada, registra:
+#   - contadores e histogramas do tempo de cada consulta SQL (execute e leitura das linhas);
+#   - as consultas mais lentas que LIMITE_CONSULTA_LENTA_MS, com o plano (EXPLAIN QUERY PLAN), em CAMINHO_LOG_CONSULTAS_LENTAS;
+#   - o tempo de cada ação da interface decorada com @medir_acao e o atraso do loop do Tkinter.
+# As métricas podem ser salvas em JSON (salvar_metricas) ou vistas na janela de diagnóstico (F12).
+import bisect                     # Importa a busca binária, usada para achar a faixa do histograma
+import json                       # Importa o módulo json para salvar as métricas
+import os                         # Importa o módulo os para ler as variáveis de ambiente
+import re                         # Importa o módulo de expressões regulares, para normalizar o texto das consultas
+import sqlite3                    # Importa o módulo sqlite3 para criar a conexão e o cursor instrumentados
+import threading                  # Importa o módulo threading: as tarefas em segundo plano também registram métricas
+import time                       # Importa o módulo time para medir as durações
+from datetime import datetime     # Importa a classe datetime para registrar quando cada consulta lenta ocorreu
+from functools import wraps       # Importa wraps para que a função decorada mantenha nome e documentação
+
+ATIVO = os.environ.get("LIVRARIA_DIAGNOSTICO", "") not in ("", "0") # Liga a instrumentação
+LIMITE_CONSULTA_LENTA_MS = float(os.environ.get("LIVRARIA_CONSULTA_LENTA_MS", "100")) # Consultas acima deste tempo vão para o log
+CAMINHO_LOG_CONSULTAS_LENTAS = "diagnostico_consultas_lentas.log"
+CAMINHO_METRICAS = "diagnostico_metricas.json"
+FAIXAS_HISTOGRAMA_MS = [0.1, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000] # Limites superiores das faixas; a última faixa é "acima de 5 s"
+TAMANHO_MAXIMO_NOME = 120 # Consultas longas são agrupadas pelo início do texto
+
+class Histograma: # Quantidade, soma, máximo e contagem por faixa de duração (em milissegundos)
+    def __init__(self):
+        self.quantidade = 0; self.soma = 0.0; self.maximo = 0.0
+        self.faixas = [0] * (len(FAIXAS_HISTOGRAMA_MS) + 1)
+
+    def registrar(self, duracao_ms):
+        self.quantidade += 1; self.soma += duracao_ms; self.maximo = max(self.maximo, duracao_ms)
+        self.faixas[bisect.bisect_left(FAIXAS_HISTOGRAMA_MS, duracao_ms)] += 1
+
+    def percentil(self, fracao): # Aproximado: limite superior da faixa em que o percentil cai (o máximo, na última faixa)
+        alvo = fracao * self.quantidade; acumulado = 0
+        for posicao, contagem in enumerate(self.faixas):
+            acumulado += contagem
+            if contagem and acumulado >= alvo: return FAIXAS_HISTOGRAMA_MS[posicao] if posicao < len(FAIXAS_HISTOGRAMA_MS) else self.maximo
+        return 0.0
+
+    def como_dicionario(self):
+        return {"quantidade": self.quantidade, "media_ms": round(self.soma / self.quantidade, 3) if self.quantidade else 0.0,
+                "p50_ms": self.percentil(0.5), "p95_ms": self.percentil(0.95), "max_ms": round(self.maximo, 3),
+                "faixas_ms": {f"<={limite}": contagem for limite, contagem in zip(FAIXAS_HISTOGRAMA_MS + ["inf"], self.faixas) if contagem}}
+
+class Metricas: # Contadores e histogramas nomeados, protegidos por trava (a interface e as tarefas em segundo plano registram ao mesmo tempo)
+    def __init__(self):
+        self.trava = threading.Lock()
+        self.contadores = {}; self.histogramas = {}
+        self.inicio = time.time()
+
+    def contar(self, nome, quantidade=1):
+        with self.trava: self.contadores[nome] = self.contadores.get(nome, 0) + quantidade
+
+    def registrar(self, nome, duracao_ms):
+        with self.trava:
+            histograma = self.histogramas.get(nome)
+            if histograma is None: histograma = self.histogramas[nome] = Histograma()
+            histograma.registrar(duracao_ms)
+
+    def zerar(self):
+        with self.trava: self.contadores.clear(); self.histogramas.clear(); self.inicio = time.time()
+
+    def resumo(self): # Cópia das métricas em dicionários simples, pronta para JSON ou para a janela de diagnóstico
+        with self.trava:
+            return {"inicio": datetime.fromtimestamp(self.inicio).isoformat(timespec="seconds"), "contadores": dict(self.contadores),
+                    "histogramas": {nome: histograma.como_dicionario() for nome, histograma in sorted(self.histogramas.items())}}
+
+METRICAS = Metricas() # Registro único do processo
+
+def salvar_metricas(caminho=CAMINHO_METRICAS): # Grava o resumo das métricas em JSON e retorna o caminho
+    with open(caminho, "w", encoding="utf-8") as f: json.dump(METRICAS.resumo(), f, ensure_ascii=False, indent=2)
+    return caminho
+
+def nome_consulta(sql): # Agrupa execuções da mesma consulta: espaços normalizados e texto limitado
+    texto = re.sub(r"\s+", " ", sql).strip()
+    return texto if len(texto) <= TAMANHO_MAXIMO_NOME else texto[:TAMANHO_MAXIMO_NOME] + "..."
+
+def registrar_consulta_lenta(conexao, sql, parametros, duracao_ms): # Acrescenta a consulta ao log, com o plano de execução quando houver
+    plano = ""
+    if parametros is not None and sql.lstrip()[:6].upper() in ("SELECT", "UPDATE", "DELETE", "INSERT", "WITH"):
+        try: # Cursor comum (não instrumentado), para que o EXPLAIN não seja medido nem registrado de novo
+            linhas = sqlite3.Cursor(conexao).execute(f"EXPLAIN QUERY PLAN {sql}", parametros).fetchall()
+            plano = "".join(f"\n    {linha[3]}" for linha in linhas)
+        except sqlite3.Error as e: plano = f"\n    (plano indisponível: {e})"
+    METRICAS.contar("consultas lentas")
+    try:
+        with open(CAMINHO_LOG_CONSULTAS_LENTAS, "a", encoding="utf-8") as f:
+            f.write(f"{datetime.now().isoformat(timespec='seconds')} {duracao_ms:.1f} ms [{threading.current_thread().name}] {nome_consulta(sql)}{plano}\n")
+    except OSError: pass # O diagnóstico nunca pode derrubar a aplicação
+
+class CursorInstrumentado(sqlite3.Cursor): # Mede execute/executemany e a leitura das linhas (fetch*) de cada consulta
+    def medir(self, sql, parametros, metodo, *args):
+        self.sql_atual = sql; self.parametros_atuais = parametros; self.tempo_atual_ms = 0.0; self.lenta_registrada = False
+        inicio = time.perf_counter()
+        try: return metodo(*args)
+        finally: self.acumular(time.perf_counter() - inicio, execucao=True)
+
+    def acumular(self, duracao, execucao=False): # Soma o tempo à execução atual; a consulta é registrada como lenta uma única vez
+        sql = getattr(self, "sql_atual", None)
+        if sql is None: return
+        duracao_ms = duracao * 1000; self.tempo_atual_ms += duracao_ms
+        # O execute e a leitura das linhas ficam em histogramas separados: cada fetch é uma chamada à parte
+        METRICAS.registrar(f"{'sql' if execucao else 'leitura'}: {nome_consulta(sql)}", duracao_ms)
+        if execucao: METRICAS.contar("consultas executadas")
+        if self.tempo_atual_ms >= LIMITE_CONSULTA_LENTA_MS and not self.lenta_registrada:
+            self.lenta_registrada = True
+            registrar_consulta_lenta(self.connection, sql, self.parametros_atuais, self.tempo_atual_ms)
+
+    def execute(self, sql, parametros=()):
+        return self.medir(sql, parametros, super().execute, sql, parametros)
+
+    def executemany(self, sql, sequencia):
+        return self.medir(sql, None, super().executemany, sql, sequencia) # Sem plano: não há um único conjunto de parâmetros
+
+    def executescript(self, script):
+        return self.medir(script, None, super().executescript, script)
+
+    def lendo(metodo): # Cria a versão medida de um método de leitura (fetchone, fetchmany, fetchall)
+        def medido(self, *args):
+            inicio = time.perf_counter()
+            try: return metodo(self, *args)
+            finally: self.acumular(time.perf_counter() - inicio)
+        return medido
+    fetchone = lendo(sqlite3.Cursor.fetchone)
+    fetchmany = lendo(sqlite3.Cursor.fetchmany)
+    fetchall = lendo(sqlite3.Cursor.fetchall)
+    del lendo
+    # Iterar o cursor (for linha in cursor) lê as linhas sem passar pelos fetch*; o tempo da iteração não é medido
+
+class ConexaoInstrumentada(sqlite3.Connection): # Conexão cujos cursores (inclusive os atalhos execute* da conexão) são instrumentados
+    def cursor(self, factory=CursorInstrumentado):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, sequencia):
+        return self.cursor().executemany(sql, sequencia)
+
+    def executescript(self, script):
+        return self.cursor().executescript(script)
+
+def fabrica_conexao(): # Classe passada a sqlite3.connect(factory=...) por conectar_banco()
+    return ConexaoInstrumentada if ATIVO else sqlite3.Connection
+
+def medir_acao(funcao, prefixo="acao"): # Decorador: registra a duração de cada chamada como '<prefixo>: <nome>' (sem efeito com o diagnóstico desligado)
+    if not ATIVO: return funcao
+    nome = f"{prefixo}: {funcao.__qualname__}"
+    @wraps(funcao)
+    def medida(*args, **kwargs):
+        inicio = time.perf_counter()
+        try: return funcao(*args, **kwargs)
+        finally:
+            METRICAS.registrar(nome, (time.perf_counter() - inicio) * 1000)
+    return medida
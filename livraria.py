@@ -0,0 +1,154 @@
+# ===================================================
+# LINHA DE COMANDO (SEM INTERFACE GRÁFICA)
+# ===================================================
+# Uso: python -m livraria <comando> [opções]   (veja python -m livraria --help)
+# Não importa o tkinter nem o requests: funciona em servidores e tarefas agendadas, sem tela.
+import argparse                   # Importa o módulo argparse para interpretar os comandos da linha de comando
+import os                         # Importa o módulo os para ler o token do servidor da variável de ambiente e o tamanho do banco
+import sqlite3                    # Importa o módulo sqlite3 para tratar erros do banco
+import sys                        # Importa o módulo sys para escrever erros e devolver o código de saída
+import time                       # Importa o módulo time para medir a duração dos comandos
+
+import diagnostico
+from banco import CAMINHO_BANCO, conectar_banco, compactar_banco, caminho_arquivo_vendas
+from repositorio import (ClienteRepository, VendaRepository, RelatorioRepository, CONSULTAS_EXPORTACAO, TAMANHO_LOTE_IMPORTACAO, MESES_VENDAS_ATIVAS,
+                         importar_csv, formatar_resumo_importacao, exportar_dados, arquivar_vendas, data_corte_arquivo)
+
+def imprimir_clientes(linhas): # Imprime clientes como colunas separadas por tabulação
+    for cliente_id, nome, email, telefone, cidade, estado in linhas:
+        print(f"{cliente_id}\t{nome}\t{email}\t{telefone}\t{cidade}\t{estado}")
+
+def comando_listar(conexao, args): # Lista os clientes em ordem de nome, página por página (sem carregar tudo na memória)
+    clientes = ClienteRepository(conexao); apos = None; restantes = args.limite
+    while restantes is None or restantes > 0:
+        pagina = clientes.pagina(args.busca, apos, limite=min(restantes or 1000, 1000))
+        if not pagina: break
+        imprimir_clientes(pagina)
+        apos = (pagina[-1][1], pagina[-1][0])
+        if restantes is not None: restantes -= len(pagina)
+
+def comando_buscar(conexao, args): # Atalho para 'listar --busca'
+    args.busca = " ".join(args.termo)
+    comando_listar(conexao, args)
+
+def comando_importar(conexao, args):
+    print(formatar_resumo_importacao(importar_csv(conexao, args.arquivo, args.tabela, args.lote)))
+
+def comando_exportar(conexao, args):
+    total = exportar_dados(conexao, args.arquivo, args.conteudo, args.formato, args.gzip)
+    print(f"{total} registros exportados para {args.arquivo}")
+
+def formatar_moeda(valor): # 1234.5 -> 'R$ 1.234,50'
+    return "R$ " + f"{valor:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
+
+def comando_relatorio(conexao, args): # Totais gerais ou um dos relatórios de vendas (lidos das tabelas de resumo)
+    if args.tipo == "geral":
+        clientes, vendas, faturamento = VendaRepository(conexao).resumo(args.arquivo)
+        print(f"Clientes: {clientes}\nVendas: {vendas}\nFaturamento: {formatar_moeda(faturamento)}"); return
+    relatorios = RelatorioRepository(conexao)
+    if args.tipo == "clientes":
+        for cliente_id, nome, quantidade, total in relatorios.melhores_clientes(args.limite or 10, args.arquivo):
+            print(f"{cliente_id}\t{nome}\t{quantidade}\t{formatar_moeda(total)}")
+        return
+    if args.tipo == "mes": linhas = relatorios.por_mes(args.inicio, args.fim, args.arquivo)
+    else: linhas = (relatorios.por_genero if args.tipo == "genero" else relatorios.por_estado)(args.inicio, args.fim, args.limite or -1, args.arquivo)
+    for grupo, quantidade, total in linhas: print(f"{grupo}\t{quantidade}\t{formatar_moeda(total)}")
+
+def comando_verificar_resumos(conexao, args): # Compara os resumos de vendas com um recálculo completo; código de saída 1 se houver divergência (e não for corrigida)
+    relatorios = RelatorioRepository(conexao)
+    divergencias = relatorios.verificar()
+    for tabela, tipo, linha in divergencias[:50]: print(f"{tabela}\t{tipo}\t{linha}")
+    if not divergencias:
+        print("Resumos de vendas consistentes."); return 0
+    print(f"{len(divergencias)} divergências encontradas.")
+    if not args.corrigir: return 1
+    relatorios.reconstruir(); print("Resumos reconstruídos.")
+    return 0
+
+def comando_arquivar(conexao, args): # Move as vendas antigas para o arquivo e devolve ao sistema o espaço que elas ocupavam
+    antes_de = args.antes_de or data_corte_arquivo(args.meses)
+    tamanho = os.path.getsize(args.banco)
+    movidas = arquivar_vendas(conexao, antes_de)
+    print(f"{movidas} vendas anteriores a {antes_de} arquivadas em {caminho_arquivo_vendas(conexao)}.")
+    try: compactar_banco(conexao) # Na primeira vez, também converte o banco para auto_vacuum = INCREMENTAL (VACUUM completo)
+    except sqlite3.OperationalError as e: # Outro programa usando o banco: as vendas já foram arquivadas, só o espaço fica para depois
+        print(f"O banco não pôde ser compactado agora ({e}). Repita o comando com os outros programas fechados.", file=sys.stderr); return 0
+    print(f"Banco principal: {tamanho / 2**20:.1f} MiB -> {os.path.getsize(args.banco) / 2**20:.1f} MiB")
+    return 0
+
+def comando_servidor(conexao, args): # Atende os caixas por HTTP/JSON até Ctrl+C (veja servidor.py)
+    from servidor import ServidorLivraria # Importado só aqui: os outros comandos não precisam do http.server
+    conexao.close() # O servidor abre as próprias conexões (pool); esta só aplicou as migrações
+    servidor = ServidorLivraria((args.host, args.porta), args.banco, args.conexoes, args.token, args.verboso)
+    print(f"Servidor da livraria em http://{args.host}:{args.porta} ({args.conexoes} conexões com {args.banco}). Ctrl+C encerra.")
+    try: servidor.serve_forever()
+    except KeyboardInterrupt: print("Encerrando...")
+    finally: servidor.server_close()
+    return 0
+
+def criar_parser():
+    parser = argparse.ArgumentParser(prog="python -m livraria", description="Cadastro de Clientes e Vendas: Livraria (linha de comando)")
+    parser.add_argument("--banco", default=CAMINHO_BANCO, help="arquivo do banco de dados")
+    parser.add_argument("--tempo", action="store_true", help="mostra a duração do comando")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+    listar = subcomandos.add_parser("listar", help="lista os clientes em ordem de nome")
+    listar.add_argument("--busca", default="", help="filtra por nome, e-mail, telefone, cidade ou UF")
+    listar.add_argument("--limite", type=int, help="número máximo de clientes")
+    listar.set_defaults(funcao=comando_listar)
+    buscar = subcomandos.add_parser("buscar", help="busca clientes por nome, e-mail, telefone, cidade ou UF")
+    buscar.add_argument("termo", nargs="+")
+    buscar.add_argument("--limite", type=int, default=50, help="número máximo de clientes")
+    buscar.set_defaults(funcao=comando_buscar)
+    importar = subcomandos.add_parser("importar", help="importa clientes ou vendas de um arquivo CSV")
+    importar.add_argument("arquivo", help="arquivo CSV com cabeçalho")
+    importar.add_argument("--tabela", choices=("clientes", "vendas"), help="tabela de destino (padrão: detectada pelo cabeçalho)")
+    importar.add_argument("--lote", type=int, default=TAMANHO_LOTE_IMPORTACAO, help="linhas por lote de inserção")
+    importar.set_defaults(funcao=comando_importar)
+    exportar = subcomandos.add_parser("exportar", help="exporta clientes e/ou vendas para CSV ou JSON Lines")
+    exportar.add_argument("arquivo", help="arquivo de destino")
+    exportar.add_argument("--conteudo", choices=tuple(CONSULTAS_EXPORTACAO), default="clientes", help="dados exportados")
+    exportar.add_argument("--formato", choices=("csv", "jsonl"), default="csv", help="formato do arquivo")
+    exportar.add_argument("--gzip", action="store_true", help="compacta o arquivo com gzip")
+    exportar.set_defaults(funcao=comando_exportar)
+    relatorio = subcomandos.add_parser("relatorio", help="mostra os totais de clientes e vendas ou um relatório de vendas")
+    relatorio.add_argument("--tipo", choices=("geral", "mes", "genero", "uf", "clientes"), default="geral", help="relatório exibido")
+    relatorio.add_argument("--inicio", help="primeiro dia do período (AAAA-MM-DD)")
+    relatorio.add_argument("--fim", help="último dia do período (AAAA-MM-DD)")
+    relatorio.add_argument("--limite", type=int, help="número máximo de linhas")
+    relatorio.add_argument("--arquivo", action="store_true", help="inclui as vendas arquivadas")
+    relatorio.set_defaults(funcao=comando_relatorio)
+    verificar = subcomandos.add_parser("verificar-resumos", help="confere os resumos de vendas com um recálculo completo")
+    verificar.add_argument("--corrigir", action="store_true", help="reconstrói os resumos se houver divergência")
+    verificar.set_defaults(funcao=comando_verificar_resumos)
+    arquivar = subcomandos.add_parser("arquivar", help="move as vendas antigas para o arquivo de vendas e compacta o banco")
+    corte = arquivar.add_mutually_exclusive_group()
+    corte.add_argument("--antes-de", help="arquiva as vendas anteriores a esta data (AAAA-MM-DD)")
+    corte.add_argument("--meses", type=int, default=MESES_VENDAS_ATIVAS, help=f"mantém no banco os últimos N meses (padrão: {MESES_VENDAS_ATIVAS})")
+    arquivar.set_defaults(funcao=comando_arquivar)
+    servidor = subcomandos.add_parser("servidor", help="atende os caixas por HTTP/JSON (configure LIVRARIA_SERVIDOR nos caixas)")
+    servidor.add_argument("--host", default="127.0.0.1", help="endereço de escuta (0.0.0.0 aceita outras máquinas da rede)")
+    servidor.add_argument("--porta", type=int, default=8765, help="porta TCP")
+    servidor.add_argument("--conexoes", type=int, default=8, help="conexões do pool com o banco")
+    servidor.add_argument("--token", default=os.environ.get("LIVRARIA_TOKEN_SERVIDOR"), help="token exigido no cabeçalho X-Livraria-Token (padrão: LIVRARIA_TOKEN_SERVIDOR)")
+    servidor.add_argument("--verboso", action="store_true", help="registra cada requisição")
+    servidor.set_defaults(funcao=comando_servidor)
+    return parser
+
+def main(argumentos=None): # Executa um comando e devolve o código de saída (0 = sucesso)
+    args = criar_parser().parse_args(argumentos)
+    inicio = time.perf_counter()
+    try:
+        conexao = conectar_banco(args.banco)
+        try: codigo = args.funcao(conexao, args)
+        finally: conexao.close()
+    except BrokenPipeError: # Saída redirecionada para 'head', por exemplo (antes do OSError, do qual é subclasse)
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno()) # Como recomenda a documentação do Python: sem isso, o descarregamento final da saída fechada lança outro erro
+        return 0
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"Erro: {e}", file=sys.stderr); return 1
+    if args.tempo: print(f"Tempo: {time.perf_counter() - inicio:.3f} s", file=sys.stderr)
+    if diagnostico.ATIVO: print(f"Métricas de diagnóstico salvas em {diagnostico.salvar_metricas()}", file=sys.stderr)
+    return codigo or 0
+
+if __name__ == "__main__":
+    sys.exit(main())
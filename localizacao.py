@@ -0,0 +1,153 @@
+# ===================================================
+# LOCALIDADES: ESTADOS E CIDADES DO IBGE
+# ===================================================
+# Busca (com cache local) os estados e cidades usados no formulário de clientes
+# e monta o índice usado pelo autocompletar do campo de cidade (IndiceCidades).
+# A biblioteca requests só é importada quando é preciso acessar a rede, e o
+# tkinter só quando é preciso exibir uma mensagem de erro.
+import bisect                     # Importa a busca binária, usada no índice de prefixos das cidades
+import difflib                    # Importa o difflib para as sugestões aproximadas (erros de digitação)
+import json                       # Importa o módulo json para ler e gravar o cache local
+import os                         # Importa o módulo os para substituir o arquivo de cache de forma atômica
+import time                       # Importa o módulo time para medir tempos e controlar a validade do cache
+import unicodedata                # Importa o unicodedata para comparar nomes sem acentos
+from concurrent.futures import ThreadPoolExecutor # Importa o conjunto de threads usado para buscar as cidades em paralelo
+
+CAMINHO_CACHE_LOCALIZACAO = "localidades_cache.json" # Cache local dos estados e cidades, salvo ao lado do banco
+VERSAO_CACHE_LOCALIZACAO = 1 # Versão do formato do cache; ao mudar o formato, caches antigos são descartados
+VALIDADE_CACHE_LOCALIZACAO = 30 * 24 * 60 * 60 # Tempo (em segundos) que o cache é considerado atual: 30 dias
+URL_IBGE = "https://servicodados.ibge.gov.br/api/v1/localidades" # Endereço base da API de localidades do IBGE
+MAX_CONEXOES_IBGE = 8 # Número máximo de requisições simultâneas (e de conexões mantidas no pool) para a API do IBGE
+TENTATIVAS_IBGE = 3 # Número de novas tentativas para cada requisição que falhar
+LIMITE_SUGESTOES_CIDADE = 12 # Cidades exibidas no combo_cidade enquanto o usuário digita
+SEMELHANCA_MINIMA_CIDADE = 0.75 # Semelhança mínima (difflib, de 0 a 1) das sugestões aproximadas, usadas quando nenhum nome começa com o texto
+DADOS_LOCALIZACAO_MINIMOS = {"SP": ["São Paulo", "Campinas", "Guarulhos"], "RJ": ["Rio de Janeiro", "Niterói", "Duque de Caxias"], "MG": ["Belo Horizonte", "Uberlândia"], "AL": ["Maceió", "Arapiraca"]} # Último recurso quando não há rede nem cache
+
+def ler_cache_localizacao(caminho=CAMINHO_CACHE_LOCALIZACAO): # Lê o cache de localidades; retorna (dados, expirado) ou (None, True) se não houver cache válido
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None, True
+    if not isinstance(cache, dict) or cache.get("versao") != VERSAO_CACHE_LOCALIZACAO or not cache.get("dados"):
+        return None, True # Cache de outra versão ou corrompido: é ignorado
+    expirado = time.time() - cache.get("atualizado_em", 0) > VALIDADE_CACHE_LOCALIZACAO
+    return cache["dados"], expirado
+
+def salvar_cache_localizacao(dados, caminho=CAMINHO_CACHE_LOCALIZACAO, completo=True): # Grava o cache de localidades de forma atômica (arquivo temporário + troca)
+    cache = {"versao": VERSAO_CACHE_LOCALIZACAO, "atualizado_em": time.time() if completo else 0, "dados": dados} # Dados incompletos já nascem expirados
+    temporario = caminho + ".tmp"
+    try:
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(temporario, caminho)
+    except OSError as e: # Falha ao gravar o cache não impede o uso da aplicação
+        print(f"Não foi possível salvar o cache de localidades: {e}")
+
+def criar_sessao_ibge(tamanho_pool=MAX_CONEXOES_IBGE, tentativas=TENTATIVAS_IBGE): # Cria uma sessão HTTP com pool de conexões reaproveitáveis e novas tentativas com espera exponencial
+    import requests
+    from requests.adapters import HTTPAdapter # Adaptador HTTP que controla o pool de conexões da sessão
+    from urllib3.util.retry import Retry      # Política de novas tentativas (com espera exponencial) usada pelo adaptador
+    sessao = requests.Session()
+    retry = Retry(total=tentativas, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504), allowed_methods=("GET",)) # Espera 0,5 s, 1 s, 2 s... entre as tentativas
+    adaptador = HTTPAdapter(pool_connections=tamanho_pool, pool_maxsize=tamanho_pool, max_retries=retry)
+    sessao.mount("https://", adaptador); sessao.mount("http://", adaptador)
+    return sessao
+
+def buscar_municipios(sessao, uf, url_base=URL_IBGE): # Busca as cidades de um estado e retorna a lista de nomes ordenada
+    response_municipios = sessao.get(f"{url_base}/estados/{uf}/municipios", timeout=10)
+    response_municipios.raise_for_status()
+    return sorted([m['nome'] for m in response_municipios.json()])
+
+def buscar_estados_e_cidades(forcar_atualizacao=False, url_base=URL_IBGE, caminho_cache=CAMINHO_CACHE_LOCALIZACAO, paralelo=True, max_conexoes=MAX_CONEXOES_IBGE, avisar_erro=True): # Obtém os estados e cidades do cache local ou, se necessário, da API pública do IBGE.
+    inicio = time.perf_counter()
+    dados_cache, expirado = ler_cache_localizacao(caminho_cache)
+    if dados_cache and not expirado and not forcar_atualizacao: # Cache atual: nenhuma requisição de rede é feita
+        print(f"Dados de localização carregados do cache em {(time.perf_counter() - inicio) * 1000:.1f} ms.")
+        return dados_cache
+    print("Buscando dados de estados e cidades... Isso pode levar um momento.")
+    import requests # Importado só aqui: com o cache atual, a aplicação abre sem carregar a biblioteca de rede
+    try:
+        with criar_sessao_ibge(max_conexoes) as sessao: # Uma única sessão reaproveita as conexões TCP/TLS entre as requisições
+            response_estados = sessao.get(f"{url_base}/estados?orderBy=nome", timeout=10)  # Obtém todos os estados do Brasil, ordenados por nome
+            response_estados.raise_for_status() # Lança exceção se houver erro na resposta
+            ufs = [estado['sigla'] for estado in response_estados.json()]
+            dados_completos = {}  # Dicionário para armazenar os estados e suas cidades
+            falhas = [] # Estados cujas cidades não puderam ser obtidas
+            # As cidades de cada estado são buscadas em paralelo, em um conjunto limitado de threads:
+            with ThreadPoolExecutor(max_workers=max_conexoes if paralelo else 1) as executor:
+                futuros = {uf: executor.submit(buscar_municipios, sessao, uf, url_base) for uf in ufs}
+                for uf in ufs:
+                    try: dados_completos[uf] = futuros[uf].result()
+                    except (requests.exceptions.RequestException, ValueError) as e: # Falha em um estado não descarta os demais
+                        falhas.append(uf); print(f"Falha ao buscar as cidades de {uf}: {e}")
+                        dados_completos[uf] = (dados_cache or {}).get(uf) or DADOS_LOCALIZACAO_MINIMOS.get(uf, [])
+        # Com falhas parciais o cache é salvo como expirado, para que a próxima abertura tente completá-lo:
+        salvar_cache_localizacao(dados_completos, caminho_cache, completo=not falhas)
+        print(f"Dados de localização carregados com sucesso em {time.perf_counter() - inicio:.1f} s!" + (f" Estados com falha: {', '.join(falhas)}." if falhas else ""))
+        return dados_completos
+    except (requests.exceptions.RequestException, ValueError) as e: # Em caso de falha de rede ou API, usa o cache (mesmo expirado) ou, em último caso, os dados mínimos locais
+        if dados_cache:
+            print(f"Não foi possível atualizar os dados de localização; usando o cache existente. Erro: {e}")
+            return dados_cache
+        print(f"Não foi possível buscar a lista de cidades e estados; usando dados locais mínimos. Erro: {e}")
+        if avisar_erro: # Fora da thread principal do Tkinter a mensagem fica a cargo de quem chamou (avisar_erro=False)
+            from tkinter import messagebox
+            messagebox.showerror("Erro de Rede", f"Não foi possível buscar a lista de cidades e estados.\nVerifique sua conexão com a internet.\nUsando dados locais mínimos.\n\nErro: {e}")
+        return DADOS_LOCALIZACAO_MINIMOS
+
+# --- Índice de cidades para o autocompletar ---
+def normalizar_nome(texto): # "São João d'Aliança" -> 'sao joao dalianca': sem acentos, minúsculas, hífens viram espaço e apóstrofos somem
+    sem_acentos = "".join(c for c in unicodedata.normalize("NFKD", texto) if not unicodedata.combining(c))
+    return " ".join(sem_acentos.casefold().replace("-", " ").replace("'", "").replace("\u2019", "").split())
+
+def indexar_cidades(cidades): # Recebe (chave normalizada, cidade, UF); retorna duas listas ordenadas: os nomes completos e as palavras internas
+    nomes, palavras = [], []
+    for chave, cidade, uf in cidades:
+        nomes.append((chave, cidade, uf))
+        partes = chave.split(" ")
+        for i in range(1, len(partes)): # 'paulo' também encontra 'São Paulo'; 'de', 'do', 'da'... não são indexados sozinhos
+            if len(partes[i]) > 2: palavras.append((" ".join(partes[i:]), cidade, uf))
+    nomes.sort(); palavras.sort()
+    return ([e[0] for e in nomes], nomes), ([e[0] for e in palavras], palavras)
+
+def prefixados(indice, prefixo, limite, vistas): # Entradas cujas chaves começam com o prefixo, a partir da posição achada por busca binária
+    chaves, entradas = indice; encontradas = []
+    posicao = bisect.bisect_left(chaves, prefixo)
+    while posicao < len(chaves) and len(encontradas) < limite and chaves[posicao].startswith(prefixo):
+        cidade, uf = entradas[posicao][1:]
+        if (cidade, uf) not in vistas: vistas.add((cidade, uf)); encontradas.append((cidade, uf))
+        posicao += 1
+    return encontradas
+
+class IndiceCidades: # Busca de cidades por prefixo, sem diferenciar acentos e maiúsculas; montado uma vez a cada carregamento das localidades
+    def __init__(self, dados):
+        normalizadas = [(normalizar_nome(cidade), cidade, uf) for uf, cidades in dados.items() for cidade in cidades]
+        por_uf = {}
+        for entrada in normalizadas: por_uf.setdefault(entrada[2], []).append(entrada)
+        self.por_uf = {uf: indexar_cidades(entradas) for uf, entradas in por_uf.items()}
+        self.todas = indexar_cidades(normalizadas)
+        self.oficiais = {(chave, uf): cidade for chave, cidade, uf in normalizadas}
+        self.inicios = {} # Cache das sugestões aproximadas: (UF, tamanho do texto) -> {início do nome: [(cidade, UF)]}
+
+    def buscar(self, texto, uf=None, limite=LIMITE_SUGESTOES_CIDADE, aproximada=True): # Até 'limite' pares (cidade, UF); uf=None busca no país inteiro
+        nomes, palavras = self.por_uf.get(uf, ((), ())) if uf else self.todas
+        if not nomes: return []
+        prefixo = normalizar_nome(texto); vistas = set()
+        # Primeiro os nomes que começam com o texto, depois os que têm uma palavra que começa com ele
+        encontradas = prefixados(nomes, prefixo, limite, vistas)
+        if len(encontradas) < limite: encontradas += prefixados(palavras, prefixo, limite - len(encontradas), vistas)
+        if encontradas or not aproximada or len(prefixo) < 3: return encontradas
+        # Nenhum nome começa com o texto (erro de digitação): compara o texto com o início de cada nome, do mesmo tamanho.
+        # Só entram os nomes com a mesma primeira letra, o que deixa o difflib umas dez vezes mais rápido.
+        inicios = self.inicios.get((uf, len(prefixo)))
+        if inicios is None:
+            inicios = self.inicios[(uf, len(prefixo))] = {}
+            for chave, cidade, uf_cidade in nomes[1]: inicios.setdefault(chave[:len(prefixo)], []).append((cidade, uf_cidade))
+        candidatos = [inicio for inicio in inicios if inicio[0] == prefixo[0]]
+        for inicio in difflib.get_close_matches(prefixo, candidatos, n=limite, cutoff=SEMELHANCA_MINIMA_CIDADE):
+            encontradas += inicios[inicio]
+        return encontradas[:limite]
+
+    def nome_oficial(self, texto, uf): # Grafia oficial da cidade digitada ('sao paulo' -> 'São Paulo'), ou None se ela não existir no estado
+        return self.oficiais.get((normalizar_nome(texto), uf))
@@ -0,0 +1,19 @@
+# ===================================================
+# PROTOCOLO DO MODO SERVIDOR
+# ===================================================
+# Métodos que os caixas podem chamar no servidor, compartilhados por servidor.py
+# (que só aceita estes) e cliente_remoto.py (que só repete as leituras quando a
+# conexão cai). Fica num módulo à parte, sem dependências, para que a janela
+# local não carregue o http.server nem o código do servidor.
+
+# Métodos expostos de cada repositório: True = escrita (serializada pela trava do servidor), False = leitura
+METODOS_REMOTOS = {
+    "clientes": {"pagina": False, "atende_busca": False, "obter": False, "contar": False,
+                 "inserir": True, "atualizar": True, "excluir": True, "excluir_todos": True},
+    "vendas": {"pagina_por_cliente": False, "obter": False, "resumo_cliente": False, "resumo": False,
+               "inserir": True, "atualizar": True},
+    "relatorios": {"por_mes": False, "por_genero": False, "por_estado": False, "melhores_clientes": False,
+                   "verificar": False, "reconstruir": True},
+    # Os caixas consultam o registro de alterações a cada segundo (o PRAGMA data_version é por conexão e não serve através do pool)
+    "alteracoes": {"ultima": False, "desde": False},
+}
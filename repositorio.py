@@ -0,0 +1,475 @@
+# ===================================================
+# CAMADA DE DADOS: REPOSITÓRIOS, IMPORTAÇÃO E EXPORTAÇÃO
+# ===================================================
+# Todo o SQL de clientes e vendas fica aqui, sem nenhuma dependência de interface
+# gráfica: o mesmo código é usado pela janela Tkinter, pela linha de comando
+# (python -m livraria) e pelos benchmarks.
+import csv                        # Importa o módulo para manipular arquivos CSV
+import gzip                       # Importa o módulo gzip para gerar arquivos exportados compactados
+import json                       # Importa o módulo json para gerar arquivos JSON Lines
+import math                       # Importa o módulo math para rejeitar valores infinitos na importação
+import os                         # Importa o módulo os para substituir arquivos exportados de forma atômica
+import re                         # Importa o módulo de expressões regulares, útil para validações
+import sqlite3                    # Importa o módulo sqlite3 para desfazer as transações que falharam
+from datetime import date, datetime # Importa as classes date e datetime para manipulação de datas
+
+from banco import SQL_RECALCULO_RESUMOS, SQL_RECALCULO_RESUMOS_ARQUIVO, reconstruir_resumos, anexar_arquivo
+
+TAMANHO_PAGINA_CLIENTES = 200 # Quantidade de clientes trazida do banco a cada página da lista
+TAMANHO_PAGINA_VENDAS = 100 # Quantidade de compras trazida do banco a cada página da janela de compras
+LIMITE_ALTERACOES = 500 # Acima disso, recarregar a lista é mais barato que aplicar as alterações uma a uma
+MESES_VENDAS_ATIVAS = 24 # Padrão do comando 'arquivar': as vendas de antes do mês de 24 meses atrás saem do banco principal
+LIMITE_BUSCA_SELETIVA = 2000 # Acima deste número de resultados, a busca percorre o índice de nomes em vez de ordenar os resultados
+
+def email_valido(email): # Valida o formato do e-mail com regex simples (mesma regra do formulário)
+    return re.match(r"[^@]+@[^@]+\.[^@]+", email) is not None
+
+def formatar_telefone(texto): # Aplica a máscara (DD) XXXXX-XXXX aos dígitos do texto
+    texto_limpo = "".join(filter(str.isdigit, texto))
+    formatado = texto_limpo
+    if len(texto_limpo) > 2: formatado = f"({texto_limpo[:2]}) {texto_limpo[2:7]}"
+    if len(texto_limpo) > 7: formatado = f"({texto_limpo[:2]}) {texto_limpo[2:7]}-{texto_limpo[7:11]}"
+    return formatado
+
+def montar_filtro_busca(cursor, termo): # Monta a condição SQL (e seus parâmetros) que filtra os clientes pelo termo digitado
+    palavras = re.findall(r"\w+", termo)
+    if not palavras: return "1", ()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'clientes_fts'")
+    if cursor.fetchone(): # Cada palavra vira um prefixo ("ana"* "sp"*), e todas precisam aparecer em algum campo
+        consulta = " ".join(f'"{p}"*' for p in palavras)
+        cursor.execute("SELECT count(*) FROM (SELECT rowid FROM clientes_fts WHERE clientes_fts MATCH ? LIMIT ?)", (consulta, LIMITE_BUSCA_SELETIVA))
+        if cursor.fetchone()[0] < LIMITE_BUSCA_SELETIVA: # Poucos resultados: busca cada um pelo id e ordena
+            return "id IN (SELECT rowid FROM clientes_fts WHERE clientes_fts MATCH ?)", (consulta,)
+        # Muitos resultados: o '+' faz o SQLite percorrer o índice de nomes já em ordem e parar ao completar a página
+        return "+id IN (SELECT rowid FROM clientes_fts WHERE clientes_fts MATCH ?)", (consulta,)
+    padrao = "%" + re.sub(r"([\\%_])", r"\\\1", termo) + "%" # '%' e '_' digitados são literais ("50%", "joao_silva@...")
+    return ("(nome LIKE ? ESCAPE '\\' OR email LIKE ? ESCAPE '\\' OR telefone LIKE ? ESCAPE '\\'"
+            " OR cidade LIKE ? ESCAPE '\\' OR estado LIKE ? ESCAPE '\\')"), (padrao,) * 5
+
+def consultar_pagina_clientes(cursor, termo="", apos=None, limite=TAMANHO_PAGINA_CLIENTES): # Retorna uma página de clientes ordenada por (nome, id), filtrada pelo termo e iniciada após a chave 'apos'
+    condicoes, parametros = [], []
+    if termo:
+        condicao, valores = montar_filtro_busca(cursor, termo); condicoes.append(condicao); parametros.extend(valores)
+    if apos:
+        condicoes.append("(nome, id) > (?, ?)"); parametros.extend(apos)
+    where = f" WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    cursor.execute(f"SELECT id, nome, email, telefone, cidade, estado FROM clientes{where} ORDER BY nome, id LIMIT ?", (*parametros, limite))
+    return cursor.fetchall()
+
+# --- Repositórios ---
+class ClienteRepository: # Operações sobre a tabela 'clientes'; os métodos que alteram dados confirmam a transação (commit)
+    def __init__(self, conexao):
+        self.conexao = conexao
+        self.cursor = conexao.cursor()
+
+    def pagina(self, termo="", apos=None, limite=TAMANHO_PAGINA_CLIENTES): # Uma página da lista de clientes (veja consultar_pagina_clientes)
+        return consultar_pagina_clientes(self.cursor, termo, apos, limite)
+
+    def atende_busca(self, cliente_id, termo): # Verifica se o cliente aparece no resultado da busca pelo termo
+        if not termo: return True
+        condicao, parametros = montar_filtro_busca(self.cursor, termo)
+        self.cursor.execute(f"SELECT 1 FROM clientes WHERE id = ? AND {condicao}", (cliente_id, *parametros))
+        return self.cursor.fetchone() is not None
+
+    def obter(self, cliente_id): # Retorna (id, nome, email, telefone, cidade, estado) ou None
+        self.cursor.execute("SELECT id, nome, email, telefone, cidade, estado FROM clientes WHERE id = ?", (cliente_id,))
+        return self.cursor.fetchone()
+
+    def contar(self):
+        return self.cursor.execute("SELECT count(*) FROM clientes").fetchone()[0]
+
+    def inserir(self, nome, email, telefone, cidade, estado): # Insere um cliente e retorna o id; e-mail repetido lança sqlite3.IntegrityError
+        try: self.cursor.execute("INSERT INTO clientes (nome, email, telefone, cidade, estado) VALUES (?, ?, ?, ?, ?)",
+                                 (nome, email, telefone, cidade, estado))
+        except sqlite3.Error: # E-mail repetido ou banco ocupado: encerra a transação aberta, senão a conexão continuaria lendo uma versão antiga do banco
+            self.conexao.rollback(); raise
+        self.conexao.commit()
+        return self.cursor.lastrowid
+
+    def inserir_lote(self, linhas, confirmar=True): # Insere várias tuplas (nome, email, telefone, cidade, estado); e-mails repetidos são ignorados. Retorna quantas entraram
+        self.cursor.executemany(SQL_IMPORTACAO["clientes"], linhas)
+        inseridas = self.cursor.rowcount # Soma das linhas realmente inseridas (não conta as escritas feitas por triggers)
+        if confirmar: self.conexao.commit()
+        return inseridas
+
+    def atualizar(self, cliente_id, nome, email, telefone, cidade, estado): # E-mail de outro cliente lança sqlite3.IntegrityError
+        anexar_arquivo(self.conexao) # Com o arquivo anexado, a troca de UF também passa para as vendas arquivadas
+        try: self.cursor.execute("UPDATE clientes SET nome=?, email=?, telefone=?, cidade=?, estado=? WHERE id=?",
+                                 (nome, email, telefone, cidade, estado, cliente_id))
+        except sqlite3.Error: # Como em inserir()
+            self.conexao.rollback(); raise
+        self.conexao.commit()
+
+    def excluir(self, cliente_id): # Exclui o cliente; as vendas dele são apagadas pelo ON DELETE CASCADE (e as arquivadas, pelo trigger do arquivo)
+        anexar_arquivo(self.conexao)
+        self.cursor.execute("DELETE FROM clientes WHERE id=?", (cliente_id,))
+        self.conexao.commit()
+
+    def excluir_todos(self): # Apaga todos os clientes e todas as vendas, inclusive as arquivadas
+        anexar_arquivo(self.conexao)
+        self.cursor.execute("DELETE FROM clientes"); self.cursor.execute("DELETE FROM vendas")
+        self.conexao.commit()
+
+# Colunas das compras exibidas na janela de compras. Data e valor já saem formatados (DD/MM/AAAA e 0,00), sem strptime/strftime
+# linha a linha no Python; a data e o valor originais vêm no fim: (id, título, autor, gênero, data, valor, data_compra, valor_total)
+COLUNAS_VENDA_EXIBICAO = """id, livro_titulo, livro_autor, genero, coalesce(strftime('%d/%m/%Y', data_compra), data_compra),
+                            replace(printf('%.2f', valor_total), '.', ','), data_compra, valor_total"""
+
+class VendaRepository: # Operações sobre a tabela 'vendas'; os métodos que alteram dados confirmam a transação (commit)
+    def __init__(self, conexao):
+        self.conexao = conexao
+        self.cursor = conexao.cursor()
+
+    def pagina_por_cliente(self, cliente_id, apos=None, limite=TAMANHO_PAGINA_VENDAS, incluir_arquivo=False): # Uma página das compras do cliente, da mais recente para a mais antiga, iniciada após a chave (data_compra, id) 'apos'
+        filtro = "AND (data_compra, id) < (?, ?)" if apos else ""; parametros = (cliente_id, *(apos or ()))
+        if incluir_arquivo and anexar_arquivo(self.conexao): # Junta as compras arquivadas; cada linha traz no fim 1 se a compra está arquivada (0 se não)
+            # Os dois lados percorrem o índice (cliente_id, data_compra) já em ordem e o SQLite só intercala os resultados (MERGE)
+            self.cursor.execute(f"""SELECT {COLUNAS_VENDA_EXIBICAO}, 0 FROM vendas WHERE cliente_id = ? {filtro}
+                                    UNION ALL SELECT {COLUNAS_VENDA_EXIBICAO}, 1 FROM vendas_arquivadas WHERE cliente_id = ? {filtro}
+                                    ORDER BY 7 DESC, 1 DESC LIMIT ?""", (*parametros, *parametros, limite))
+            return self.cursor.fetchall()
+        self.cursor.execute(f"SELECT {COLUNAS_VENDA_EXIBICAO}{', 0' if incluir_arquivo else ''} FROM vendas WHERE cliente_id = ? {filtro} ORDER BY data_compra DESC, id DESC LIMIT ?",
+                            (*parametros, limite))
+        return self.cursor.fetchall()
+
+    def obter(self, venda_id): # Uma compra no mesmo formato de pagina_por_cliente(), ou None
+        self.cursor.execute(f"SELECT {COLUNAS_VENDA_EXIBICAO} FROM vendas WHERE id = ?", (venda_id,))
+        return self.cursor.fetchone()
+
+    def resumo_cliente(self, cliente_id, incluir_arquivo=False): # (quantidade de compras, total gasto) do cliente, lidos de resumo_vendas_cliente
+        origem = resumos_com_arquivo(self.conexao, "resumo_vendas_cliente", "resumo_arquivado_cliente", incluir_arquivo)
+        self.cursor.execute(f"SELECT coalesce(sum(quantidade), 0), coalesce(sum(total), 0.0) FROM {origem} WHERE cliente_id = ?", (cliente_id,))
+        return self.cursor.fetchone()
+
+    def inserir(self, cliente_id, titulo, autor, genero, data_compra, valor_total): # Registra uma compra e retorna o id
+        self.cursor.execute("INSERT INTO vendas (cliente_id, livro_titulo, livro_autor, genero, data_compra, valor_total) VALUES (?, ?, ?, ?, ?, ?)",
+                            (cliente_id, titulo, autor, genero, data_compra, valor_total))
+        self.conexao.commit()
+        return self.cursor.lastrowid
+
+    def inserir_lote(self, linhas, confirmar=True): # Insere várias tuplas (cliente_id, título, autor, gênero, data, valor); vendas de clientes inexistentes são ignoradas
+        self.cursor.executemany(SQL_INSERCAO_VENDAS_POR_ID, ((*linha, linha[0]) for linha in linhas))
+        inseridas = self.cursor.rowcount
+        if confirmar: self.conexao.commit()
+        return inseridas
+
+    def inserir_lote_por_email(self, linhas, confirmar=True): # Como inserir_lote, com o e-mail do cliente no lugar do id (importação de arquivos); e-mails sem cliente são ignorados
+        self.cursor.executemany(SQL_IMPORTACAO["vendas"], ((*linha[1:], linha[0]) for linha in linhas))
+        inseridas = self.cursor.rowcount
+        if confirmar: self.conexao.commit()
+        return inseridas
+
+    def atualizar(self, venda_id, titulo, autor, genero, data_compra, valor_total):
+        self.cursor.execute("UPDATE vendas SET livro_titulo=?, livro_autor=?, genero=?, data_compra=?, valor_total=? WHERE id=?",
+                            (titulo, autor, genero, data_compra, valor_total, venda_id))
+        self.conexao.commit()
+
+    def resumo(self, incluir_arquivo=False): # Totais gerais: (quantidade de clientes, quantidade de vendas, faturamento), lidos dos resumos de vendas
+        origem = resumos_com_arquivo(self.conexao, "resumo_vendas_dia", "resumo_arquivado_dia", incluir_arquivo)
+        self.cursor.execute(f"SELECT (SELECT count(*) FROM clientes), coalesce(sum(quantidade), 0), coalesce(sum(total), 0) FROM {origem}")
+        return self.cursor.fetchone()
+
+def resumos_com_arquivo(conexao, tabela, tabela_arquivo, incluir_arquivo): # Origem de uma consulta aos resumos: a tabela do banco principal ou, com incluir_arquivo, ela mais a do arquivo (mesmas colunas)
+    if not (incluir_arquivo and anexar_arquivo(conexao)): return tabela
+    return f"(SELECT * FROM {tabela} UNION ALL SELECT * FROM {tabela_arquivo})" # As condições do WHERE externo são levadas para dentro dos dois lados
+
+class RelatorioRepository: # Relatórios de vendas lidos das tabelas de resumo (migração 4), sem varrer a tabela 'vendas'
+    def __init__(self, conexao):
+        self.conexao = conexao
+        self.cursor = conexao.cursor()
+
+    def agrupar(self, expressao, inicio=None, fim=None, ordem="1", limite=-1, incluir_arquivo=False): # (grupo, quantidade, faturamento) de resumo_vendas_dia no período AAAA-MM-DD (inclusive)
+        origem = resumos_com_arquivo(self.conexao, "resumo_vendas_dia", "resumo_arquivado_dia", incluir_arquivo)
+        self.cursor.execute(f"""SELECT {expressao}, sum(quantidade), sum(total) FROM {origem}
+                                WHERE data BETWEEN ? AND ? GROUP BY 1 ORDER BY {ordem} LIMIT ?""", (inicio or "0000", fim or "9999", limite))
+        return self.cursor.fetchall()
+
+    def por_mes(self, inicio=None, fim=None, incluir_arquivo=False): # Faturamento mês a mês (AAAA-MM), em ordem cronológica
+        return self.agrupar("substr(data, 1, 7)", inicio, fim, incluir_arquivo=incluir_arquivo)
+
+    def por_genero(self, inicio=None, fim=None, limite=-1, incluir_arquivo=False): # Gêneros que mais faturaram
+        return self.agrupar("genero", inicio, fim, "3 DESC", limite, incluir_arquivo)
+
+    def por_estado(self, inicio=None, fim=None, limite=-1, incluir_arquivo=False): # UFs que mais faturaram
+        return self.agrupar("estado", inicio, fim, "3 DESC", limite, incluir_arquivo)
+
+    def melhores_clientes(self, limite=10, incluir_arquivo=False): # (id, nome, quantidade, faturamento) dos clientes que mais compraram; percorre o índice de total
+        origem = resumos_com_arquivo(self.conexao, "resumo_vendas_cliente", "resumo_arquivado_cliente", incluir_arquivo)
+        if origem != "resumo_vendas_cliente": # Com o arquivo, soma as duas partes de cada cliente (sem o índice de total: ordena os clientes com compras)
+            self.cursor.execute(f"""SELECT c.id, c.nome, sum(r.quantidade), sum(r.total) FROM {origem} r JOIN clientes c ON c.id = r.cliente_id
+                                    GROUP BY c.id ORDER BY 4 DESC LIMIT ?""", (limite,))
+            return self.cursor.fetchall()
+        self.cursor.execute("""SELECT c.id, c.nome, r.quantidade, r.total FROM resumo_vendas_cliente r JOIN clientes c ON c.id = r.cliente_id
+                               ORDER BY r.total DESC LIMIT ?""", (limite,))
+        return self.cursor.fetchall()
+
+    def consultas_recalculo(self): # Resumos a conferir ou reconstruir: os do banco principal e, se houver arquivo, os dele
+        return {**SQL_RECALCULO_RESUMOS, **(SQL_RECALCULO_RESUMOS_ARQUIVO if anexar_arquivo(self.conexao) else {})}
+
+    def verificar(self): # Compara os resumos com um recálculo completo; retorna [(tabela, 'faltando' | 'sobrando', linha)] — vazia se estiver tudo certo
+        divergencias = []
+        for tabela, consulta in self.consultas_recalculo().items():
+            esquema, _, nome = tabela.rpartition(".")
+            colunas = [linha[1] for linha in self.cursor.execute(f"PRAGMA {esquema or 'main'}.table_info({nome})")]
+            # Compara o total com 2 casas: somas e subtrações sucessivas acumulam erro de ponto flutuante
+            selecao = f"SELECT {', '.join(colunas[:-1])}, round({colunas[-1]}, 2) FROM"
+            atual = f"{selecao} {tabela}"
+            esperado = f"{selecao} recalculo"
+            for tipo, primeira, segunda in (("faltando", esperado, atual), ("sobrando", atual, esperado)): # Valor divergente aparece nas duas listas
+                self.cursor.execute(f"WITH recalculo ({', '.join(colunas)}) AS ({consulta}) {primeira} EXCEPT {segunda}")
+                divergencias.extend((tabela, tipo, linha) for linha in self.cursor.fetchall())
+        return divergencias
+
+    def reconstruir(self): # Recalcula os resumos a partir de 'vendas' (varre a tabela inteira) e confirma
+        consultas = self.consultas_recalculo()
+        try: reconstruir_resumos(self.cursor, consultas)
+        except BaseException:
+            self.conexao.rollback(); raise
+        self.conexao.commit()
+
+class AlteracaoRepository: # Leitura do registro de alterações (migração 5), para manter as listas abertas em dia sem recarregá-las
+    def __init__(self, conexao):
+        self.conexao = conexao
+        self.cursor = conexao.cursor()
+
+    def versao_dados(self): # PRAGMA data_version: muda quando OUTRA conexão confirma alterações (as desta conexão não contam); não lê nenhuma tabela
+        return self.cursor.execute("PRAGMA data_version").fetchone()[0]
+
+    def ultima(self): # seq da alteração mais recente (0 se não houver nenhuma)
+        return self.cursor.execute("SELECT coalesce(max(seq), 0) FROM alteracoes").fetchone()[0]
+
+    def desde(self, seq, limite=LIMITE_ALTERACOES): # [(seq, tabela, operacao, registro_id, cliente_id)] posteriores a 'seq', em ordem; None = recarregue tudo
+        self.cursor.execute("SELECT seq, tabela, operacao, registro_id, cliente_id FROM alteracoes WHERE seq > ? ORDER BY seq LIMIT ?", (seq, limite + 1))
+        linhas = self.cursor.fetchall()
+        if len(linhas) > limite or any(linha[2] == "R" for linha in linhas): return None # Alterações demais ou carga em lote
+        if linhas and linhas[0][0] != seq + 1: return None # As alterações seguintes a 'seq' já foram limpas do registro
+        return linhas
+
+# --- Importação de CSV ---
+# Nomes de coluna aceitos no cabeçalho do CSV para cada campo (sem diferenciar maiúsculas); inclui os cabeçalhos gerados pela exportação
+COLUNAS_IMPORTACAO = {
+    "clientes": {"nome": ("nome",), "email": ("email", "e-mail"), "telefone": ("telefone",), "cidade": ("cidade",), "estado": ("estado", "uf")},
+    # O cliente da venda é identificado pelo e-mail: os ids mudam de um banco para outro (a importação de clientes gera ids novos)
+    "vendas": {"email_cliente": ("email_cliente", "email cliente", "email do cliente", "e-mail do cliente", "email", "e-mail"), "livro_titulo": ("livro_titulo", "título", "titulo"),
+               "livro_autor": ("livro_autor", "autor"), "genero": ("genero", "gênero"), "data_compra": ("data_compra", "data", "data da compra"),
+               "valor_total": ("valor_total", "valor", "valor total", "valor (r$)")},
+}
+SQL_IMPORTACAO = { # OR IGNORE descarta e-mails repetidos sem abortar o lote; vendas de e-mails sem cliente não encontram linha no SELECT
+    "clientes": "INSERT OR IGNORE INTO clientes (nome, email, telefone, cidade, estado) VALUES (?, ?, ?, ?, ?)",
+    "vendas": "INSERT INTO vendas (cliente_id, livro_titulo, livro_autor, genero, data_compra, valor_total) SELECT id, ?, ?, ?, ?, ? FROM clientes WHERE email = ?",
+}
+# Inserção de vendas pelo id do cliente no próprio banco (dados sintéticos dos benchmarks); clientes inexistentes são filtrados pelo EXISTS
+SQL_INSERCAO_VENDAS_POR_ID = "INSERT INTO vendas (cliente_id, livro_titulo, livro_autor, genero, data_compra, valor_total) SELECT ?, ?, ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM clientes WHERE id = ?)"
+COLUNAS_ID_CLIENTE = ("cliente_id", "id cliente", "id do cliente") # Id do cliente no banco de origem (exportações antigas, sem o e-mail): um arquivo só com ele é recusado
+# Triggers de inserção desligados durante a importação e os comandos que fazem o mesmo trabalho, de uma vez, para as linhas novas (id > ?).
+# No registro de alterações, a carga inteira vira uma única linha 'R' (as janelas abertas recarregam a lista).
+GATILHOS_IMPORTACAO = {
+    "clientes": [("clientes_fts_insert", [
+        "INSERT INTO clientes_fts (rowid, nome, email, telefone, cidade, estado) SELECT id, nome, email, telefone, cidade, estado FROM clientes WHERE id > ?"]),
+        ("clientes_alteracao_insert", ["INSERT INTO alteracoes (tabela, operacao) SELECT 'clientes', 'R' WHERE EXISTS (SELECT 1 FROM clientes WHERE id > ?)"])],
+    "vendas": [("vendas_resumo_insert", [
+        """INSERT INTO resumo_vendas_dia (data, genero, estado, quantidade, total)
+           SELECT substr(v.data_compra, 1, 10), v.genero, c.estado, count(*), sum(v.valor_total) FROM vendas v JOIN clientes c ON c.id = v.cliente_id
+           WHERE v.id > ? GROUP BY 1, 2, 3
+           ON CONFLICT (data, genero, estado) DO UPDATE SET quantidade = quantidade + excluded.quantidade, total = total + excluded.total""",
+        """INSERT INTO resumo_vendas_cliente (cliente_id, quantidade, total)
+           SELECT cliente_id, count(*), sum(valor_total) FROM vendas WHERE id > ? GROUP BY cliente_id
+           ON CONFLICT (cliente_id) DO UPDATE SET quantidade = quantidade + excluded.quantidade, total = total + excluded.total"""]),
+        ("vendas_alteracao_insert", ["INSERT INTO alteracoes (tabela, operacao) SELECT 'vendas', 'R' WHERE EXISTS (SELECT 1 FROM vendas WHERE id > ?)"])],
+}
+TAMANHO_LOTE_IMPORTACAO = 5000 # Linhas enviadas ao banco por chamada de executemany
+MAX_ERROS_RELATADOS = 50 # Quantidade máxima de linhas inválidas descritas no resumo da importação
+
+def detectar_tabela_importacao(cabecalho): # Descobre pelo cabeçalho se o CSV contém clientes ou vendas
+    colunas = {c.strip().lower() for c in cabecalho}
+    return "vendas" if colunas & set(COLUNAS_IMPORTACAO["vendas"]["livro_titulo"]) else "clientes"
+
+def validar_linha_cliente(valores): # Normaliza uma linha de cliente; retorna a tupla para o INSERT ou lança ValueError com o motivo
+    nome, email, telefone, cidade, estado = (v.strip() for v in valores)
+    if not all([nome, email, telefone, cidade, estado]): raise ValueError("campo obrigatório vazio")
+    if not email_valido(email): raise ValueError(f"e-mail inválido: {email}")
+    if len("".join(filter(str.isdigit, telefone))) not in (10, 11): raise ValueError(f"telefone inválido: {telefone}")
+    return (nome, email, formatar_telefone(telefone), cidade, estado.upper())
+
+def validar_linha_venda(valores): # Normaliza uma linha de venda; retorna a tupla (e-mail do cliente, título, autor, gênero, data, valor) ou lança ValueError com o motivo
+    email, titulo, autor, genero, data_str, valor_str = (v.strip() for v in valores)
+    if not all([email, titulo, autor, genero, data_str, valor_str]): raise ValueError("campo obrigatório vazio")
+    if not email_valido(email): raise ValueError(f"e-mail do cliente inválido: {email}")
+    try: # Aceita a data como na interface (DD/MM/AAAA) ou como no banco (AAAA-MM-DD)
+        data_sql = datetime.strptime(data_str, '%d/%m/%Y' if '/' in data_str else '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError: raise ValueError(f"data inválida: {data_str}")
+    try: valor = float(valor_str.replace(',', '.', 1))
+    except ValueError: raise ValueError(f"valor inválido: {valor_str}")
+    if not (math.isfinite(valor) and valor >= 0): raise ValueError(f"valor inválido: {valor_str}") # Também rejeita 'nan', 'inf' e '1e999'
+    return (email, titulo, autor, genero, data_sql, valor)
+
+# Manter o índice de busca (clientes), os resumos (vendas) e o registro de alterações linha a linha pelos triggers é o gargalo das
+# cargas grandes: os triggers são removidos durante a carga e o trabalho deles é feito de uma vez no final. Chame as duas funções dentro da mesma transação.
+def suspender_gatilho_importacao(cursor, tabela): # Remove os triggers de inserção da tabela; retorna o necessário para restaurá-los (None se nenhum existir)
+    suspensos = []
+    for nome_gatilho, _ in GATILHOS_IMPORTACAO[tabela]:
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?", (nome_gatilho,))
+        gatilho = (cursor.fetchone() or (None,))[0]
+        if gatilho: suspensos.append((nome_gatilho, gatilho))
+    if not suspensos: return None
+    id_anterior = cursor.execute(f"SELECT coalesce(max(id), 0) FROM {tabela}").fetchone()[0] # AUTOINCREMENT: os novos ids serão maiores
+    for nome_gatilho, _ in suspensos: cursor.execute(f"DROP TRIGGER {nome_gatilho}")
+    return suspensos, id_anterior
+
+def restaurar_gatilho_importacao(cursor, tabela, suspenso): # Processa de uma vez as linhas inseridas desde a suspensão e recria os triggers
+    if not suspenso: return
+    suspensos, id_anterior = suspenso; comandos = dict(GATILHOS_IMPORTACAO[tabela])
+    for nome_gatilho, gatilho in suspensos:
+        for comando in comandos[nome_gatilho]: cursor.execute(comando, (id_anterior,))
+        cursor.execute(gatilho)
+
+def importar_csv(conexao, caminho, tabela=None, tamanho_lote=TAMANHO_LOTE_IMPORTACAO): # Importa um CSV de clientes ou vendas em lotes, dentro de uma única transação; retorna um resumo
+    resumo = {"tabela": tabela, "lidas": 0, "importadas": 0, "duplicadas": 0, "sem_cliente": 0, "invalidas": 0, "erros": []}
+    cursor = conexao.cursor()
+    with open(caminho, newline="", encoding="utf-8-sig") as f: # utf-8-sig aceita arquivos salvos pelo Excel (com BOM)
+        leitor = csv.reader(f)
+        cabecalho = next(leitor, None)
+        if not cabecalho: raise ValueError("O arquivo está vazio.")
+        tabela = resumo["tabela"] = tabela or detectar_tabela_importacao(cabecalho)
+        colunas = [c.strip().lower() for c in cabecalho]
+        posicoes = []
+        for campo, nomes in COLUNAS_IMPORTACAO[tabela].items(): # Posição de cada campo no arquivo, pela ordem do cabeçalho
+            encontrada = next((colunas.index(n) for n in nomes if n in colunas), None)
+            if encontrada is None and campo == "email_cliente" and set(colunas) & set(COLUNAS_ID_CLIENTE): # Só o id: ligaria as vendas aos clientes errados
+                raise ValueError("O arquivo de vendas identifica os clientes só pelo id, que muda de um banco para outro. "
+                                 "Inclua a coluna 'Email Cliente' (a exportação de vendas já a inclui).")
+            if encontrada is None: raise ValueError(f"Coluna obrigatória ausente no CSV: {campo}")
+            posicoes.append(encontrada)
+        validar = validar_linha_cliente if tabela == "clientes" else validar_linha_venda
+        repositorio = ClienteRepository(conexao) if tabela == "clientes" else VendaRepository(conexao)
+        lote = []
+        inserir_lote = repositorio.inserir_lote if tabela == "clientes" else repositorio.inserir_lote_por_email
+        def gravar_lote(): # Envia o lote ao banco (sem commit) e contabiliza as linhas ignoradas pelo OR IGNORE / pela busca do e-mail
+            gravadas = inserir_lote(lote, confirmar=False)
+            resumo["importadas"] += gravadas
+            resumo["duplicadas" if tabela == "clientes" else "sem_cliente"] += len(lote) - gravadas
+            lote.clear()
+        try:
+            if not conexao.in_transaction: cursor.execute("BEGIN") # Explícito para que o DROP TRIGGER abaixo também seja desfeito em caso de erro
+            gatilho_suspenso = suspender_gatilho_importacao(cursor, tabela)
+            for numero_linha, linha in enumerate(leitor, start=2):
+                if not any(campo.strip() for campo in linha): continue # Ignora linhas em branco
+                resumo["lidas"] += 1
+                try:
+                    try: valores = [linha[p] for p in posicoes]
+                    except IndexError: raise ValueError("coluna ausente") # Linha com menos colunas que o cabeçalho
+                    lote.append(validar(valores))
+                except ValueError as e:
+                    resumo["invalidas"] += 1
+                    if len(resumo["erros"]) < MAX_ERROS_RELATADOS: resumo["erros"].append((numero_linha, str(e)))
+                    continue
+                if len(lote) >= tamanho_lote: gravar_lote()
+            if lote: gravar_lote()
+            restaurar_gatilho_importacao(cursor, tabela, gatilho_suspenso)
+            conexao.commit() # Um único commit: ou o arquivo entra inteiro (menos as linhas rejeitadas) ou nada entra
+        except BaseException:
+            conexao.rollback(); raise
+    return resumo
+
+def formatar_resumo_importacao(resumo): # Texto legível com o resultado de importar_csv()
+    linhas = [f"Tabela: {resumo['tabela']}", f"Linhas lidas: {resumo['lidas']}", f"Importadas: {resumo['importadas']}"]
+    if resumo["duplicadas"]: linhas.append(f"E-mails já cadastrados (ignorados): {resumo['duplicadas']}")
+    if resumo["sem_cliente"]: linhas.append(f"Vendas de e-mails sem cliente cadastrado (ignoradas): {resumo['sem_cliente']}")
+    if resumo["invalidas"]:
+        linhas.append(f"Linhas inválidas (ignoradas): {resumo['invalidas']}")
+        linhas.extend(f"  linha {n}: {motivo}" for n, motivo in resumo["erros"][:10])
+        if resumo["invalidas"] > 10: linhas.append("  ...")
+    return "\n".join(linhas)
+
+# --- Exportação em fluxo ---
+# Para cada conteúdo: cabeçalho do CSV, consulta que conta os registros (para a barra de progresso) e consulta que os lê
+CONSULTAS_EXPORTACAO = {
+    "clientes": (["ID", "Nome", "Email", "Telefone", "Cidade", "Estado"], "SELECT count(*) FROM clientes",
+                 "SELECT id, nome, email, telefone, cidade, estado FROM clientes ORDER BY nome, id"),
+    "vendas": (["ID", "ID Cliente", "Email Cliente", "Título", "Autor", "Gênero", "Data", "Valor (R$)"], "SELECT count(*) FROM vendas",
+               """SELECT v.id, v.cliente_id, c.email, v.livro_titulo, v.livro_autor, v.genero, v.data_compra, v.valor_total
+                  FROM vendas v JOIN clientes c ON c.id = v.cliente_id ORDER BY v.id"""), # O e-mail permite reimportar as vendas em outro banco
+    "clientes_vendas": (["ID Cliente", "Nome", "Email", "Telefone", "Cidade", "Estado", "ID Venda", "Título", "Autor", "Gênero", "Data", "Valor (R$)"],
+                        "SELECT count(*) FROM vendas",
+                        """SELECT c.id AS cliente_id, c.nome, c.email, c.telefone, c.cidade, c.estado,
+                                  v.id AS venda_id, v.livro_titulo, v.livro_autor, v.genero, v.data_compra, v.valor_total
+                           FROM clientes c JOIN vendas v ON v.cliente_id = c.id ORDER BY c.nome, c.id, v.data_compra"""),
+}
+ROTULOS_EXPORTACAO = {"clientes": ("Clientes", "clientes"), "vendas": ("Vendas", "vendas"), "clientes_vendas": ("Clientes e Vendas", "clientes_vendas")} # (texto na interface, nome de arquivo sugerido)
+TAMANHO_BLOCO_EXPORTACAO = 2000 # Linhas lidas do banco por chamada de fetchmany
+
+def exportar_dados(conexao, caminho, conteudo="clientes", formato="csv", compactar=False, tamanho_bloco=TAMANHO_BLOCO_EXPORTACAO, progresso=None): # Exporta em blocos (memória constante) para CSV ou JSON Lines, opcionalmente com gzip; retorna o total de registros
+    cabecalho, consulta_total, consulta = CONSULTAS_EXPORTACAO[conteudo]
+    cursor = conexao.cursor()
+    total = cursor.execute(consulta_total).fetchone()[0]
+    temporario = caminho + ".parcial" # Só substitui o arquivo de destino quando a exportação termina sem erros
+    abrir = gzip.open if compactar else open
+    feitas = 0
+    try:
+        with abrir(temporario, "wt", newline="", encoding="utf-8") as f:
+            cursor.execute(consulta)
+            chaves = [coluna[0] for coluna in cursor.description] # Nomes das colunas do SELECT, usados como chaves no JSON Lines
+            if formato == "csv":
+                writer = csv.writer(f); writer.writerow(cabecalho)
+            while True:
+                linhas = cursor.fetchmany(tamanho_bloco)
+                if not linhas: break
+                if formato == "csv": writer.writerows(linhas)
+                else: f.writelines(json.dumps(dict(zip(chaves, linha)), ensure_ascii=False) + "\n" for linha in linhas)
+                feitas += len(linhas)
+                if progresso: progresso(feitas, total)
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario): os.remove(temporario)
+        raise
+    return feitas
+
+# --- Arquivamento de vendas antigas ---
+# As vendas antigas são copiadas para o arquivo (banco.anexar_arquivo) numa primeira transação e só depois saem de 'vendas':
+# o SQLite não garante que uma transação nos dois arquivos seja atômica no modo WAL, e nesta ordem uma interrupção no meio
+# nunca perde vendas (no máximo deixa a cópia para a próxima execução). Na remoção, os triggers de exclusão ficam desligados:
+# os resumos do banco principal são subtraídos de uma vez, por grupo, e o registro de alterações ganha uma única linha 'R'.
+# Cada comando recebe a data de corte como único parâmetro.
+SQL_COPIA_ARQUIVO = """INSERT OR IGNORE INTO vendas_arquivadas (id, cliente_id, livro_titulo, livro_autor, genero, data_compra, valor_total, estado)
+                       SELECT v.id, v.cliente_id, v.livro_titulo, v.livro_autor, v.genero, v.data_compra, v.valor_total, c.estado
+                       FROM vendas v JOIN clientes c ON c.id = v.cliente_id WHERE v.data_compra < ?"""
+# Vendas que já têm no arquivo uma cópia idêntica (uma venda alterada entre as duas transações continua no banco principal)
+VENDAS_COPIADAS = """v.data_compra < ? AND EXISTS (SELECT 1 FROM vendas_arquivadas a WHERE a.id = v.id AND (a.cliente_id, a.livro_titulo, a.livro_autor, a.genero, a.data_compra, a.valor_total)
+                                                                                         = (v.cliente_id, v.livro_titulo, v.livro_autor, v.genero, v.data_compra, v.valor_total))"""
+GATILHOS_ARQUIVAMENTO = ("vendas_resumo_delete", "vendas_alteracao_delete")
+SQL_ARQUIVAMENTO = [
+    f"""UPDATE resumo_vendas_dia SET quantidade = quantidade - a.vendidas, total = total - a.valor
+        FROM (SELECT substr(v.data_compra, 1, 10) AS data, v.genero, c.estado, count(*) AS vendidas, sum(v.valor_total) AS valor
+              FROM vendas v JOIN clientes c ON c.id = v.cliente_id WHERE {VENDAS_COPIADAS} GROUP BY 1, 2, 3) AS a
+        WHERE resumo_vendas_dia.data = a.data AND resumo_vendas_dia.genero = a.genero AND resumo_vendas_dia.estado = a.estado""",
+    f"""UPDATE resumo_vendas_cliente SET quantidade = quantidade - a.vendidas, total = total - a.valor
+        FROM (SELECT v.cliente_id, count(*) AS vendidas, sum(v.valor_total) AS valor FROM vendas v WHERE {VENDAS_COPIADAS} GROUP BY 1) AS a
+        WHERE resumo_vendas_cliente.cliente_id = a.cliente_id""",
+    f"DELETE FROM vendas AS v WHERE {VENDAS_COPIADAS}",
+]
+SQL_LIMPEZA_ARQUIVO = "DELETE FROM vendas_arquivadas WHERE id IN (SELECT id FROM vendas WHERE data_compra < ?)" # Cópias desatualizadas das vendas que ficaram
+
+def data_corte_arquivo(meses=MESES_VENDAS_ATIVAS, hoje=None): # Primeiro dia do mês de 'meses' meses atrás (AAAA-MM-DD): as vendas anteriores a ele são arquivadas
+    hoje = hoje or date.today(); mes = hoje.year * 12 + hoje.month - 1 - meses
+    return f"{mes // 12:04d}-{mes % 12 + 1:02d}-01"
+
+def arquivar_vendas(conexao, antes_de): # Move para o arquivo as vendas com data anterior a 'antes_de' (AAAA-MM-DD); retorna quantas foram movidas
+    try: datetime.strptime(antes_de, "%Y-%m-%d") # A data é comparada como texto: só o formato do banco serve
+    except ValueError: raise ValueError(f"Data de corte inválida: {antes_de} (use AAAA-MM-DD).")
+    if not anexar_arquivo(conexao, criar=True): raise ValueError("Este banco não permite arquivo de vendas (banco em memória ou transação aberta).")
+    cursor = conexao.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE"); cursor.execute(SQL_COPIA_ARQUIVO, (antes_de,)); conexao.commit()
+        cursor.execute("BEGIN IMMEDIATE") # IMMEDIATE: reserva a escrita já no início, antes de ler as vendas a remover
+        suspensos = [linha[0] for linha in cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name IN (?, ?)", GATILHOS_ARQUIVAMENTO)]
+        for nome_gatilho in GATILHOS_ARQUIVAMENTO: cursor.execute(f"DROP TRIGGER IF EXISTS {nome_gatilho}")
+        for comando in SQL_ARQUIVAMENTO: cursor.execute(comando, (antes_de,))
+        movidas = cursor.rowcount # Linhas apagadas pelo último comando
+        for tabela in ("resumo_vendas_dia", "resumo_vendas_cliente"): cursor.execute(f"DELETE FROM {tabela} WHERE quantidade <= 0")
+        cursor.execute(SQL_LIMPEZA_ARQUIVO, (antes_de,))
+        if movidas: cursor.execute("INSERT INTO alteracoes (tabela, operacao) VALUES ('vendas', 'R')") # As janelas abertas recarregam as compras
+        for gatilho in suspensos: cursor.execute(gatilho)
+        conexao.commit()
+    except BaseException:
+        conexao.rollback(); raise
+    return movidas
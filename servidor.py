@@ -0,0 +1,120 @@
+# ===================================================
+# SERVIDOR HTTP/JSON PARA VÁRIOS CAIXAS
+# ===================================================
+# Várias cópias do programa abrindo o mesmo clientes_livraria.db numa pasta
+# compartilhada geram erros "database is locked". No modo servidor, um único
+# processo abre o banco (no disco local do servidor) e as outras máquinas usam
+# os repositórios por HTTP (veja cliente_remoto.py e LIVRARIA_SERVIDOR).
+#   python -m livraria servidor [--host 0.0.0.0] [--porta 8765] [--conexoes 8] [--token SEGREDO]
+# Protocolo: POST /api/<repositorio>/<metodo> com {"argumentos": [...], "opcoes": {...}}
+#   -> 200 {"resultado": ...} ou erro {"erro": "mensagem", "tipo": "IntegrityError"}.
+#   GET /api/saude -> {"ok": true, "versao_banco": N}
+# Só os métodos de protocolo_remoto.METODOS_REMOTOS podem ser chamados. As leituras rodam em paralelo
+# (WAL) com conexões de um pool; as escritas passam uma de cada vez por uma trava.
+import json                       # Importa o módulo json para ler os pedidos e escrever as respostas
+import queue                      # Importa filas seguras entre threads, usadas como pool de conexões
+import sqlite3                    # Importa o módulo sqlite3 para tratar os erros do banco
+import threading                  # Importa o módulo threading para a trava de escrita
+from contextlib import contextmanager # Importa contextmanager para emprestar conexões com 'with'
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer # Servidor HTTP da biblioteca padrão, uma thread por conexão
+
+from banco import conectar_banco, otimizar_banco
+from repositorio import ClienteRepository, VendaRepository, RelatorioRepository, AlteracaoRepository
+from protocolo_remoto import METODOS_REMOTOS
+
+PORTA_PADRAO = 8765
+CONEXOES_PADRAO = 8 # Tamanho do pool: quantas requisições podem usar o banco ao mesmo tempo
+ESPERA_MAXIMA_CONEXAO_S = 30 # Tempo máximo de espera por uma conexão livre antes de responder 503
+TAMANHO_MAXIMO_PEDIDO = 1024 * 1024 # Corpo máximo de uma requisição (1 MiB)
+REPOSITORIOS_REMOTOS = {"clientes": ClienteRepository, "vendas": VendaRepository, "relatorios": RelatorioRepository, "alteracoes": AlteracaoRepository}
+
+class PoolConexoes: # Conexões abertas uma única vez e emprestadas a uma requisição por vez
+    def __init__(self, caminho, tamanho=CONEXOES_PADRAO):
+        self.conexoes = queue.LifoQueue() # LIFO: a conexão usada mais recentemente (com o cache de páginas "quente") sai primeiro
+        for _ in range(tamanho): self.conexoes.put(conectar_banco(caminho, entre_threads=True)) # A primeira aplica as migrações
+        self.tamanho = tamanho; self.fechado = False
+
+    @contextmanager
+    def emprestar(self): # with pool.emprestar() as conexao: ... ; lança queue.Empty se nenhuma conexão ficar livre a tempo
+        if self.fechado: raise queue.Empty # Servidor encerrando: as conexões estão sendo fechadas
+        conexao = self.conexoes.get(timeout=ESPERA_MAXIMA_CONEXAO_S)
+        try: yield conexao
+        finally:
+            if conexao.in_transaction: conexao.rollback() # Um erro no meio de uma escrita não pode contaminar a próxima requisição
+            self.conexoes.put(conexao)
+
+    def fechar(self): # Espera as conexões emprestadas voltarem, otimiza e fecha todas
+        self.fechado = True
+        for _ in range(self.tamanho):
+            conexao = self.conexoes.get(); otimizar_banco(conexao); conexao.close()
+
+class ManipuladorRequisicoes(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Mantém a conexão aberta entre requisições do mesmo cliente (keep-alive)
+    disable_nagle_algorithm = True # Cabeçalho e corpo saem em escritas separadas: sem TCP_NODELAY cada resposta esperaria ~40 ms pelo ACK atrasado
+
+    def responder(self, status, corpo):
+        dados = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8"); self.send_header("Content-Length", str(len(dados)))
+        self.end_headers(); self.wfile.write(dados)
+
+    def responder_erro(self, status, erro):
+        self.responder(status, {"erro": str(erro), "tipo": type(erro).__name__})
+
+    def autorizado(self): # Confere o token e se o servidor ainda está atendendo; se não, já responde o erro
+        if self.server.pool.fechado:
+            self.close_connection = True; self.responder(503, {"erro": "Servidor encerrado.", "tipo": "OperationalError"}); return False
+        if not self.server.token or self.headers.get("X-Livraria-Token") == self.server.token: return True
+        self.responder(401, {"erro": "Token de acesso inválido.", "tipo": "PermissionError"}); return False
+
+    def do_GET(self):
+        if not self.autorizado(): return
+        if self.path != "/api/saude": return self.responder(404, {"erro": f"Caminho desconhecido: {self.path}", "tipo": "LookupError"})
+        with self.server.pool.emprestar() as conexao:
+            versao = conexao.execute("PRAGMA user_version").fetchone()[0]
+        self.responder(200, {"ok": True, "versao_banco": versao})
+
+    def do_POST(self):
+        try: tamanho = int(self.headers.get("Content-Length") or 0)
+        except ValueError: tamanho = -1
+        if tamanho < 0: # Sem um tamanho válido não há como saber onde o corpo termina: responde e fecha a conexão
+            self.close_connection = True; return self.responder(400, {"erro": "Cabeçalho Content-Length inválido.", "tipo": "ValueError"})
+        if tamanho > TAMANHO_MAXIMO_PEDIDO: self.close_connection = True; return self.responder(413, {"erro": "Pedido grande demais.", "tipo": "ValueError"})
+        corpo = self.rfile.read(tamanho) # Lido antes de qualquer resposta, para não deixar bytes na conexão mantida aberta
+        if not self.autorizado(): return
+        partes = self.path.strip("/").split("/")
+        if len(partes) != 3 or partes[0] != "api" or partes[1] not in METODOS_REMOTOS or partes[2] not in METODOS_REMOTOS[partes[1]]:
+            return self.responder(404, {"erro": f"Método desconhecido: {self.path}", "tipo": "LookupError"})
+        classe = REPOSITORIOS_REMOTOS[partes[1]]; escrita = METODOS_REMOTOS[partes[1]][partes[2]]
+        try:
+            pedido = json.loads(corpo or b"{}")
+            if not isinstance(pedido, dict): raise ValueError("O pedido deve ser um objeto JSON.") # [1], "x" ou 3 também são JSON válido
+            argumentos, opcoes = pedido.get("argumentos", []), pedido.get("opcoes", {})
+            if not isinstance(argumentos, list) or not isinstance(opcoes, dict): raise ValueError("'argumentos' deve ser uma lista e 'opcoes' um objeto.")
+        except ValueError as e: return self.responder_erro(400, e)
+        try:
+            with self.server.pool.emprestar() as conexao:
+                metodo = getattr(classe(conexao), partes[2])
+                if escrita:
+                    with self.server.trava_escrita: resultado = metodo(*argumentos, **opcoes)
+                else: resultado = metodo(*argumentos, **opcoes)
+        except queue.Empty: return self.responder(503, {"erro": "Servidor ocupado: nenhuma conexão livre.", "tipo": "OperationalError"})
+        except sqlite3.IntegrityError as e: return self.responder_erro(409, e)
+        except (TypeError, ValueError) as e: return self.responder_erro(400, e) # Argumentos errados para o método
+        except sqlite3.Error as e: return self.responder_erro(500, e)
+        self.responder(200, {"resultado": resultado})
+
+    def log_message(self, formato, *args): # Só registra as requisições com 'verboso'
+        if self.server.verboso: super().log_message(formato, *args)
+
+class ServidorLivraria(ThreadingHTTPServer):
+    daemon_threads = True # Conexões ainda abertas não impedem o encerramento
+
+    def __init__(self, endereco, caminho_banco, conexoes=CONEXOES_PADRAO, token=None, verboso=False):
+        self.pool = PoolConexoes(caminho_banco, conexoes)
+        self.trava_escrita = threading.Lock()
+        self.token = token; self.verboso = verboso
+        super().__init__(endereco, ManipuladorRequisicoes)
+
+    def server_close(self):
+        super().server_close(); self.pool.fechar()